@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react'
 import { useNavigate, Link } from 'react-router-dom'
 import ProgressBar from '../components/ProgressBar'
 import StatusCard from '../components/StatusCard'
-import { getVendorStatus } from '../services/api'
+import { waitForVendorChanges } from '../services/api'
 
 const DashboardPage = () => {
   const navigate = useNavigate()
@@ -12,32 +12,42 @@ const DashboardPage = () => {
   const [error, setError] = useState('')
 
   useEffect(() => {
-    const loadVendorStatus = async () => {
-      // Get vendor ID from localStorage
-      const storedVendorId = localStorage.getItem('vendorId')
-      if (!storedVendorId) {
-        navigate('/vendor/register')
-        return
-      }
+    // Get vendor ID from localStorage
+    const storedVendorId = localStorage.getItem('vendorId')
+    if (!storedVendorId) {
+      navigate('/vendor/register')
+      return
+    }
 
-      setVendorId(storedVendorId)
+    setVendorId(storedVendorId)
+    let cancelled = false
 
-      try {
-        const data = await getVendorStatus(storedVendorId)
-        setVendorData(data)
-      } catch (err) {
-        console.error('Failed to load vendor status:', err)
-        setError('Failed to load vendor status. Please try again.')
-      } finally {
-        setLoading(false)
+    // The first request returns the current status; each later one is held
+    // open by the server until the vendor changes
+    const watchVendorStatus = async () => {
+      let etag = null
+      while (!cancelled) {
+        try {
+          const update = await waitForVendorChanges(storedVendorId, etag)
+          if (update && !cancelled) {
+            etag = update.etag
+            setVendorData(update.status)
+          }
+          setError('')
+        } catch (err) {
+          console.error('Failed to load vendor status:', err)
+          setError('Failed to load vendor status. Please try again.')
+          await new Promise((resolve) => setTimeout(resolve, 10000))
+        } finally {
+          setLoading(false)
+        }
       }
     }
 
-    loadVendorStatus()
-
-    // Poll for updates every 10 seconds
-    const interval = setInterval(loadVendorStatus, 10000)
-    return () => clearInterval(interval)
+    watchVendorStatus()
+    return () => {
+      cancelled = true
+    }
   }, [navigate])
 
   if (loading) {
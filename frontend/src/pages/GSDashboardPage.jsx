@@ -1,42 +1,80 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
-import { mockVendors } from '../services/mockData'
+import { listVendors } from '../services/api'
+import { PENDING_STATUSES, STATUS_CONFIG, VENDOR_PAGE_SIZE } from '../utils/constants'
+
+// Dashboard filter -> GET /vendors status parameter
+const FILTER_STATUSES = {
+  all: null,
+  pending: PENDING_STATUSES.join(','),
+  approved: 'approved',
+  rejected: 'rejected',
+}
 
 const GSDashboardPage = () => {
   const [vendors, setVendors] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [statusCounts, setStatusCounts] = useState({})
+  const [loading, setLoading] = useState(false)
+  const [error, setError] = useState(null)
   const [filter, setFilter] = useState('all') // all, pending, approved, rejected
   const [searchTerm, setSearchTerm] = useState('')
+  const [debouncedSearch, setDebouncedSearch] = useState('')
+
+  // Search on the server once typing pauses
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(searchTerm.trim()), 300)
+    return () => clearTimeout(timer)
+  }, [searchTerm])
+
+  const fetchPage = async (cursor = null) => {
+    setLoading(true)
+    setError(null)
+    try {
+      const params = { limit: VENDOR_PAGE_SIZE }
+      if (FILTER_STATUSES[filter]) params.status = FILTER_STATUSES[filter]
+      if (debouncedSearch) params.q = debouncedSearch
+      if (cursor) params.cursor = cursor
+
+      const page = await listVendors(params)
+      setVendors(prev => (cursor ? [...prev, ...page.vendors] : page.vendors))
+      setNextCursor(page.next_cursor)
+      setStatusCounts(page.status_counts || {})
+    } catch (err) {
+      setError(err.message)
+    } finally {
+      setLoading(false)
+    }
+  }
 
   useEffect(() => {
-    // TODO: Replace with actual API call
-    setVendors(mockVendors)
-  }, [])
+    fetchPage()
+  }, [filter, debouncedSearch])
 
-  const filteredVendors = vendors.filter(vendor => {
-    const matchesFilter = filter === 'all' || vendor.status === filter
-    const matchesSearch = vendor.company_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                          vendor.contact_email.toLowerCase().includes(searchTerm.toLowerCase())
-    return matchesFilter && matchesSearch
-  })
+  const isPending = (status) => status === 'pending' || PENDING_STATUSES.includes(status)
 
   const getStatusColor = (status) => {
-    switch (status) {
-      case 'approved':
-        return 'bg-green-100 text-green-800'
-      case 'pending':
-        return 'bg-yellow-100 text-yellow-800'
-      case 'rejected':
-        return 'bg-red-100 text-red-800'
-      default:
-        return 'bg-gray-100 text-gray-800'
+    if (status === 'approved' || status === 'onboarding_complete') {
+      return 'bg-green-100 text-green-800'
     }
+    if (status === 'rejected') {
+      return 'bg-red-100 text-red-800'
+    }
+    if (isPending(status)) {
+      return 'bg-yellow-100 text-yellow-800'
+    }
+    return 'bg-gray-100 text-gray-800'
   }
 
+  const getStatusLabel = (status) => (STATUS_CONFIG[status]?.label || status).toUpperCase()
+
+  // Counts come from the API (planner estimates on large tables)
+  const countOf = (statuses) => statuses.reduce((sum, status) => sum + (statusCounts[status] || 0), 0)
   const stats = {
-    total: vendors.length,
-    pending: vendors.filter(v => v.status === 'pending').length,
-    approved: vendors.filter(v => v.status === 'approved').length,
-    rejected: vendors.filter(v => v.status === 'rejected').length,
+    total: Object.values(statusCounts).reduce((sum, count) => sum + count, 0),
+    pending: countOf(PENDING_STATUSES),
+    approved: countOf(['approved']),
+    rejected: countOf(['rejected']),
   }
 
   return (
@@ -122,7 +160,7 @@ const GSDashboardPage = () => {
                   value={searchTerm}
                   onChange={(e) => setSearchTerm(e.target.value)}
                   className="input-field pl-12"
-                  placeholder="Search by company name or email..."
+                  placeholder="Search by company name..."
                 />
               </div>
             </div>
@@ -184,17 +222,19 @@ const GSDashboardPage = () => {
                 </tr>
               </thead>
               <tbody className="bg-white divide-y divide-gs-gray-200">
-                {filteredVendors.length === 0 ? (
+                {vendors.length === 0 ? (
                   <tr>
                     <td colSpan="6" className="px-6 py-12 text-center">
                       <div className="text-gs-gray-400">
                         <span className="text-4xl mb-2 block">📋</span>
-                        <span className="text-sm font-medium">No vendors found matching your criteria</span>
+                        <span className="text-sm font-medium">
+                          {loading ? 'Loading vendors...' : error || 'No vendors found matching your criteria'}
+                        </span>
                       </div>
                     </td>
                   </tr>
                 ) : (
-                  filteredVendors.map((vendor) => (
+                  vendors.map((vendor) => (
                     <tr key={vendor.id} className="hover:bg-gs-gray-50 transition-colors">
                       <td className="px-6 py-4 whitespace-nowrap">
                         <div className="text-sm font-bold text-gs-navy">{vendor.company_name}</div>
@@ -206,11 +246,11 @@ const GSDashboardPage = () => {
                       </td>
                       <td className="px-6 py-4 whitespace-nowrap">
                         <span className={`px-3 py-1.5 inline-flex text-xs leading-5 font-bold rounded-lg ${getStatusColor(vendor.status)}`}>
-                          {vendor.status.toUpperCase()}
+                          {getStatusLabel(vendor.status)}
                         </span>
                       </td>
                       <td className="px-6 py-4 whitespace-nowrap">
-                        {vendor.risk_score ? (
+                        {vendor.risk_score != null ? (
                           <div className="flex items-center">
                             <span className="text-sm font-bold text-gs-navy">{vendor.risk_score}</span>
                             <span className="text-xs text-gs-gray-500 ml-1">/100</span>
@@ -237,6 +277,17 @@ const GSDashboardPage = () => {
               </tbody>
             </table>
           </div>
+          {nextCursor && (
+            <div className="px-6 py-4 border-t border-gs-gray-200 text-center">
+              <button
+                onClick={() => fetchPage(nextCursor)}
+                disabled={loading}
+                className="px-5 py-2.5 rounded-lg font-semibold bg-gs-gray-100 text-gs-navy hover:bg-gs-gray-200 transition-all shadow-sm disabled:opacity-50"
+              >
+                {loading ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </div>
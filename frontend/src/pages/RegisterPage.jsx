@@ -1,4 +1,4 @@
-import { useState } from 'react'
+import { useRef, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
 import VendorForm from '../components/VendorForm'
 import { createVendor } from '../services/api'
@@ -9,12 +9,21 @@ const RegisterPage = () => {
   const [error, setError] = useState('')
   const [success, setSuccess] = useState(false)
 
+  // Resubmitting unchanged details reuses the key, so a request that
+  // succeeded before the error reached us is not created twice
+  const submission = useRef({ payload: null, key: null })
+
   const handleSubmit = async (formData) => {
     setLoading(true)
     setError('')
 
+    const payload = JSON.stringify(formData)
+    if (submission.current.payload !== payload) {
+      submission.current = { payload, key: crypto.randomUUID() }
+    }
+
     try {
-      const response = await createVendor(formData)
+      const response = await createVendor(formData, submission.current.key)
 
       // Store vendor ID in localStorage for future reference
       localStorage.setItem('vendorId', response.id)
@@ -28,7 +37,7 @@ const RegisterPage = () => {
 
     } catch (err) {
       console.error('Registration error:', err)
-      setError(err.response?.data?.message || 'Failed to create vendor account. Please try again.')
+      setError(err.message || 'Failed to create vendor account. Please try again.')
     } finally {
       setLoading(false)
     }
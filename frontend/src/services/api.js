@@ -32,18 +32,42 @@ export const api = {
   /**
    * Create a new vendor
    * @param {Object} vendorData - { company_name, contact_email, ein, address, contact_phone }
+   * @param {string} idempotencyKey - Reuse the same key when retrying the same submission,
+   *   so a request that already succeeded returns the original vendor instead of a duplicate
    * @returns {Promise<Object>} - { id, status, onboarding_progress, ... }
    */
-  createVendor: async (vendorData) => {
+  createVendor: async (vendorData, idempotencyKey = crypto.randomUUID()) => {
     if (USE_MOCK_DATA) {
       return mockData.createVendor(vendorData);
     }
 
     try {
-      const response = await apiClient.post('/vendors', vendorData);
+      const response = await apiClient.post('/vendors', vendorData, {
+        headers: { 'Idempotency-Key': idempotencyKey },
+      });
+      return response.data;
+    } catch (error) {
+      const message = error.response?.data?.error || error.message;
+      throw new Error(`Failed to create vendor: ${message}`);
+    }
+  },
+
+  /**
+   * List vendors for the GS dashboard
+   * @param {Object} params - { status, risk_level, q, limit, cursor }
+   *   status is a comma-separated list; cursor is next_cursor from the previous page
+   * @returns {Promise<Object>} - { vendors, next_cursor, total, total_is_estimate, status_counts }
+   */
+  listVendors: async (params = {}) => {
+    if (USE_MOCK_DATA) {
+      return mockData.listVendors(params);
+    }
+
+    try {
+      const response = await apiClient.get('/vendors', { params });
       return response.data;
     } catch (error) {
-      throw new Error(`Failed to create vendor: ${error.message}`);
+      throw new Error(`Failed to list vendors: ${error.message}`);
     }
   },
 
@@ -65,6 +89,33 @@ export const api = {
     }
   },
 
+  /**
+   * Wait for a vendor's status to change (long poll)
+   * @param {string} vendorId
+   * @param {string|null} etag - etag of the status the caller has; null returns it immediately
+   * @param {number} wait - Seconds the server holds the request open
+   * @returns {Promise<Object|null>} - { etag, changes, status }, or null if nothing changed
+   */
+  waitForVendorChanges: async (vendorId, etag = null, wait = 20) => {
+    if (USE_MOCK_DATA) {
+      if (etag) {
+        await new Promise((resolve) => setTimeout(resolve, 10000));
+      }
+      return { etag: 'mock', changes: [], status: await mockData.getStatus(vendorId) };
+    }
+
+    try {
+      const response = await apiClient.get(`/vendors/${vendorId}/changes`, {
+        params: etag ? { since: etag, wait } : { wait },
+        timeout: (wait + 10) * 1000,
+        validateStatus: (status) => status === 200 || status === 304,
+      });
+      return response.status === 304 ? null : response.data;
+    } catch (error) {
+      throw new Error(`Failed to get vendor changes: ${error.message}`);
+    }
+  },
+
   /**
    * Get presigned URL for document upload
    * @param {string} vendorId
@@ -203,7 +254,9 @@ export const uploadDocument = async (vendorId, documentType, uploadData) => {
 
 // Export individual functions for easier imports
 export const createVendor = api.createVendor;
+export const listVendors = api.listVendors;
 export const getVendorStatus = api.getVendorStatus;
+export const waitForVendorChanges = api.waitForVendorChanges;
 export const getRiskScore = api.getRiskScore;
 export const calculateRiskScore = api.calculateRiskScore;
 export const approveVendor = api.approveVendor;
@@ -12,6 +12,8 @@ const generateId = () => {
   });
 };
 
+import { PENDING_STATUSES, VENDOR_PAGE_SIZE } from '../utils/constants';
+
 // Mock vendor database (for createVendor storage)
 let vendorDatabase = {};
 
@@ -38,6 +40,42 @@ export const mockData = {
     });
   },
 
+  /**
+   * GET /vendors - List vendors (keyset pagination, server-side filters)
+   * Mock vendors use the legacy 'pending' status, counted as under_review
+   */
+  listVendors: ({ status, risk_level, q, limit = VENDOR_PAGE_SIZE, cursor } = {}) => {
+    const statuses = status ? status.split(',') : null;
+    const mockStatus = (vendor) =>
+      vendor.status === 'pending' ? 'under_review' : vendor.status;
+    const search = (q || '').toLowerCase();
+
+    const matching = mockVendors
+      .filter(vendor => !statuses || statuses.includes(mockStatus(vendor)))
+      .filter(vendor => !search || vendor.company_name.toLowerCase().includes(search))
+      .filter(vendor => !risk_level || vendor.risk_level === risk_level)
+      .sort((a, b) => b.created_at.localeCompare(a.created_at) || b.id.localeCompare(a.id));
+
+    const start = cursor ? Number(cursor) : 0;
+    const page = matching.slice(start, start + limit);
+    const nextCursor = start + limit < matching.length ? String(start + limit) : null;
+
+    const statusCounts = {};
+    [...PENDING_STATUSES, 'approved', 'rejected', 'onboarding_complete'].forEach(s => {
+      statusCounts[s] = mockVendors.filter(vendor => mockStatus(vendor) === s).length;
+    });
+
+    return new Promise((resolve) => {
+      setTimeout(() => resolve({
+        vendors: page,
+        next_cursor: nextCursor,
+        total: matching.length,
+        total_is_estimate: false,
+        status_counts: statusCounts
+      }), 300);
+    });
+  },
+
   /**
    * GET /vendors/{id}/status - Get vendor onboarding status
    */
@@ -37,6 +37,17 @@ export const VENDOR_STATUS = {
   ONBOARDING_COMPLETE: 'onboarding_complete'
 };
 
+// Statuses shown as "Pending Review" on the GS dashboard
+export const PENDING_STATUSES = [
+  VENDOR_STATUS.SUBMITTED,
+  VENDOR_STATUS.DOCUMENTS_PENDING,
+  VENDOR_STATUS.UNDER_REVIEW,
+  VENDOR_STATUS.RISK_ASSESSMENT
+];
+
+// GS dashboard page size (GET /vendors)
+export const VENDOR_PAGE_SIZE = 25;
+
 // Status labels and colors
 export const STATUS_CONFIG = {
   submitted: { label: 'Submitted', color: 'blue' },
@@ -59,8 +59,12 @@ api_stack = ApiStack(
     app, "OnboardingHubApiStack",
     upload_handler=lambda_stack.upload_handler,
     status_handler=lambda_stack.status_handler,
+    status_stream_handler=lambda_stack.status_stream_handler,
+    list_vendors_handler=lambda_stack.list_vendors_handler,
+    bulk_import_handler=lambda_stack.bulk_import_handler,
     risk_score_handler=lambda_stack.risk_score_handler,
     approve_handler=lambda_stack.approve_handler,
+    approve_batch_handler=lambda_stack.approve_batch_handler,
     create_vendor_handler=lambda_stack.create_vendor_handler,
     questionnaire_handler=lambda_stack.questionnaire_handler,
     db_init_handler=lambda_stack.db_init_handler,
@@ -3,6 +3,7 @@ API Gateway Stack - REST API for vendor onboarding portal
 """
 from aws_cdk import (
     Stack,
+    Duration,
     aws_apigateway as apigw,
     aws_lambda as lambda_,
     CfnOutput,
@@ -16,8 +17,12 @@ class ApiStack(Stack):
         construct_id: str,
         upload_handler: lambda_.Function,
         status_handler: lambda_.Function,
+        status_stream_handler: lambda_.Function,
+        list_vendors_handler: lambda_.Function,
+        bulk_import_handler: lambda_.Function,
         risk_score_handler: lambda_.Function,
         approve_handler: lambda_.Function,
+        approve_batch_handler: lambda_.Function,
         create_vendor_handler: lambda_.Function,
         questionnaire_handler: lambda_.Function,
         db_init_handler: lambda_.Function,
@@ -38,7 +43,7 @@ class ApiStack(Stack):
             default_cors_preflight_options=apigw.CorsOptions(
                 allow_origins=apigw.Cors.ALL_ORIGINS,
                 allow_methods=apigw.Cors.ALL_METHODS,
-                allow_headers=["Content-Type", "Authorization", "X-Amz-Date"],
+                allow_headers=["Content-Type", "Authorization", "X-Amz-Date", "Idempotency-Key", "If-Match"],
             ),
         )
 
@@ -53,6 +58,26 @@ class ApiStack(Stack):
             apigw.LambdaIntegration(create_vendor_handler),
         )
 
+        # GET /vendors - List vendors (paginated, filterable)
+        vendors.add_method(
+            "GET",
+            apigw.LambdaIntegration(list_vendors_handler),
+        )
+
+        # POST /vendors/import - Bulk import (NDJSON or CSV body)
+        vendors_import = vendors.add_resource("import")
+        vendors_import.add_method(
+            "POST",
+            apigw.LambdaIntegration(bulk_import_handler),
+        )
+
+        # POST /vendors/approve-batch - Approve/reject many vendors at once
+        vendors_approve_batch = vendors.add_resource("approve-batch")
+        vendors_approve_batch.add_method(
+            "POST",
+            apigw.LambdaIntegration(approve_batch_handler),
+        )
+
         # ====================
         # /vendors/{id} Resource
         # ====================
@@ -65,6 +90,16 @@ class ApiStack(Stack):
             apigw.LambdaIntegration(status_handler),
         )
 
+        # GET /vendors/{id}/changes - Long poll for status changes
+        vendor_changes = vendor_by_id.add_resource("changes")
+        vendor_changes.add_method(
+            "GET",
+            apigw.LambdaIntegration(
+                status_stream_handler,
+                timeout=Duration.seconds(29),
+            ),
+        )
+
         # GET /vendors/{id}/risk-score - Get risk score
         vendor_risk = vendor_by_id.add_resource("risk-score")
         vendor_risk.add_method(
@@ -31,6 +31,14 @@ from aws_cdk import (
     aws_iam as iam,
     aws_secretsmanager as secretsmanager,
     aws_s3_notifications as s3_notifications,
+    aws_sns as sns,
+    aws_sns_subscriptions as sns_subscriptions,
+    aws_sqs as sqs,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_events as events,
+    aws_events_targets as events_targets,
+    aws_dynamodb as dynamodb,
+    RemovalPolicy,
     CfnOutput,
 )
 from constructs import Construct
@@ -69,6 +77,39 @@ class LambdaStack(Stack):
             'DOCUMENT_BUCKET': document_bucket.bucket_name,
         }
 
+        # ====================
+        # Audit event queue
+        # ====================
+        # Handlers queue their audit events after committing; the audit writer
+        # inserts them into the partitioned audit_logs table in batches
+        self.audit_dead_letter_queue = sqs.Queue(
+            self, "AuditDeadLetterQueue",
+            retention_period=Duration.days(14),
+        )
+        self.audit_queue = sqs.Queue(
+            self, "AuditQueue",
+            visibility_timeout=Duration.seconds(180),
+            retention_period=Duration.days(4),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=5,
+                queue=self.audit_dead_letter_queue,
+            ),
+        )
+        common_env['AUDIT_QUEUE_URL'] = self.audit_queue.queue_url
+
+        # ====================
+        # Status cache versions
+        # ====================
+        # Per-vendor versions bumped by every write path; the status handler
+        # serves its in-process cache only while the version is unchanged
+        self.status_cache_table = dynamodb.Table(
+            self, "StatusCacheTable",
+            partition_key=dynamodb.Attribute(name="cache_key", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,  # Only holds cache versions
+        )
+        common_env['STATUS_CACHE_TABLE'] = self.status_cache_table.table_name
+
         # ====================
         # Create psycopg2 Lambda Layer
         # ====================
@@ -80,6 +121,18 @@ class LambdaStack(Stack):
             description="psycopg2-binary and boto3 for PostgreSQL connectivity",
         )
 
+        # ====================
+        # Create shared code Lambda Layer
+        # ====================
+        # layers/shared/python/shared -> importable as `shared` (warm DB connection reuse, etc.)
+        shared_layer_path = os.path.join(os.path.dirname(__file__), '..', '..', 'layers', 'shared')
+        shared_layer = lambda_.LayerVersion(
+            self, "SharedLayer",
+            code=lambda_.Code.from_asset(shared_layer_path),
+            compatible_runtimes=[lambda_.Runtime.PYTHON_3_11],
+            description="Shared database helpers for the onboarding hub Lambdas",
+        )
+
         # ====================
         # Lambda Function: Upload Handler
         # ====================
@@ -114,11 +167,13 @@ class LambdaStack(Stack):
             vpc=vpc,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
             description="Create new vendor in database",
-            layers=[psycopg2_layer],
+            layers=[psycopg2_layer, shared_layer],
         )
 
-        # Grant database access
+        # Grant database access and audit queue access
         db_secret.grant_read(self.create_vendor_handler)
+        self.audit_queue.grant_send_messages(self.create_vendor_handler)
+        self.status_cache_table.grant_write_data(self.create_vendor_handler)
         # Database security group will be modified in database_stack to allow access from Lambda security groups
 
         # ====================
@@ -135,13 +190,88 @@ class LambdaStack(Stack):
             vpc=vpc,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
             description="Get vendor onboarding status",
-            layers=[psycopg2_layer],
+            layers=[psycopg2_layer, shared_layer],
         )
 
         # Grant database access
         db_secret.grant_read(self.status_handler)
+        self.status_cache_table.grant_read_data(self.status_handler)
         # Database security group will be modified in database_stack to allow access from Lambda security groups
 
+        # ====================
+        # Lambda Function: Status Changes (long poll)
+        # ====================
+        # Holds GET /vendors/{id}/changes open until a write handler NOTIFYs
+        # a change for the vendor; stays under API Gateway's 29s limit
+        self.status_stream_handler = lambda_.Function(
+            self, "StatusStreamHandler",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="stream.handler",
+            code=lambda_.Code.from_asset("../lambda/status_handler"),
+            timeout=Duration.seconds(30),
+            memory_size=256,
+            environment={
+                **common_env,
+                'STATUS_STREAM_MAX_WAIT_SECONDS': '25',
+                'STATUS_STREAM_POLL_SECONDS': '1',
+            },
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            # Waits on the StatusCacheTable version, not a PostgreSQL connection
+            description="Long poll for vendor status changes (status cache version)",
+            layers=[psycopg2_layer, shared_layer],
+        )
+
+        # Grant database access
+        db_secret.grant_read(self.status_stream_handler)
+        self.status_cache_table.grant_read_data(self.status_stream_handler)
+
+        # ====================
+        # Lambda Function: List Vendors
+        # ====================
+        self.list_vendors_handler = lambda_.Function(
+            self, "ListVendorsHandler",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="index.handler",
+            code=lambda_.Code.from_asset("../lambda/list_vendors"),
+            timeout=Duration.seconds(30),
+            memory_size=512,
+            environment=common_env,
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            description="List vendors for the GS dashboard (keyset pagination)",
+            layers=[psycopg2_layer, shared_layer],
+        )
+
+        # Grant database access
+        db_secret.grant_read(self.list_vendors_handler)
+
+        # ====================
+        # Lambda Function: Bulk Vendor Import
+        # ====================
+        # POST /vendors/import, or files dropped in imports/incoming/ (S3
+        # notification configured by scripts/configure_s3_notifications.sh)
+        self.bulk_import_handler = lambda_.Function(
+            self, "BulkImportHandler",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="index.handler",
+            code=lambda_.Code.from_asset("../lambda/bulk_import"),
+            timeout=Duration.minutes(15),
+            memory_size=1024,
+            environment=common_env,
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            description="Bulk import vendors from NDJSON/CSV with COPY",
+            layers=[psycopg2_layer, shared_layer],
+        )
+
+        # Grant database, audit queue and import file access
+        db_secret.grant_read(self.bulk_import_handler)
+        self.audit_queue.grant_send_messages(self.bulk_import_handler)
+        document_bucket.grant_read(self.bulk_import_handler, "imports/incoming/*")
+        document_bucket.grant_put(self.bulk_import_handler, "imports/results/*")
+        kms_key.grant_encrypt_decrypt(self.bulk_import_handler)
+
         # ====================
         # Lambda Function: Risk Scoring
         # ====================
@@ -156,11 +286,14 @@ class LambdaStack(Stack):
             vpc=vpc,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
             description="Calculate vendor risk scores",
-            layers=[psycopg2_layer],
+            layers=[psycopg2_layer, shared_layer],
         )
 
-        # Grant database access
+        # Grant database access, audit queue access and read access to list snapshots
         db_secret.grant_read(self.risk_score_handler)
+        self.audit_queue.grant_send_messages(self.risk_score_handler)
+        self.status_cache_table.grant_write_data(self.risk_score_handler)
+        document_bucket.grant_read(self.risk_score_handler, "sanctions-lists/*")
         # Database security group will be modified in database_stack to allow access from Lambda security groups
 
         # Grant Textract permissions (for Person 3's integration)
@@ -185,6 +318,66 @@ class LambdaStack(Stack):
             )
         )
 
+        # ====================
+        # Lambda Function: Bulk Risk Re-scoring
+        # ====================
+        self.risk_rescore_handler = lambda_.Function(
+            self, "RiskRescoreHandler",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="batch.handler",
+            code=lambda_.Code.from_asset("../lambda/risk_scoring"),
+            timeout=Duration.minutes(15),
+            memory_size=1024,
+            environment=common_env,
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            description="Re-score every vendor with an expired (or, on demand, any) risk score",
+            layers=[psycopg2_layer, shared_layer],
+        )
+
+        # Grant database access, audit queue access and read access to list snapshots
+        db_secret.grant_read(self.risk_rescore_handler)
+        self.audit_queue.grant_send_messages(self.risk_rescore_handler)
+        self.status_cache_table.grant_write_data(self.risk_rescore_handler)
+        document_bucket.grant_read(self.risk_rescore_handler, "sanctions-lists/*")
+
+        # Nightly re-score of expired risk scores; invoke with {"mode": "all"} after weight changes
+        events.Rule(
+            self, "NightlyRiskRescore",
+            schedule=events.Schedule.cron(minute="0", hour="6"),
+            targets=[events_targets.LambdaFunction(
+                self.risk_rescore_handler,
+                event=events.RuleTargetInput.from_object({"mode": "expired"}),
+            )],
+        )
+
+        # ====================
+        # Lambda Function: Sanctions Re-screen
+        # ====================
+        # Invoked when a sanctions list update is published, e.g.
+        # {"previous": "sanctions-lists/2025-11-01/", "current": "sanctions-lists/2025-11-02/"}
+        self.sanctions_rescreen_handler = lambda_.Function(
+            self, "SanctionsRescreenHandler",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="rescreen.handler",
+            code=lambda_.Code.from_asset("../lambda/risk_scoring"),
+            timeout=Duration.minutes(15),
+            memory_size=1024,
+            environment=common_env,
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            description="Re-screen only the vendors affected by a sanctions list update",
+            layers=[psycopg2_layer, shared_layer],
+        )
+
+        # Grant database access, audit queue access, read access to list
+        # snapshots and publishing of the current snapshot
+        db_secret.grant_read(self.sanctions_rescreen_handler)
+        self.audit_queue.grant_send_messages(self.sanctions_rescreen_handler)
+        self.status_cache_table.grant_write_data(self.sanctions_rescreen_handler)
+        document_bucket.grant_read(self.sanctions_rescreen_handler, "sanctions-lists/*")
+        document_bucket.grant_put(self.sanctions_rescreen_handler, "sanctions-lists/CURRENT")
+
         # ====================
         # Lambda Function: Approve Vendor
         # ====================
@@ -199,11 +392,13 @@ class LambdaStack(Stack):
             vpc=vpc,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
             description="Approve or reject vendor",
-            layers=[psycopg2_layer],
+            layers=[psycopg2_layer, shared_layer],
         )
 
-        # Grant database access
+        # Grant database access and audit queue access
         db_secret.grant_read(self.approve_handler)
+        self.audit_queue.grant_send_messages(self.approve_handler)
+        self.status_cache_table.grant_write_data(self.approve_handler)
         # Database security group will be modified in database_stack to allow access from Lambda security groups
 
         # Grant SES permissions for email notifications
@@ -214,6 +409,64 @@ class LambdaStack(Stack):
             )
         )
 
+        # ====================
+        # Lambda Function: Approve Vendors (batch)
+        # ====================
+        self.approve_batch_handler = lambda_.Function(
+            self, "ApproveBatchHandler",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="batch.handler",
+            code=lambda_.Code.from_asset("../lambda/approve_vendor"),
+            timeout=Duration.seconds(30),
+            memory_size=512,
+            environment=common_env,
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            description="Approve or reject a batch of vendors in one transaction",
+            layers=[psycopg2_layer, shared_layer],
+        )
+
+        # Grant database access and audit queue access
+        db_secret.grant_read(self.approve_batch_handler)
+        self.audit_queue.grant_send_messages(self.approve_batch_handler)
+        self.status_cache_table.grant_write_data(self.approve_batch_handler)
+
+        # ====================
+        # Textract completion notifications (SNS -> SQS)
+        # ====================
+        # Textract publishes a message when an async analysis job finishes;
+        # the document processor consumes it instead of polling the job
+        self.textract_topic = sns.Topic(
+            self, "TextractCompletionTopic",
+            display_name="Textract job completion",
+        )
+
+        textract_sns_role = iam.Role(
+            self, "TextractSnsRole",
+            assumed_by=iam.ServicePrincipal("textract.amazonaws.com"),
+            description="Allows Textract to publish job completion to SNS",
+        )
+        self.textract_topic.grant_publish(textract_sns_role)
+
+        # Messages that keep failing (e.g. the database is unreachable) are
+        # parked here instead of being redelivered until retention expires
+        self.textract_completion_dead_letter_queue = sqs.Queue(
+            self, "TextractCompletionDeadLetterQueue",
+            retention_period=Duration.days(14),
+        )
+        self.textract_completion_queue = sqs.Queue(
+            self, "TextractCompletionQueue",
+            visibility_timeout=Duration.seconds(360),
+            retention_period=Duration.days(4),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=5,
+                queue=self.textract_completion_dead_letter_queue,
+            ),
+        )
+        self.textract_topic.add_subscription(
+            sns_subscriptions.SqsSubscription(self.textract_completion_queue)
+        )
+
         # ====================
         # Lambda Function: Document Processor (OCR with Textract)
         # ====================
@@ -222,17 +475,23 @@ class LambdaStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_11,
             handler="index.handler",
             code=lambda_.Code.from_asset("../lambda/document_processor"),
-            timeout=Duration.seconds(300),  # 5 minutes for Textract processing
+            timeout=Duration.seconds(300),  # Stage two fetches and parses every result page
             memory_size=1024,
-            environment=common_env,
+            environment={
+                **common_env,
+                'TEXTRACT_SNS_TOPIC_ARN': self.textract_topic.topic_arn,
+                'TEXTRACT_SNS_ROLE_ARN': textract_sns_role.role_arn,
+                'DOCUMENT_PROCESSOR_WORKERS': '4',
+            },
             vpc=vpc,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
             description="Process documents with AWS Textract for OCR and data extraction",
-            layers=[psycopg2_layer],
+            layers=[psycopg2_layer, shared_layer],
         )
 
         # Grant database access
         db_secret.grant_read(self.document_processor)
+        self.status_cache_table.grant_write_data(self.document_processor)
 
         # Grant S3 read access to document bucket
         document_bucket.grant_read(self.document_processor)
@@ -241,6 +500,7 @@ class LambdaStack(Stack):
         self.document_processor.add_to_role_policy(
             iam.PolicyStatement(
                 actions=[
+                    "textract:AnalyzeDocument",
                     "textract:StartDocumentAnalysis",
                     "textract:GetDocumentAnalysis",
                 ],
@@ -248,6 +508,20 @@ class LambdaStack(Stack):
             )
         )
 
+        # Textract assumes this role to publish the completion message
+        textract_sns_role.grant_pass_role(self.document_processor)
+
+        # Stage two: run when Textract reports the job finished; completions
+        # are batched and only failed messages are redelivered
+        self.document_processor.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                self.textract_completion_queue,
+                batch_size=10,
+                max_batching_window=Duration.seconds(5),
+                report_batch_item_failures=True,
+            )
+        )
+
         # Note: S3 event notifications must be configured post-deployment to avoid
         # circular dependency (StorageStack -> LambdaStack via event notification)
         # Run: infrastructure/scripts/configure_s3_notifications.sh after deployment
@@ -266,11 +540,56 @@ class LambdaStack(Stack):
             vpc=vpc,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
             description="Save vendor KY3P questionnaire responses",
-            layers=[psycopg2_layer],
+            layers=[psycopg2_layer, shared_layer],
         )
 
-        # Grant database access
+        # Grant database access and audit queue access
         db_secret.grant_read(self.questionnaire_handler)
+        self.audit_queue.grant_send_messages(self.questionnaire_handler)
+        self.status_cache_table.grant_write_data(self.questionnaire_handler)
+
+        # ====================
+        # Lambda Function: Audit Writer
+        # ====================
+        self.audit_writer_handler = lambda_.Function(
+            self, "AuditWriterHandler",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="index.handler",
+            code=lambda_.Code.from_asset("../lambda/audit_writer"),
+            timeout=Duration.seconds(60),
+            memory_size=512,
+            environment=common_env,
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            description="Batch-insert queued audit events; daily audit partition, idempotency key and extraction cache housekeeping",
+            layers=[psycopg2_layer, shared_layer],
+        )
+
+        # Grant database access and status cache invalidation (the status
+        # timeline is read from audit_logs)
+        db_secret.grant_read(self.audit_writer_handler)
+        self.status_cache_table.grant_write_data(self.audit_writer_handler)
+
+        # Up to 100 messages (each a request's events) per COPY
+        self.audit_writer_handler.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                self.audit_queue,
+                batch_size=100,
+                max_batching_window=Duration.seconds(10),
+                report_batch_item_failures=True,
+            )
+        )
+
+        # Daily: create upcoming monthly partitions, detach expired ones,
+        # purge expired idempotency keys, evict the extraction cache
+        events.Rule(
+            self, "AuditPartitionMaintenance",
+            schedule=events.Schedule.cron(minute="30", hour="5"),
+            targets=[events_targets.LambdaFunction(
+                self.audit_writer_handler,
+                event=events.RuleTargetInput.from_object({"action": "maintain_partitions"}),
+            )],
+        )
 
         # ====================
         # Lambda Function: Database Initialization
@@ -286,7 +605,7 @@ class LambdaStack(Stack):
             vpc=vpc,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
             description="Initialize RDS database schema and seed data",
-            layers=[psycopg2_layer],
+            layers=[psycopg2_layer, shared_layer],
         )
 
         # Grant database access
@@ -317,6 +636,12 @@ class LambdaStack(Stack):
             description="Document Processor Lambda ARN",
         )
 
+        CfnOutput(
+            self, "BulkImportHandlerArn",
+            value=self.bulk_import_handler.function_arn,
+            description="Bulk Import Handler Lambda ARN",
+        )
+
         CfnOutput(
             self, "DbInitHandlerArn",
             value=self.db_init_handler.function_arn,
@@ -71,6 +71,10 @@ class VpcStack(Stack):
             "S3Endpoint",
             service=ec2.GatewayVpcEndpointAwsService.S3,
         )
+        self.vpc.add_gateway_endpoint(
+            "DynamoDbEndpoint",
+            service=ec2.GatewayVpcEndpointAwsService.DYNAMODB,
+        )
 
         # Outputs
         CfnOutput(
@@ -0,0 +1,4 @@
+-- Record which risk model version produced each risk score
+-- Safe to run more than once
+
+ALTER TABLE risk_scores ADD COLUMN IF NOT EXISTS model_version VARCHAR(50);
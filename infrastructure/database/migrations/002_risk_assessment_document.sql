@@ -0,0 +1,9 @@
+-- Store the computed risk assessment so GET /vendors/{id}/risk-score is a
+-- single indexed lookup. Rows scored before this migration keep a NULL
+-- assessment and are rebuilt from their scores on read.
+-- Safe to run more than once
+
+ALTER TABLE risk_scores ADD COLUMN IF NOT EXISTS assessment JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_risk_scores_vendor_calculated
+    ON risk_scores(vendor_id, calculated_at DESC);
@@ -0,0 +1,13 @@
+-- Indexes behind GET /vendors (dashboard listing)
+-- Safe to run more than once
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_vendors_created_id
+    ON vendors(created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_vendors_status_created_id
+    ON vendors(status, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_vendors_company_name_trgm
+    ON vendors USING gin (company_name gin_trgm_ops);
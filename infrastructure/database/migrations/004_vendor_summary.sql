@@ -0,0 +1,150 @@
+-- Replace the vendor_dashboard view (which joined every document and every
+-- historical risk score) with a trigger-maintained vendor_summary table
+-- Safe to run more than once
+
+BEGIN;
+
+-- Superseded by the vendor_summary listing indexes
+DROP INDEX IF EXISTS idx_vendors_created_id;
+DROP INDEX IF EXISTS idx_vendors_status_created_id;
+
+CREATE TABLE IF NOT EXISTS vendor_summary (
+    vendor_id UUID PRIMARY KEY REFERENCES vendors(id) ON DELETE CASCADE,
+
+    -- Copied from vendors for filtering and keyset pagination
+    status VARCHAR(50),
+    created_at TIMESTAMP,
+
+    -- Document counts
+    document_count INT NOT NULL DEFAULT 0,
+    verified_documents INT NOT NULL DEFAULT 0,
+
+    -- Latest risk score
+    risk_score INT,
+    risk_level VARCHAR(20),
+    risk_assessed_at TIMESTAMP
+);
+
+-- Dashboard listing: keyset pagination on (created_at, vendor_id), optionally filtered
+CREATE INDEX IF NOT EXISTS idx_vendor_summary_created ON vendor_summary(created_at DESC, vendor_id DESC);
+CREATE INDEX IF NOT EXISTS idx_vendor_summary_status_created ON vendor_summary(status, created_at DESC, vendor_id DESC);
+CREATE INDEX IF NOT EXISTS idx_vendor_summary_risk_created ON vendor_summary(risk_level, created_at DESC, vendor_id DESC);
+
+-- vendor_summary: create the row with the vendor and follow status changes
+CREATE OR REPLACE FUNCTION vendor_summary_sync_vendor()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO vendor_summary (vendor_id, status, created_at)
+        VALUES (NEW.id, NEW.status, NEW.created_at)
+        ON CONFLICT (vendor_id) DO NOTHING;
+    ELSE
+        UPDATE vendor_summary
+        SET status = NEW.status, created_at = NEW.created_at
+        WHERE vendor_id = NEW.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS vendor_summary_on_vendor ON vendors;
+CREATE TRIGGER vendor_summary_on_vendor AFTER INSERT OR UPDATE OF status, created_at ON vendors
+    FOR EACH ROW EXECUTE FUNCTION vendor_summary_sync_vendor();
+
+-- vendor_summary: adjust document counts by the row that changed
+CREATE OR REPLACE FUNCTION vendor_summary_sync_document()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE vendor_summary
+        SET document_count = document_count - 1,
+            verified_documents = verified_documents - CASE WHEN OLD.status = 'verified' THEN 1 ELSE 0 END
+        WHERE vendor_id = OLD.vendor_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE vendor_summary
+        SET document_count = document_count + 1,
+            verified_documents = verified_documents + CASE WHEN NEW.status = 'verified' THEN 1 ELSE 0 END
+        WHERE vendor_id = NEW.vendor_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS vendor_summary_on_document ON documents;
+CREATE TRIGGER vendor_summary_on_document AFTER INSERT OR DELETE OR UPDATE OF status, vendor_id ON documents
+    FOR EACH ROW EXECUTE FUNCTION vendor_summary_sync_document();
+
+-- vendor_summary: latest risk score; statement-level so a bulk COPY of
+-- scores is one set-based update
+CREATE OR REPLACE FUNCTION vendor_summary_sync_risk_scores()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE vendor_summary s
+    SET risk_score = latest.overall_score,
+        risk_level = latest.risk_level,
+        risk_assessed_at = latest.calculated_at
+    FROM (
+        SELECT DISTINCT ON (vendor_id) vendor_id, overall_score, risk_level, calculated_at
+        FROM new_scores
+        ORDER BY vendor_id, calculated_at DESC
+    ) latest
+    WHERE s.vendor_id = latest.vendor_id
+      AND (s.risk_assessed_at IS NULL OR s.risk_assessed_at <= latest.calculated_at);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS vendor_summary_on_risk_scores ON risk_scores;
+CREATE TRIGGER vendor_summary_on_risk_scores AFTER INSERT ON risk_scores
+    REFERENCING NEW TABLE AS new_scores
+    FOR EACH STATEMENT EXECUTE FUNCTION vendor_summary_sync_risk_scores();
+
+-- Backfill (or repair) every vendor's summary
+INSERT INTO vendor_summary (
+    vendor_id, status, created_at, document_count, verified_documents,
+    risk_score, risk_level, risk_assessed_at
+)
+SELECT v.id, v.status, v.created_at,
+       COALESCE(d.document_count, 0), COALESCE(d.verified_documents, 0),
+       r.overall_score, r.risk_level, r.calculated_at
+FROM vendors v
+LEFT JOIN (
+    SELECT vendor_id,
+           COUNT(*) AS document_count,
+           COUNT(*) FILTER (WHERE status = 'verified') AS verified_documents
+    FROM documents
+    GROUP BY vendor_id
+) d ON d.vendor_id = v.id
+LEFT JOIN (
+    SELECT DISTINCT ON (vendor_id) vendor_id, overall_score, risk_level, calculated_at
+    FROM risk_scores
+    ORDER BY vendor_id, calculated_at DESC
+) r ON r.vendor_id = v.id
+ON CONFLICT (vendor_id) DO UPDATE SET
+    status = EXCLUDED.status,
+    created_at = EXCLUDED.created_at,
+    document_count = EXCLUDED.document_count,
+    verified_documents = EXCLUDED.verified_documents,
+    risk_score = EXCLUDED.risk_score,
+    risk_level = EXCLUDED.risk_level,
+    risk_assessed_at = EXCLUDED.risk_assessed_at;
+
+DROP VIEW IF EXISTS vendor_dashboard;
+CREATE VIEW vendor_dashboard AS
+SELECT
+    v.id,
+    v.company_name,
+    v.contact_email,
+    v.status,
+    v.onboarding_progress,
+    v.created_at,
+    s.document_count,
+    s.verified_documents,
+    s.risk_score,
+    s.risk_level,
+    s.risk_assessed_at
+FROM vendors v
+JOIN vendor_summary s ON s.vendor_id = v.id;
+
+COMMIT;
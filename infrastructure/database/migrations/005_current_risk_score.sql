@@ -0,0 +1,57 @@
+-- Point vendor_summary at each vendor's current risk_scores row, so reading
+-- the current score is a primary-key lookup instead of a scan of the history
+-- Safe to run more than once
+
+BEGIN;
+
+ALTER TABLE vendor_summary
+    ADD COLUMN IF NOT EXISTS current_risk_score_id UUID REFERENCES risk_scores(id) ON DELETE SET NULL;
+
+CREATE OR REPLACE FUNCTION vendor_summary_sync_risk_scores()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE vendor_summary s
+    SET current_risk_score_id = latest.id,
+        risk_score = latest.overall_score,
+        risk_level = latest.risk_level,
+        risk_assessed_at = latest.calculated_at
+    FROM (
+        SELECT DISTINCT ON (vendor_id) id, vendor_id, overall_score, risk_level, calculated_at
+        FROM new_scores
+        ORDER BY vendor_id, calculated_at DESC
+    ) latest
+    WHERE s.vendor_id = latest.vendor_id
+      AND (s.risk_assessed_at IS NULL OR s.risk_assessed_at <= latest.calculated_at);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Backfill the pointer from the score history
+UPDATE vendor_summary s
+SET current_risk_score_id = latest.id,
+    risk_score = latest.overall_score,
+    risk_level = latest.risk_level,
+    risk_assessed_at = latest.calculated_at
+FROM (
+    SELECT DISTINCT ON (vendor_id) id, vendor_id, overall_score, risk_level, calculated_at
+    FROM risk_scores
+    ORDER BY vendor_id, calculated_at DESC
+) latest
+WHERE s.vendor_id = latest.vendor_id
+  AND s.current_risk_score_id IS DISTINCT FROM latest.id;
+
+DROP VIEW IF EXISTS high_risk_vendors;
+CREATE VIEW high_risk_vendors AS
+SELECT
+    v.*,
+    rs.overall_score,
+    rs.red_flags,
+    rs.calculated_at
+FROM vendor_summary s
+INNER JOIN vendors v ON v.id = s.vendor_id
+INNER JOIN risk_scores rs ON rs.id = s.current_risk_score_id
+WHERE s.risk_level IN ('high', 'critical')
+  AND v.status NOT IN ('rejected', 'approved')
+ORDER BY rs.overall_score DESC;
+
+COMMIT;
@@ -0,0 +1,116 @@
+-- Convert audit_logs to a table partitioned by month, with partition
+-- maintenance and retention functions
+-- Safe to run more than once
+
+BEGIN;
+
+-- audit_logs: create the monthly partition containing for_month
+CREATE OR REPLACE FUNCTION audit_logs_create_partition(for_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', for_month)::date;
+    partition_name TEXT := 'audit_logs_' || to_char(start_date, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, (start_date + INTERVAL '1 month')::date
+    );
+    RETURN partition_name;
+END;
+$$ language 'plpgsql';
+
+-- audit_logs: make sure partitions exist for this month and the next months_ahead
+CREATE OR REPLACE FUNCTION audit_logs_ensure_partitions(months_ahead INT DEFAULT 3)
+RETURNS VOID AS $$
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        PERFORM audit_logs_create_partition(
+            (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::date
+        );
+    END LOOP;
+END;
+$$ language 'plpgsql';
+
+-- audit_logs: detach (optionally drop) monthly partitions older than
+-- retain_months; detached partitions can be archived and dropped later
+CREATE OR REPLACE FUNCTION audit_logs_detach_expired(retain_months INT, drop_detached BOOLEAN DEFAULT FALSE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => retain_months))::date;
+    expired RECORD;
+BEGIN
+    FOR expired IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'audit_logs'::regclass
+          AND c.relname ~ '^audit_logs_[0-9]{4}_[0-9]{2}$'
+          AND to_date(substring(c.relname FROM 12), 'YYYY_MM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE audit_logs DETACH PARTITION %I', expired.relname);
+        IF drop_detached THEN
+            EXECUTE format('DROP TABLE %I', expired.relname);
+        END IF;
+        RETURN NEXT expired.relname;
+    END LOOP;
+END;
+$$ language 'plpgsql';
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'audit_logs'::regclass) THEN
+        RETURN;
+    END IF;
+
+    -- Free the index names for the partitioned table
+    ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned;
+    ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey;
+    DROP INDEX IF EXISTS idx_audit_vendor;
+    DROP INDEX IF EXISTS idx_audit_timestamp;
+    DROP INDEX IF EXISTS idx_audit_action;
+    DROP INDEX IF EXISTS idx_audit_actor;
+    DROP INDEX IF EXISTS idx_audit_vendor_timestamp;
+
+    CREATE TABLE audit_logs (
+        id UUID NOT NULL DEFAULT uuid_generate_v4(),
+        vendor_id UUID,
+        action VARCHAR(100) NOT NULL,
+        actor VARCHAR(255),
+        actor_ip VARCHAR(50),
+        metadata JSONB,
+        success BOOLEAN DEFAULT TRUE,
+        error_message TEXT,
+        timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, timestamp)
+    ) PARTITION BY RANGE (timestamp);
+
+    CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+    CREATE INDEX idx_audit_vendor_timestamp ON audit_logs(vendor_id, timestamp DESC);
+    CREATE INDEX idx_audit_action ON audit_logs(action);
+    CREATE INDEX idx_audit_actor ON audit_logs(actor);
+
+    -- One partition per month of existing history, plus the months ahead
+    PERFORM audit_logs_create_partition(month::date)
+    FROM generate_series(
+        date_trunc('month', (SELECT COALESCE(MIN(timestamp), CURRENT_TIMESTAMP) FROM audit_logs_unpartitioned)),
+        date_trunc('month', CURRENT_TIMESTAMP),
+        INTERVAL '1 month'
+    ) AS month;
+    PERFORM audit_logs_ensure_partitions(3);
+
+    INSERT INTO audit_logs (
+        id, vendor_id, action, actor, actor_ip, metadata, success, error_message, timestamp
+    )
+    SELECT id, vendor_id, action, actor, actor_ip, metadata, success, error_message,
+           COALESCE(timestamp, CURRENT_TIMESTAMP)
+    FROM audit_logs_unpartitioned;
+
+    DROP TABLE audit_logs_unpartitioned;
+END;
+$$;
+
+SELECT audit_logs_ensure_partitions(3);
+
+COMMIT;
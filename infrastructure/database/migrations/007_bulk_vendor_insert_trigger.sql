@@ -0,0 +1,36 @@
+-- Create vendor_summary rows with one statement-level trigger per INSERT or
+-- COPY into vendors, instead of one trigger call per vendor (bulk import)
+-- Safe to run more than once
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION vendor_summary_add_vendors()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO vendor_summary (vendor_id, status, created_at)
+    SELECT id, status, created_at FROM new_vendors
+    ON CONFLICT (vendor_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION vendor_summary_sync_vendor()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE vendor_summary
+    SET status = NEW.status, created_at = NEW.created_at
+    WHERE vendor_id = NEW.id;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS vendor_summary_on_vendor_insert ON vendors;
+CREATE TRIGGER vendor_summary_on_vendor_insert AFTER INSERT ON vendors
+    REFERENCING NEW TABLE AS new_vendors
+    FOR EACH STATEMENT EXECUTE FUNCTION vendor_summary_add_vendors();
+
+DROP TRIGGER IF EXISTS vendor_summary_on_vendor ON vendors;
+CREATE TRIGGER vendor_summary_on_vendor AFTER UPDATE OF status, created_at ON vendors
+    FOR EACH ROW EXECUTE FUNCTION vendor_summary_sync_vendor();
+
+COMMIT;
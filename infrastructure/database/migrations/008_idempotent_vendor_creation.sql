@@ -0,0 +1,30 @@
+-- Idempotency keys for POST /vendors and unique normalized EIN / contact
+-- email on vendors
+-- Safe to run more than once. Creating the unique indexes fails if
+-- duplicates already exist; find them with:
+--   SELECT NULLIF(regexp_replace(ein, '[^0-9]', '', 'g'), ''), array_agg(id)
+--   FROM vendors GROUP BY 1 HAVING COUNT(*) > 1 AND NULLIF(regexp_replace(ein, '[^0-9]', '', 'g'), '') IS NOT NULL;
+--   SELECT lower(contact_email), array_agg(id) FROM vendors GROUP BY 1 HAVING COUNT(*) > 1;
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope VARCHAR(100) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    response_status INT,
+    response_body TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+
+    PRIMARY KEY (scope, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vendors_ein_normalized
+    ON vendors ((NULLIF(regexp_replace(ein, '[^0-9]', '', 'g'), '')));
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vendors_email_normalized
+    ON vendors ((lower(contact_email)));
+
+COMMIT;
@@ -0,0 +1,21 @@
+-- Optimistic locking for vendor decisions: vendors.version is incremented by
+-- every update and compared against the client's If-Match header
+-- Safe to run more than once.
+
+BEGIN;
+
+ALTER TABLE vendors ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION increment_version_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version = OLD.version + 1;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS increment_vendors_version ON vendors;
+CREATE TRIGGER increment_vendors_version BEFORE UPDATE ON vendors
+    FOR EACH ROW EXECUTE FUNCTION increment_version_column();
+
+COMMIT;
@@ -0,0 +1,22 @@
+-- Content-addressed cache of document extraction results, and the content
+-- hash of each document
+-- Safe to run more than once.
+
+BEGIN;
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_sha256 CHAR(64);
+
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    content_sha256 CHAR(64) NOT NULL,
+    document_type VARCHAR(50) NOT NULL,
+    extracted_data JSONB NOT NULL,
+    hit_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (content_sha256, document_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used ON extraction_cache(last_used_at);
+
+COMMIT;
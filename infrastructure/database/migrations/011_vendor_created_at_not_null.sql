@@ -0,0 +1,21 @@
+-- (created_at, vendor_id) is the keyset cursor of GET /vendors; a NULL
+-- created_at cannot be encoded as a cursor and never compares in the
+-- row-value predicate, so both columns are made NOT NULL
+-- Safe to run more than once.
+
+BEGIN;
+
+UPDATE vendors
+SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+WHERE created_at IS NULL;
+
+ALTER TABLE vendors ALTER COLUMN created_at SET NOT NULL;
+
+UPDATE vendor_summary s
+SET created_at = v.created_at
+FROM vendors v
+WHERE v.id = s.vendor_id AND s.created_at IS NULL;
+
+ALTER TABLE vendor_summary ALTER COLUMN created_at SET NOT NULL;
+
+COMMIT;
@@ -4,6 +4,9 @@
 -- Enable UUID generation
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Trigram indexes for company name search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- ====================
 -- VENDORS TABLE
 -- ====================
@@ -25,13 +28,17 @@ CREATE TABLE vendors (
     )),
     onboarding_progress INT DEFAULT 0 CHECK (onboarding_progress >= 0 AND onboarding_progress <= 100),
 
+    -- Incremented by every update; sent as the ETag for If-Match requests
+    version INT NOT NULL DEFAULT 1,
+
     -- Integration IDs with external systems
     ky3p_assessment_id VARCHAR(100),  -- IHS Markit KY3P assessment ID
     slp_supplier_id VARCHAR(100),     -- Ariba SLP supplier ID
     ariba_account_number VARCHAR(100), -- Ariba Network account number
 
     -- Timestamps
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- NOT NULL: (created_at, id) is the dashboard page cursor
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -40,6 +47,14 @@ CREATE INDEX idx_vendors_status ON vendors(status);
 CREATE INDEX idx_vendors_created_at ON vendors(created_at);
 CREATE INDEX idx_vendors_email ON vendors(contact_email);
 
+-- One vendor per EIN and per contact email, compared normalized
+-- (12-3456789 = 123456789, Contact@X.com = contact@x.com)
+CREATE UNIQUE INDEX idx_vendors_ein_normalized ON vendors ((NULLIF(regexp_replace(ein, '[^0-9]', '', 'g'), '')));
+CREATE UNIQUE INDEX idx_vendors_email_normalized ON vendors ((lower(contact_email)));
+
+-- Dashboard search by company name
+CREATE INDEX idx_vendors_company_name_trgm ON vendors USING gin (company_name gin_trgm_ops);
+
 -- ====================
 -- DOCUMENTS TABLE
 -- ====================
@@ -66,6 +81,7 @@ CREATE TABLE documents (
         'failed'
     )),
     extracted_data JSONB,  -- Textract extraction results
+    content_sha256 CHAR(64),  -- SHA-256 of the file; key into extraction_cache
     file_size_bytes BIGINT,
     mime_type VARCHAR(100),
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -102,6 +118,13 @@ CREATE TABLE risk_scores (
     -- Risk level categorization
     risk_level VARCHAR(20) CHECK (risk_level IN ('low', 'medium', 'high', 'critical')),
 
+    -- Version of risk_model.json that produced this score
+    model_version VARCHAR(50),
+
+    -- Full assessment payload (scores, findings, recommendations) as returned
+    -- by POST /vendors/{id}/risk-score; GET serves it without recomputing
+    assessment JSONB,
+
     -- Timestamps
     calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     expires_at TIMESTAMP  -- Risk scores should be refreshed periodically
@@ -109,6 +132,7 @@ CREATE TABLE risk_scores (
 
 -- Indexes
 CREATE INDEX idx_risk_scores_vendor ON risk_scores(vendor_id);
+CREATE INDEX idx_risk_scores_vendor_calculated ON risk_scores(vendor_id, calculated_at DESC);
 CREATE INDEX idx_risk_scores_overall ON risk_scores(overall_score);
 CREATE INDEX idx_risk_scores_level ON risk_scores(risk_level);
 
@@ -141,8 +165,10 @@ CREATE INDEX idx_esg_vendor ON esg_questionnaires(vendor_id);
 -- ====================
 -- AUDIT_LOGS TABLE
 -- ====================
+-- Partitioned by month on timestamp; audit_logs_ensure_partitions() creates
+-- upcoming months and audit_logs_detach_expired() enforces retention
 CREATE TABLE audit_logs (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     vendor_id UUID,  -- NULL for system-wide events
 
     -- Event details
@@ -157,13 +183,18 @@ CREATE TABLE audit_logs (
     success BOOLEAN DEFAULT TRUE,
     error_message TEXT,
 
-    -- Timestamp
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    -- Timestamp (partition key)
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
 
--- Indexes for audit queries
-CREATE INDEX idx_audit_vendor ON audit_logs(vendor_id);
-CREATE INDEX idx_audit_timestamp ON audit_logs(timestamp);
+-- Catches events outside the created months (should stay empty)
+CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+-- Indexes for audit queries (created on every partition); time ranges are
+-- served by partition pruning
+CREATE INDEX idx_audit_vendor_timestamp ON audit_logs(vendor_id, timestamp DESC);
 CREATE INDEX idx_audit_action ON audit_logs(action);
 CREATE INDEX idx_audit_actor ON audit_logs(actor);
 
@@ -197,6 +228,72 @@ CREATE TABLE approval_workflows (
 CREATE INDEX idx_approval_vendor ON approval_workflows(vendor_id);
 CREATE INDEX idx_approval_status ON approval_workflows(status);
 
+-- ====================
+-- IDEMPOTENCY_KEYS TABLE
+-- ====================
+-- Responses of write requests sent with an Idempotency-Key header, replayed
+-- when the client retries; purged daily once expired
+CREATE TABLE idempotency_keys (
+    scope VARCHAR(100) NOT NULL,            -- Endpoint, e.g. 'create_vendor'
+    idempotency_key VARCHAR(255) NOT NULL,  -- Client-chosen key
+    request_hash CHAR(64) NOT NULL,         -- SHA-256 of the request body
+    response_status INT,
+    response_body TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+
+    PRIMARY KEY (scope, idempotency_key)
+);
+
+CREATE INDEX idx_idempotency_keys_expires ON idempotency_keys(expires_at);
+
+-- ====================
+-- EXTRACTION_CACHE TABLE
+-- ====================
+-- Extraction results by file content, reused when the same file is uploaded
+-- again instead of running Textract; evicted least recently used first once
+-- over EXTRACTION_CACHE_MAX_MB (daily housekeeping)
+CREATE TABLE extraction_cache (
+    content_sha256 CHAR(64) NOT NULL,       -- SHA-256 of the uploaded file
+    document_type VARCHAR(50) NOT NULL,     -- Decides which fields were parsed
+    extracted_data JSONB NOT NULL,
+    hit_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (content_sha256, document_type)
+);
+
+CREATE INDEX idx_extraction_cache_last_used ON extraction_cache(last_used_at);
+
+-- ====================
+-- VENDOR_SUMMARY TABLE
+-- ====================
+-- One row per vendor with the aggregates the dashboard shows, kept current by
+-- the triggers below so dashboard reads never scan documents or risk history
+CREATE TABLE vendor_summary (
+    vendor_id UUID PRIMARY KEY REFERENCES vendors(id) ON DELETE CASCADE,
+
+    -- Copied from vendors for filtering and keyset pagination
+    status VARCHAR(50),
+    created_at TIMESTAMP NOT NULL,
+
+    -- Document counts
+    document_count INT NOT NULL DEFAULT 0,
+    verified_documents INT NOT NULL DEFAULT 0,
+
+    -- Latest risk score; current_risk_score_id points at its risk_scores row
+    current_risk_score_id UUID REFERENCES risk_scores(id) ON DELETE SET NULL,
+    risk_score INT,
+    risk_level VARCHAR(20),
+    risk_assessed_at TIMESTAMP
+);
+
+-- Dashboard listing: keyset pagination on (created_at, vendor_id), optionally filtered
+CREATE INDEX idx_vendor_summary_created ON vendor_summary(created_at DESC, vendor_id DESC);
+CREATE INDEX idx_vendor_summary_status_created ON vendor_summary(status, created_at DESC, vendor_id DESC);
+CREATE INDEX idx_vendor_summary_risk_created ON vendor_summary(risk_level, created_at DESC, vendor_id DESC);
+
 -- ====================
 -- FUNCTIONS & TRIGGERS
 -- ====================
@@ -218,11 +315,157 @@ CREATE TRIGGER update_vendors_updated_at BEFORE UPDATE ON vendors
 CREATE TRIGGER update_approval_workflows_updated_at BEFORE UPDATE ON approval_workflows
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Function to increment the optimistic locking version
+CREATE OR REPLACE FUNCTION increment_version_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version = OLD.version + 1;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Trigger for vendors table: any change invalidates the version a client read
+CREATE TRIGGER increment_vendors_version BEFORE UPDATE ON vendors
+    FOR EACH ROW EXECUTE FUNCTION increment_version_column();
+
+-- vendor_summary: one row per new vendor; statement-level so a bulk COPY
+-- of vendors is one set-based insert
+CREATE OR REPLACE FUNCTION vendor_summary_add_vendors()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO vendor_summary (vendor_id, status, created_at)
+    SELECT id, status, created_at FROM new_vendors
+    ON CONFLICT (vendor_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER vendor_summary_on_vendor_insert AFTER INSERT ON vendors
+    REFERENCING NEW TABLE AS new_vendors
+    FOR EACH STATEMENT EXECUTE FUNCTION vendor_summary_add_vendors();
+
+-- vendor_summary: follow status changes
+CREATE OR REPLACE FUNCTION vendor_summary_sync_vendor()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE vendor_summary
+    SET status = NEW.status, created_at = NEW.created_at
+    WHERE vendor_id = NEW.id;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER vendor_summary_on_vendor AFTER UPDATE OF status, created_at ON vendors
+    FOR EACH ROW EXECUTE FUNCTION vendor_summary_sync_vendor();
+
+-- vendor_summary: adjust document counts by the row that changed
+CREATE OR REPLACE FUNCTION vendor_summary_sync_document()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE vendor_summary
+        SET document_count = document_count - 1,
+            verified_documents = verified_documents - CASE WHEN OLD.status = 'verified' THEN 1 ELSE 0 END
+        WHERE vendor_id = OLD.vendor_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE vendor_summary
+        SET document_count = document_count + 1,
+            verified_documents = verified_documents + CASE WHEN NEW.status = 'verified' THEN 1 ELSE 0 END
+        WHERE vendor_id = NEW.vendor_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER vendor_summary_on_document AFTER INSERT OR DELETE OR UPDATE OF status, vendor_id ON documents
+    FOR EACH ROW EXECUTE FUNCTION vendor_summary_sync_document();
+
+-- vendor_summary: latest risk score; statement-level so a bulk COPY of
+-- scores is one set-based update
+CREATE OR REPLACE FUNCTION vendor_summary_sync_risk_scores()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE vendor_summary s
+    SET current_risk_score_id = latest.id,
+        risk_score = latest.overall_score,
+        risk_level = latest.risk_level,
+        risk_assessed_at = latest.calculated_at
+    FROM (
+        SELECT DISTINCT ON (vendor_id) id, vendor_id, overall_score, risk_level, calculated_at
+        FROM new_scores
+        ORDER BY vendor_id, calculated_at DESC
+    ) latest
+    WHERE s.vendor_id = latest.vendor_id
+      AND (s.risk_assessed_at IS NULL OR s.risk_assessed_at <= latest.calculated_at);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER vendor_summary_on_risk_scores AFTER INSERT ON risk_scores
+    REFERENCING NEW TABLE AS new_scores
+    FOR EACH STATEMENT EXECUTE FUNCTION vendor_summary_sync_risk_scores();
+
+-- audit_logs: create the monthly partition containing for_month
+CREATE OR REPLACE FUNCTION audit_logs_create_partition(for_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', for_month)::date;
+    partition_name TEXT := 'audit_logs_' || to_char(start_date, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, (start_date + INTERVAL '1 month')::date
+    );
+    RETURN partition_name;
+END;
+$$ language 'plpgsql';
+
+-- audit_logs: make sure partitions exist for this month and the next months_ahead
+CREATE OR REPLACE FUNCTION audit_logs_ensure_partitions(months_ahead INT DEFAULT 3)
+RETURNS VOID AS $$
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        PERFORM audit_logs_create_partition(
+            (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::date
+        );
+    END LOOP;
+END;
+$$ language 'plpgsql';
+
+-- audit_logs: detach (optionally drop) monthly partitions older than
+-- retain_months; detached partitions can be archived and dropped later
+CREATE OR REPLACE FUNCTION audit_logs_detach_expired(retain_months INT, drop_detached BOOLEAN DEFAULT FALSE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => retain_months))::date;
+    expired RECORD;
+BEGIN
+    FOR expired IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'audit_logs'::regclass
+          AND c.relname ~ '^audit_logs_[0-9]{4}_[0-9]{2}$'
+          AND to_date(substring(c.relname FROM 12), 'YYYY_MM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE audit_logs DETACH PARTITION %I', expired.relname);
+        IF drop_detached THEN
+            EXECUTE format('DROP TABLE %I', expired.relname);
+        END IF;
+        RETURN NEXT expired.relname;
+    END LOOP;
+END;
+$$ language 'plpgsql';
+
+SELECT audit_logs_ensure_partitions(3);
+
 -- ====================
 -- VIEWS FOR COMMON QUERIES
 -- ====================
 
--- View: Vendor onboarding dashboard
+-- View: Vendor onboarding dashboard (one row per vendor, from vendor_summary)
 CREATE VIEW vendor_dashboard AS
 SELECT
     v.id,
@@ -231,26 +474,25 @@ SELECT
     v.status,
     v.onboarding_progress,
     v.created_at,
-    COUNT(DISTINCT d.id) as document_count,
-    COUNT(DISTINCT CASE WHEN d.status = 'verified' THEN d.id END) as verified_documents,
-    rs.overall_score as risk_score,
-    rs.risk_level,
-    rs.calculated_at as risk_assessed_at
+    s.document_count,
+    s.verified_documents,
+    s.risk_score,
+    s.risk_level,
+    s.risk_assessed_at
 FROM vendors v
-LEFT JOIN documents d ON v.id = d.vendor_id
-LEFT JOIN risk_scores rs ON v.id = rs.vendor_id
-GROUP BY v.id, rs.overall_score, rs.risk_level, rs.calculated_at;
+JOIN vendor_summary s ON s.vendor_id = v.id;
 
--- View: High-risk vendors requiring attention
+-- View: High-risk vendors requiring attention (current risk score only)
 CREATE VIEW high_risk_vendors AS
 SELECT
     v.*,
     rs.overall_score,
     rs.red_flags,
     rs.calculated_at
-FROM vendors v
-INNER JOIN risk_scores rs ON v.id = rs.vendor_id
-WHERE rs.risk_level IN ('high', 'critical')
+FROM vendor_summary s
+INNER JOIN vendors v ON v.id = s.vendor_id
+INNER JOIN risk_scores rs ON rs.id = s.current_risk_score_id
+WHERE s.risk_level IN ('high', 'critical')
   AND v.status NOT IN ('rejected', 'approved')
 ORDER BY rs.overall_score DESC;
 
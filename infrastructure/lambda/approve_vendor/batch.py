@@ -0,0 +1,292 @@
+"""
+Lambda Function: Batch Approve/Reject Vendors
+Applies a reviewer queue's decisions in one transaction
+
+Lambda entry point: batch.handler (POST /vendors/approve-batch)
+
+All decisions are sent as one VALUES list: a single statement updates the
+vendors and inserts their approval_workflows rows, and the audit events
+are queued together once it commits.
+"""
+import json
+import uuid
+
+from psycopg2.extras import execute_values
+
+from shared.audit import audit_writer
+from shared.cache import status_cache
+from shared.db import get_db_connection, release_db_connection
+from shared.events import notify_vendor_changes
+from index import DECIDABLE_STATUSES, ETAG_PATTERN
+
+MAX_BATCH_SIZE = 500
+
+# Same transition and version rules as the single-vendor handler; vendors
+# that are not found or cannot be decided are simply absent from the result
+APPLY_DECISIONS_QUERY = """
+    WITH decisions (vendor_id, approved, comments, decision_by, expected_version) AS (
+        VALUES %s
+    ),
+    updated AS (
+        UPDATE vendors v
+        SET status = CASE WHEN d.approved THEN 'approved' ELSE 'rejected' END,
+            onboarding_progress = CASE WHEN d.approved THEN 100 ELSE 0 END,
+            updated_at = NOW()
+        FROM decisions d
+        WHERE v.id = d.vendor_id
+          AND v.status IN ({decidable})
+          AND (d.expected_version IS NULL OR v.version = d.expected_version)
+        RETURNING v.id, v.company_name, v.status, v.updated_at, v.version,
+                  d.approved, d.comments, d.decision_by
+    ),
+    workflows AS (
+        INSERT INTO approval_workflows (
+            vendor_id, current_step, status, final_decision,
+            decision_comments, decision_by, decision_at
+        )
+        SELECT id, 'final_approval', status, approved, comments, decision_by, updated_at
+        FROM updated
+    )
+    SELECT id::text, company_name, status, updated_at, version FROM updated
+""".format(decidable=', '.join(f"'{status}'" for status in DECIDABLE_STATUSES))
+
+CURRENT_STATE_QUERY = """
+    SELECT id::text, status, version FROM vendors WHERE id = ANY(%s::uuid[])
+"""
+
+DECISION_TEMPLATE = "(%s::uuid, %s::boolean, %s, %s, %s::int)"
+
+def parse_version(value):
+    """
+    Expected version of a decision: an integer, or the vendor's ETag from
+    GET /vendors/{id}/status (as for If-Match on the single-vendor handler)
+
+    Returns:
+        int: Version, or None if not given; raises ValueError if malformed
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, int):
+        return value
+    match = ETAG_PATTERN.match(str(value).strip())
+    if not match:
+        raise ValueError(value)
+    return int(match.group(1))
+
+def parse_decisions(body):
+    """
+    Validate the request body
+
+    Returns:
+        tuple: (valid decisions as (vendor_id, approved, comments, approver,
+                expected version or None),
+                per-vendor outcomes for rejected entries, error message or None)
+    """
+    decisions = body.get('decisions')
+    if not isinstance(decisions, list) or not decisions:
+        return None, None, "decisions must be a non-empty list"
+    if len(decisions) > MAX_BATCH_SIZE:
+        return None, None, f"At most {MAX_BATCH_SIZE} decisions per request"
+
+    default_approver = body.get('approver_email') or 'system'
+    valid = []
+    outcomes = []
+    seen = set()
+    for decision in decisions:
+        if not isinstance(decision, dict):
+            outcomes.append({'vendor_id': None, 'outcome': 'invalid', 'error': 'Decision must be an object'})
+            continue
+
+        raw_id = decision.get('vendor_id')
+        try:
+            vendor_id = str(uuid.UUID(str(raw_id)))
+        except ValueError:
+            outcomes.append({'vendor_id': raw_id, 'outcome': 'invalid', 'error': 'Invalid vendor_id'})
+            continue
+
+        try:
+            version = parse_version(decision.get('version'))
+        except ValueError:
+            outcomes.append({
+                'vendor_id': vendor_id, 'outcome': 'invalid',
+                'error': 'version must be an integer or an ETag from GET /vendors/{id}/status'
+            })
+            continue
+
+        if vendor_id in seen:
+            outcomes.append({'vendor_id': vendor_id, 'outcome': 'invalid', 'error': 'Duplicate vendor_id in batch'})
+            continue
+        seen.add(vendor_id)
+
+        valid.append((
+            vendor_id,
+            bool(decision.get('approved', False)),
+            decision.get('comments', ''),
+            decision.get('approver_email') or default_approver,
+            version
+        ))
+
+    return valid, outcomes, None
+
+def apply_decisions(cursor, decisions):
+    """
+    Apply decisions with one set-based statement
+
+    Returns:
+        tuple: (vendor_id -> (company_name, new status, decided_at, version)
+                for the vendors updated,
+                vendor_id -> (status, version) for the others that exist)
+    """
+    # page_size keeps the whole batch in a single statement
+    rows = execute_values(
+        cursor,
+        APPLY_DECISIONS_QUERY,
+        decisions,
+        template=DECISION_TEMPLATE,
+        page_size=len(decisions),
+        fetch=True
+    )
+    updated = {row[0]: row[1:] for row in rows}
+
+    # Only looked up when some decisions did not apply
+    missing = [decision[0] for decision in decisions if decision[0] not in updated]
+    current = {}
+    if missing:
+        cursor.execute(CURRENT_STATE_QUERY, (missing,))
+        current = {vendor_id: (status, version) for vendor_id, status, version in cursor.fetchall()}
+
+    return updated, current
+
+def handler(event, context):
+    """
+    Approve or reject a batch of vendors
+
+    Request: {
+        "approver_email": "reviewer@gs.com",
+        "decisions": [
+            {"vendor_id": "uuid", "approved": true, "comments": "All checks passed"},
+            {"vendor_id": "uuid", "approved": false, "comments": "Sanctions hit", "version": 3}
+        ]
+    }
+
+    "version" is optional: the vendor's ETag from GET /vendors/{id}/status
+    (e.g. "\"4-3f2a9c0d1e5b7a68\"") or the integer version it starts with.
+    A vendor that changed since, or was already decided, is a conflict.
+
+    Response: {
+        "updated": 1,
+        "conflicts": 1,
+        "not_found": 0,
+        "invalid": 0,
+        "results": [
+            {"vendor_id": "uuid", "outcome": "updated", "status": "approved",
+             "version": 4, "approved_at": "2025-11-08T10:30:00Z"},
+            {"vendor_id": "uuid", "outcome": "conflict", "status": "approved", "version": 5,
+             "error": "Vendor was modified by another request"}
+        ]
+    }
+    """
+    try:
+        body = json.loads(event.get('body') or '{}')
+        decisions, invalid, error = parse_decisions(body)
+        if error:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': error})
+            }
+
+        results = []
+        updated = {}
+        current = {}
+        if decisions:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            updated, current = apply_decisions(cursor, decisions)
+            notify_vendor_changes(cursor, [
+                (vendor_id, 'approval', {'status': status, 'version': version})
+                for vendor_id, (_, status, _, version) in updated.items()
+            ])
+            conn.commit()
+            cursor.close()
+            status_cache.invalidate_many(updated)
+
+            # One queued message for the whole batch, written with one COPY
+            for vendor_id, approved, comments, approver_email, _ in decisions:
+                if vendor_id not in updated:
+                    continue
+                company_name, new_status = updated[vendor_id][:2]
+                audit_writer.record(
+                    vendor_id,
+                    f'vendor_{new_status}',
+                    approver_email,
+                    {
+                        "comments": comments,
+                        "company_name": company_name,
+                        "batch_size": len(decisions)
+                    }
+                )
+            audit_writer.flush(conn)
+            release_db_connection(conn)
+
+        for vendor_id, approved, comments, approver_email, expected_version in decisions:
+            if vendor_id in updated:
+                company_name, new_status, decided_at, version = updated[vendor_id]
+                results.append({
+                    'vendor_id': vendor_id,
+                    'outcome': 'updated',
+                    'status': new_status,
+                    'approved': approved,
+                    'version': version,
+                    'approved_at': decided_at.isoformat()
+                })
+            elif vendor_id in current:
+                status, version = current[vendor_id]
+                if expected_version is not None and version != expected_version:
+                    error = 'Vendor was modified by another request'
+                else:
+                    error = f'Vendor is already {status}'
+                results.append({
+                    'vendor_id': vendor_id,
+                    'outcome': 'conflict',
+                    'error': error,
+                    'status': status,
+                    'version': version
+                })
+            else:
+                results.append({
+                    'vendor_id': vendor_id,
+                    'outcome': 'not_found',
+                    'error': 'Vendor not found'
+                })
+        results.extend(invalid)
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'updated': len(updated),
+                'conflicts': len(current),
+                'not_found': len(decisions) - len(updated) - len(current),
+                'invalid': len(invalid),
+                'results': results
+            })
+        }
+
+    except Exception as e:
+        print(f"Error approving vendor batch: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({
+                'error': 'Failed to process approvals',
+                'message': str(e)
+            })
+        }
@@ -3,30 +3,96 @@ Lambda Function: Approve/Reject Vendor
 Handles vendor approval workflow
 """
 import json
-import psycopg2
-import os
-import boto3
+import re
 from datetime import datetime
 
-secrets_client = boto3.client('secretsmanager')
+from shared.audit import audit_writer
+from shared.cache import status_cache
+from shared.db import get_db_connection, release_db_connection
+from shared.events import notify_vendor_change
+
+# Statuses a reviewer can decide from; approved, rejected and
+# onboarding_complete are final
+DECIDABLE_STATUSES = ('submitted', 'documents_pending', 'under_review', 'risk_assessment')
+
+# The transition, the version check and the approval_workflows record in one
+# statement: a concurrent decision either matches nothing or waits for the
+# first one to commit and then matches nothing, so only one ever records
+DECIDE_QUERY = """
+    WITH updated AS (
+        UPDATE vendors
+        SET status = %(new_status)s, onboarding_progress = %(progress)s, updated_at = %(decided_at)s
+        WHERE id = %(vendor_id)s
+          AND status = ANY(%(decidable)s)
+          AND (%(expected_version)s::int IS NULL OR version = %(expected_version)s::int)
+        RETURNING id, company_name, version
+    ),
+    workflow AS (
+        INSERT INTO approval_workflows (
+            vendor_id, current_step, status, final_decision,
+            decision_comments, decision_by, decision_at
+        )
+        SELECT id, 'final_approval', %(new_status)s, %(approved)s,
+               %(comments)s, %(approver_email)s, %(decided_at)s
+        FROM updated
+    )
+    SELECT company_name, version FROM updated
+"""
 
-def get_db_connection():
-    secret_arn = os.environ['DB_SECRET_ARN']
-    response = secrets_client.get_secret_value(SecretId=secret_arn)
-    secret = json.loads(response['SecretString'])
+ETAG_PATTERN = re.compile(r'^(?:W/)?"?(\d+)(?:-[0-9a-f]+)?"?$')
 
-    return psycopg2.connect(
-        host=os.environ['DB_HOST'],
-        port=os.environ['DB_PORT'],
-        database=os.environ['DB_NAME'],
-        user=secret['username'],
-        password=secret['password']
-    )
+def etag(version):
+    return f'"{version}"'
+
+def get_expected_version(event, body):
+    """
+    Version the client last read, from If-Match (an ETag from GET
+    /vendors/{id}/status) or the body's "version"
+
+    Returns:
+        int or None: None means any version (no header, or If-Match: *)
+
+    Raises:
+        ValueError: If-Match is not a version ETag
+    """
+    for name, value in (event.get('headers') or {}).items():
+        if name.lower() == 'if-match' and value:
+            value = value.strip()
+            if value == '*':
+                return None
+            match = ETAG_PATTERN.match(value)
+            if not match:
+                raise ValueError(f"Unrecognized If-Match value: {value}")
+            return int(match.group(1))
+
+    version = body.get('version')
+    return int(version) if version is not None else None
+
+def conflict_response(status, version, expected_version):
+    """409 for a vendor that exists but could not be decided"""
+    if expected_version is not None and version != expected_version:
+        error = 'Vendor was modified by another request; reload and retry'
+    else:
+        error = f'Vendor is already {status} and cannot be decided again'
+
+    return {
+        'statusCode': 409,
+        'headers': {'Content-Type': 'application/json', 'ETag': etag(version)},
+        'body': json.dumps({
+            'error': error,
+            'status': status,
+            'version': version
+        })
+    }
 
 def handler(event, context):
     """
     Approve or reject a vendor
 
+    Optional If-Match: "<version>" header (the ETag of GET
+    /vendors/{id}/status); the decision fails with 409 if the vendor changed
+    since, or if it has already been decided.
+
     Request: {
         "approved": true,
         "comments": "All checks passed",
@@ -35,6 +101,7 @@ def handler(event, context):
 
     Response: {
         "status": "approved",
+        "version": 4,
         "approved_at": "2025-11-08T10:30:00Z"
     }
     """
@@ -54,65 +121,74 @@ def handler(event, context):
                 'body': json.dumps({'error': 'Missing vendor ID'})
             }
 
+        try:
+            expected_version = get_expected_version(event, body)
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': str(e)})
+            }
+
         # Connect to database
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Update vendor status
+        # Update vendor status and record the decision, only if the vendor is
+        # still undecided and unchanged since the client read it
         new_status = 'approved' if approved else 'rejected'
-        cursor.execute("""
-            UPDATE vendors
-            SET status = %s, onboarding_progress = %s, updated_at = %s
-            WHERE id = %s
-            RETURNING company_name, contact_email
-        """, (new_status, 100 if approved else 0, datetime.utcnow(), vendor_id))
+        decided_at = datetime.utcnow()
+        cursor.execute(DECIDE_QUERY, {
+            'vendor_id': vendor_id,
+            'new_status': new_status,
+            'progress': 100 if approved else 0,
+            'approved': approved,
+            'comments': comments,
+            'approver_email': approver_email,
+            'decided_at': decided_at,
+            'decidable': list(DECIDABLE_STATUSES),
+            'expected_version': expected_version
+        })
 
         result = cursor.fetchone()
         if not result:
+            # Lost the race (or nothing to decide): report why without waiting
+            cursor.execute("SELECT status, version FROM vendors WHERE id = %s", (vendor_id,))
+            current = cursor.fetchone()
+            conn.rollback()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
+            if current:
+                return conflict_response(current[0], current[1], expected_version)
             return {
                 'statusCode': 404,
                 'headers': {'Content-Type': 'application/json'},
                 'body': json.dumps({'error': 'Vendor not found'})
             }
 
-        company_name, contact_email = result
+        company_name, version = result
 
-        # Create approval workflow record
-        cursor.execute("""
-            INSERT INTO approval_workflows (
-                vendor_id, current_step, status, final_decision,
-                decision_comments, decision_by, decision_at
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
-            vendor_id,
-            'final_approval',
-            new_status,
-            approved,
-            comments,
-            approver_email,
-            datetime.utcnow()
-        ))
-
-        # Log audit event
-        cursor.execute("""
-            INSERT INTO audit_logs (vendor_id, action, actor, metadata)
-            VALUES (%s, %s, %s, %s)
-        """, (
+        notify_vendor_change(cursor, vendor_id, 'approval', {
+            'status': new_status,
+            'version': version
+        })
+
+        conn.commit()
+        cursor.close()
+        status_cache.invalidate(vendor_id)
+
+        # Log audit event (queued; written in batches by the audit writer)
+        audit_writer.record(
             vendor_id,
             f'vendor_{new_status}',
             approver_email,
-            json.dumps({
+            {
                 "comments": comments,
                 "company_name": company_name
-            })
-        ))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+            }
+        )
+        audit_writer.flush(conn)
+        release_db_connection(conn)
 
         # In production: send email notification to vendor
         # ses_client = boto3.client('ses')
@@ -122,13 +198,15 @@ def handler(event, context):
             'statusCode': 200,
             'headers': {
                 'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
+                'Access-Control-Allow-Origin': '*',
+                'ETag': etag(version)
             },
             'body': json.dumps({
                 'vendor_id': vendor_id,
                 'status': new_status,
                 'approved': approved,
-                'approved_at': datetime.utcnow().isoformat(),
+                'version': version,
+                'approved_at': decided_at.isoformat(),
                 'message': f'Vendor {company_name} has been {new_status}'
             })
         }
@@ -0,0 +1,137 @@
+"""
+Lambda Function: Audit Writer
+Writes queued audit events into the partitioned audit_logs table in
+batches, and runs daily housekeeping: audit_logs partition maintenance,
+purging expired idempotency keys and evicting the extraction cache
+"""
+import json
+import os
+from collections import Counter
+
+from shared.audit import write_audit_events
+from shared.cache import status_cache
+from shared.db import get_db_connection, release_db_connection
+from shared.events import notify_vendor_changes
+from shared.extraction_cache import evict_extractions
+
+# Monthly partitions created ahead of time, so inserts never land in the
+# default partition
+PARTITION_MONTHS_AHEAD = int(os.environ.get('AUDIT_PARTITION_MONTHS_AHEAD', '3'))
+
+# Partitions older than this are detached; dropped if AUDIT_DROP_EXPIRED is set
+RETENTION_MONTHS = int(os.environ.get('AUDIT_RETENTION_MONTHS', '24'))
+DROP_EXPIRED = os.environ.get('AUDIT_DROP_EXPIRED', 'false').lower() == 'true'
+
+def write_batch(records):
+    """
+    Insert the events of a batch of SQS messages with one COPY
+
+    The status timeline is read from audit_logs, so once the events are
+    committed the affected vendors' cached status is invalidated and their
+    change listeners are notified (in the COPY's transaction).
+
+    Returns:
+        list: batchItemFailures for messages that could not be parsed
+    """
+    events = []
+    failures = []
+    for record in records:
+        try:
+            events.extend(json.loads(record['body']))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Unreadable audit message {record.get('messageId')}: {str(e)}")
+            failures.append({'itemIdentifier': record.get('messageId')})
+
+    if events:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        write_audit_events(cursor, events)
+        vendor_events = Counter(event['vendor_id'] for event in events if event.get('vendor_id'))
+        notify_vendor_changes(cursor, [
+            (vendor_id, 'audit', {'events': count}) for vendor_id, count in vendor_events.items()
+        ])
+        conn.commit()
+        cursor.close()
+        release_db_connection(conn)
+        status_cache.invalidate_many(vendor_events)
+
+    print(f"Wrote {len(events)} audit events from {len(records)} messages")
+    return failures
+
+def maintain_partitions():
+    """
+    Create upcoming monthly partitions, detach expired ones, purge expired
+    idempotency keys and trim the extraction cache to its size limit
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT audit_logs_ensure_partitions(%s)", (PARTITION_MONTHS_AHEAD,))
+    cursor.execute(
+        "SELECT audit_logs_detach_expired(%s, %s)",
+        (RETENTION_MONTHS, DROP_EXPIRED)
+    )
+    detached = [row[0] for row in cursor.fetchall()]
+
+    # Replays are only honoured until expires_at; drop the stored responses
+    cursor.execute("DELETE FROM idempotency_keys WHERE expires_at <= NOW()")
+    purged_keys = cursor.rowcount
+
+    evicted_extractions = evict_extractions(cursor)
+
+    conn.commit()
+    cursor.close()
+    release_db_connection(conn)
+
+    summary = {
+        'months_ahead': PARTITION_MONTHS_AHEAD,
+        'retention_months': RETENTION_MONTHS,
+        'detached_partitions': detached,
+        'dropped': DROP_EXPIRED,
+        'purged_idempotency_keys': purged_keys,
+        'evicted_extractions': evicted_extractions
+    }
+    print(f"Daily housekeeping: {summary}")
+    return summary
+
+def handler(event, context):
+    """
+    Audit writer entry point
+
+    SQS event: each message body is a JSON list of audit events
+    Scheduled event: {"action": "maintain_partitions"}
+    """
+    try:
+        if 'Records' in event:
+            failures = write_batch(event['Records'])
+            return {'batchItemFailures': failures}
+
+        if event.get('action') == 'maintain_partitions':
+            return {
+                'statusCode': 200,
+                'body': json.dumps(maintain_partitions())
+            }
+
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': 'Unsupported event'})
+        }
+
+    except Exception as e:
+        print(f"Error writing audit events: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        if 'Records' in event:
+            # The COPY is all-or-nothing, so the whole batch is retried
+            return {
+                'batchItemFailures': [
+                    {'itemIdentifier': record.get('messageId')} for record in event['Records']
+                ]
+            }
+        return {
+            'statusCode': 500,
+            'body': json.dumps({
+                'error': 'Failed to maintain audit partitions',
+                'message': str(e)
+            })
+        }
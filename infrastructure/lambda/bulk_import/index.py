@@ -0,0 +1,374 @@
+"""
+Lambda Function: Bulk Vendor Import
+Streams NDJSON or CSV vendor records into the vendors table with COPY
+
+Two entry points share the same pipeline:
+- POST /vendors/import with an NDJSON (application/x-ndjson) or CSV
+  (text/csv) body; the response lists the id assigned to each input line
+- S3 ObjectCreated events for imports/incoming/*.csv|.ndjson|.jsonl; the
+  assigned ids are written to imports/results/<file name>.ndjson
+
+Records are validated one at a time and copied in batches of BATCH_SIZE
+rows, so memory stays bounded by one batch however large the file is.
+Each batch is copied into a session temp table and moved into vendors with
+ON CONFLICT DO NOTHING, so rows whose EIN or contact email already exists
+are reported as duplicates instead of failing the batch. Each batch is
+committed with one summarized audit event.
+"""
+import base64
+import codecs
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from urllib.parse import unquote_plus
+
+import boto3
+
+from shared.audit import audit_writer
+from shared.db import get_db_connection, release_db_connection
+
+s3_client = boto3.client('s3')
+
+# Rows per COPY and per commit
+BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '10000'))
+
+# Rejected rows reported individually; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+RESULTS_PREFIX = 'imports/results/'
+
+IMPORT_COLUMNS = ('id', 'company_name', 'ein', 'address', 'contact_email', 'contact_phone')
+
+# Per-connection staging table, emptied by every commit
+STAGING_TABLE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS vendor_import (
+        id UUID,
+        company_name VARCHAR(255),
+        ein VARCHAR(20),
+        address TEXT,
+        contact_email VARCHAR(255),
+        contact_phone VARCHAR(50)
+    ) ON COMMIT DELETE ROWS
+"""
+
+# Column limits from the vendors table
+FIELD_LIMITS = {
+    'company_name': 255,
+    'ein': 20,
+    'contact_email': 255,
+    'contact_phone': 50
+}
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+EIN_PATTERN = re.compile(r'^\d{2}-?\d{7}$')
+
+class ImportBatchWriter:
+    """Buffers validated rows and copies them into vendors a batch at a time"""
+
+    def __init__(self, conn, source, on_batch=None, on_duplicate=None):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.source = source
+        self.on_batch = on_batch
+        self.on_duplicate = on_duplicate
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.pending = []  # (line number, vendor id) for the current batch
+        self.batches = 0
+        self.imported = 0
+
+    def add(self, line_number, row):
+        self.writer.writerow(row)
+        self.pending.append((line_number, row[0]))
+        if len(self.pending) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        columns = ', '.join(IMPORT_COLUMNS)
+        self.buffer.seek(0)
+        self.cursor.execute(STAGING_TABLE_SQL)
+        self.cursor.copy_expert(
+            f"COPY vendor_import ({columns}) FROM STDIN WITH (FORMAT csv)",
+            self.buffer
+        )
+        self.cursor.execute(f"""
+            INSERT INTO vendors ({columns})
+            SELECT {columns} FROM vendor_import
+            ON CONFLICT DO NOTHING
+            RETURNING id::text
+        """)
+        inserted = {row[0] for row in self.cursor.fetchall()}
+        self.conn.commit()
+
+        imported = [(line_number, vendor_id) for line_number, vendor_id in self.pending
+                    if vendor_id in inserted]
+        if self.on_duplicate and len(imported) < len(self.pending):
+            for line_number, vendor_id in self.pending:
+                if vendor_id not in inserted:
+                    self.on_duplicate(line_number)
+
+        self.batches += 1
+        self.imported += len(imported)
+
+        # One audit event per batch instead of one per vendor
+        audit_writer.record(None, 'vendors_imported', 'system', {
+            'source': self.source,
+            'batch': self.batches,
+            'rows': len(imported),
+            'duplicates': len(self.pending) - len(imported),
+            'first_line': self.pending[0][0],
+            'last_line': self.pending[-1][0]
+        })
+
+        if self.on_batch and imported:
+            self.on_batch(imported)
+
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.cursor.close()
+
+def validate_record(record):
+    """
+    Check one input record against the vendors table constraints
+
+    Returns:
+        tuple: (row for IMPORT_COLUMNS or None, error message or None)
+    """
+    if not isinstance(record, dict):
+        return None, "Record must be an object"
+
+    values = {}
+    for field in ('company_name', 'ein', 'address', 'contact_email', 'contact_phone'):
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            value = str(value)
+        values[field] = (value or '').strip() or None
+
+    if not values['company_name'] or not values['contact_email']:
+        return None, "Missing required fields: company_name, contact_email"
+
+    for field, limit in FIELD_LIMITS.items():
+        if values[field] and len(values[field]) > limit:
+            return None, f"{field} is longer than {limit} characters"
+
+    if not EMAIL_PATTERN.match(values['contact_email']):
+        return None, f"Invalid contact_email: {values['contact_email']}"
+
+    if values['ein'] and not EIN_PATTERN.match(values['ein']):
+        return None, f"Invalid ein: {values['ein']}"
+
+    return (
+        str(uuid.uuid4()), values['company_name'], values['ein'], values['address'],
+        values['contact_email'], values['contact_phone']
+    ), None
+
+def iter_records(stream, fmt):
+    """
+    Yield (line number, record or None, parse error or None) from a text stream
+
+    Line numbers count data lines from 1 (the CSV header is not counted).
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for line_number, record in enumerate(reader, 1):
+            yield line_number, record, None
+        return
+
+    line_number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        line_number += 1
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {str(e)}"
+
+def import_vendors(conn, stream, fmt, source, on_batch=None):
+    """
+    Validate and copy every record of a stream into vendors
+
+    Args:
+        on_batch: called with [(line number, vendor id), ...] after each
+                  committed batch
+
+    Returns:
+        dict: Import summary
+    """
+    started = time.monotonic()
+    errors = []
+    counts = {'rejected': 0, 'duplicates': 0}
+
+    def reject(line_number, error):
+        counts['rejected'] += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({'line': line_number, 'error': error})
+
+    def duplicate(line_number):
+        counts['duplicates'] += 1
+        reject(line_number, "A vendor with this EIN or contact email already exists")
+
+    writer = ImportBatchWriter(conn, source, on_batch, duplicate)
+    for line_number, record, error in iter_records(stream, fmt):
+        row = None
+        if error is None:
+            row, error = validate_record(record)
+        if error:
+            reject(line_number, error)
+            continue
+        writer.add(line_number, row)
+
+    writer.close()
+    audit_writer.flush(conn)
+
+    errors.sort(key=lambda error: error['line'])
+    elapsed = time.monotonic() - started
+    return {
+        'source': source,
+        'imported': writer.imported,
+        'rejected': counts['rejected'],
+        'duplicates': counts['duplicates'],
+        'batches': writer.batches,
+        'errors': errors,
+        'duration_ms': int(elapsed * 1000),
+        'rows_per_second': int(writer.imported / elapsed) if elapsed > 0 else None
+    }
+
+def detect_format(name_or_type):
+    """'csv' or 'ndjson' from a file name or Content-Type; None if unknown"""
+    value = (name_or_type or '').lower()
+    if value.endswith('.csv'):
+        return 'csv'
+    if value.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if 'csv' in value:
+        return 'csv'
+    if 'ndjson' in value or 'jsonl' in value:
+        return 'ndjson'
+    return None
+
+def import_from_s3(bucket, key):
+    """Import one uploaded file and write its id mapping next to it"""
+    fmt = detect_format(key)
+    if fmt is None:
+        print(f"Skipping s3://{bucket}/{key}: unsupported file type")
+        return None
+
+    body = s3_client.get_object(Bucket=bucket, Key=key)['Body']
+    stream = codecs.getreader('utf-8')(body)
+    results_key = RESULTS_PREFIX + os.path.basename(key).rsplit('.', 1)[0] + '.ndjson'
+
+    # The id mapping is spooled to /tmp, not held in memory
+    with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as results:
+        def write_ids(batch):
+            for line_number, vendor_id in batch:
+                results.write(json.dumps({'line': line_number, 'id': vendor_id}) + '\n')
+
+        conn = get_db_connection()
+        try:
+            summary = import_vendors(conn, stream, fmt, f"s3://{bucket}/{key}", write_ids)
+        finally:
+            release_db_connection(conn)
+
+    s3_client.upload_file(results.name, bucket, results_key)
+    os.unlink(results.name)
+
+    summary['results_key'] = results_key
+    print(f"Imported s3://{bucket}/{key}: {json.dumps({k: v for k, v in summary.items() if k != 'errors'})}")
+    return summary
+
+def handle_api_request(event):
+    headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+    params = event.get('queryStringParameters') or {}
+    fmt = detect_format(params.get('format') or headers.get('content-type'))
+    if fmt is None:
+        return {
+            'statusCode': 415,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({
+                'error': 'Send text/csv or application/x-ndjson (or ?format=csv|ndjson)'
+            })
+        }
+
+    body = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+
+    imported = []
+
+    def collect_ids(batch):
+        imported.extend({'line': line_number, 'id': vendor_id} for line_number, vendor_id in batch)
+
+    conn = get_db_connection()
+    try:
+        summary = import_vendors(conn, io.StringIO(body), fmt, 'api', collect_ids)
+    finally:
+        release_db_connection(conn)
+
+    summary['vendors'] = imported
+    return {
+        'statusCode': 201 if summary['imported'] else 400,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(summary)
+    }
+
+def handler(event, context):
+    """
+    Bulk import vendors
+
+    API request: POST /vendors/import, one vendor per NDJSON line or CSV row
+        {"company_name": "ABC Corp", "contact_email": "ap@abc.com", "ein": "12-3456789",
+         "address": "...", "contact_phone": "..."}
+
+    API response: {
+        "imported": 9997,
+        "rejected": 3,
+        "duplicates": 1,
+        "batches": 1,
+        "errors": [{"line": 17, "error": "Invalid contact_email: n/a"}],
+        "vendors": [{"line": 1, "id": "uuid"}, ...],
+        "duration_ms": 640,
+        "rows_per_second": 15621
+    }
+    """
+    try:
+        if 'Records' in event:
+            summaries = []
+            for record in event['Records']:
+                bucket = record['s3']['bucket']['name']
+                key = unquote_plus(record['s3']['object']['key'])
+                summaries.append(import_from_s3(bucket, key))
+            return {
+                'statusCode': 200,
+                'body': json.dumps(summaries)
+            }
+
+        return handle_api_request(event)
+
+    except Exception as e:
+        print(f"Error importing vendors: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({
+                'error': 'Failed to import vendors',
+                'message': str(e)
+            })
+        }
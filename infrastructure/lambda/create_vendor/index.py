@@ -3,31 +3,49 @@ Lambda Function: Create Vendor
 Creates a new vendor record in the database
 """
 import json
-import psycopg2
-import os
-import boto3
-from datetime import datetime
-
-secrets_client = boto3.client('secretsmanager')
-
-# Get database credentials from Secrets Manager
-def get_db_connection():
-    secret_arn = os.environ['DB_SECRET_ARN']
-    response = secrets_client.get_secret_value(SecretId=secret_arn)
-    secret = json.loads(response['SecretString'])
-
-    return psycopg2.connect(
-        host=os.environ['DB_HOST'],
-        port=os.environ['DB_PORT'],
-        database=os.environ['DB_NAME'],
-        user=secret['username'],
-        password=secret['password']
-    )
+
+from shared.audit import audit_writer
+from shared.cache import status_cache
+from shared.db import get_db_connection, release_db_connection
+from shared.idempotency import (
+    claim_idempotency_key,
+    get_idempotency_key,
+    replay_response,
+    request_fingerprint,
+    store_idempotent_response
+)
+
+IDEMPOTENCY_SCOPE = 'create_vendor'
+
+RESPONSE_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+
+# Vendors are unique by normalized EIN and contact email
+# (idx_vendors_ein_normalized, idx_vendors_email_normalized). Only the
+# conflicting field is reported: the existing vendor's id would give
+# anyone who knows an EIN or email access to that vendor's status.
+CONFLICTING_FIELD_QUERY = """
+    SELECT CASE
+               WHEN NULLIF(regexp_replace(ein, '[^0-9]', '', 'g'), '') = NULLIF(regexp_replace(%(ein)s, '[^0-9]', '', 'g'), '')
+               THEN 'ein'
+               ELSE 'contact_email'
+           END
+    FROM vendors
+    WHERE NULLIF(regexp_replace(ein, '[^0-9]', '', 'g'), '') = NULLIF(regexp_replace(%(ein)s, '[^0-9]', '', 'g'), '')
+       OR lower(contact_email) = lower(%(contact_email)s)
+    LIMIT 1
+"""
 
 def handler(event, context):
     """
     Create a new vendor
 
+    Headers:
+        Idempotency-Key  optional; retries with the same key and body get
+                         the original response instead of a new vendor
+
     Request: {
         "company_name": "ABC Corp",
         "contact_email": "contact@abc.com",
@@ -41,12 +59,14 @@ def handler(event, context):
         "status": "submitted",
         "onboarding_progress": 0
     }
+    409 with the conflicting field ("ein" or "contact_email") if the EIN or
+    contact email is taken
     """
     try:
         # Parse request
-        body = json.loads(event.get('body', '{}'))
+        body = json.loads(event.get('body') or '{}')
         company_name = body.get('company_name')
-        contact_email = body.get('contact_email')
+        contact_email = (body.get('contact_email') or '').strip()
         ein = body.get('ein')
         address = body.get('address')
         contact_phone = body.get('contact_phone')
@@ -64,51 +84,77 @@ def handler(event, context):
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Insert vendor
+        # A retried request replays the stored response
+        idempotency_key = get_idempotency_key(event)
+        fingerprint = request_fingerprint(body)
+        if idempotency_key:
+            stored = claim_idempotency_key(cursor, IDEMPOTENCY_SCOPE, idempotency_key, fingerprint)
+            if stored:
+                cursor.close()
+                release_db_connection(conn)
+                print(f"Replaying response for Idempotency-Key {idempotency_key}")
+                return replay_response(stored, fingerprint, RESPONSE_HEADERS)
+
+        # Insert vendor unless one with the same EIN or email exists
         cursor.execute("""
             INSERT INTO vendors (company_name, ein, address, contact_email, contact_phone)
             VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT DO NOTHING
             RETURNING id, status, onboarding_progress, created_at
         """, (company_name, ein, address, contact_email, contact_phone))
 
         vendor = cursor.fetchone()
-        vendor_id, status, progress, created_at = vendor
+        if vendor:
+            vendor_id, status, progress, created_at = vendor
 
-        # Log audit event
-        cursor.execute("""
-            INSERT INTO audit_logs (vendor_id, action, actor, metadata, timestamp)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            vendor_id,
-            'vendor_created',
-            contact_email,
-            json.dumps({"source": "api", "company_name": company_name}),
-            datetime.utcnow()
-        ))
+            # Mock KY3P and SLP submission (for demo)
+            ky3p_id = f"KY3P-{str(vendor_id)[:8].upper()}"
+            slp_id = f"SLP-{str(vendor_id)[:8].upper()}"
+
+            response = {
+                'statusCode': 201,
+                'headers': RESPONSE_HEADERS,
+                'body': json.dumps({
+                    'id': str(vendor_id),
+                    'status': status,
+                    'onboarding_progress': progress,
+                    'created_at': created_at.isoformat(),
+                    'ky3p_assessment_id': ky3p_id,
+                    'slp_supplier_id': slp_id
+                })
+            }
+        else:
+            cursor.execute(CONFLICTING_FIELD_QUERY, {'ein': ein, 'contact_email': contact_email})
+            conflict = cursor.fetchone()
+            response = {
+                'statusCode': 409,
+                'headers': RESPONSE_HEADERS,
+                'body': json.dumps({
+                    'error': 'A vendor with this EIN or contact email already exists',
+                    'field': conflict[0] if conflict else None
+                })
+            }
+
+        if idempotency_key:
+            store_idempotent_response(cursor, IDEMPOTENCY_SCOPE, idempotency_key, response)
 
         conn.commit()
         cursor.close()
-        conn.close()
 
-        # Mock KY3P and SLP submission (for demo)
-        ky3p_id = f"KY3P-{str(vendor_id)[:8].upper()}"
-        slp_id = f"SLP-{str(vendor_id)[:8].upper()}"
+        if vendor:
+            status_cache.invalidate(vendor_id)
 
-        return {
-            'statusCode': 201,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'id': str(vendor_id),
-                'status': status,
-                'onboarding_progress': progress,
-                'created_at': created_at.isoformat(),
-                'ky3p_assessment_id': ky3p_id,
-                'slp_supplier_id': slp_id
-            })
-        }
+            # Log audit event (queued; written in batches by the audit writer)
+            audit_writer.record(
+                vendor_id,
+                'vendor_created',
+                contact_email,
+                {"source": "api", "company_name": company_name}
+            )
+            audit_writer.flush(conn)
+        release_db_connection(conn)
+
+        return response
 
     except Exception as e:
         print(f"Error creating vendor: {str(e)}")
@@ -4,12 +4,14 @@ Initializes RDS schema and seeds sample data
 This function runs inside the VPC and has network access to the RDS database
 """
 
-import boto3
 import psycopg2
 import json
 import os
 from psycopg2 import sql
 
+from shared.db import is_auth_failure
+from shared.secrets import secret_cache
+
 # Environment variables (set by CDK)
 DB_HOST = os.environ.get('DB_HOST')
 DB_PORT = int(os.environ.get('DB_PORT', '5432'))
@@ -19,11 +21,9 @@ DB_SECRET_ARN = os.environ.get('DB_SECRET_ARN')
 REGION = os.environ.get('AWS_REGION', 'us-east-1')
 
 def get_db_password():
-    """Retrieve database password from AWS Secrets Manager"""
+    """Retrieve database password from AWS Secrets Manager (cached per container)"""
     try:
-        client = boto3.client('secretsmanager', region_name=REGION)
-        response = client.get_secret_value(SecretId=DB_SECRET_ARN)
-        secret = json.loads(response['SecretString'])
+        secret = secret_cache.get(DB_SECRET_ARN)
         return secret['password']
     except Exception as e:
         print(f"Error retrieving password: {e}")
@@ -54,6 +54,43 @@ def read_sql_file(filename):
         print(f"Error reading SQL file: {e}")
         return None
 
+def split_sql_statements(sql):
+    """
+    Split a SQL script on semicolons, keeping quoted strings and
+    dollar-quoted function bodies ($$ ... $$) intact
+    """
+    statements = []
+    current = []
+    i = 0
+    quote = None  # "'" or a dollar-quote tag such as "$$"
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            if sql.startswith(quote, i):
+                current.append(quote)
+                i += len(quote)
+                quote = None
+                continue
+        elif char == "'":
+            quote = "'"
+        elif char == '$':
+            end = sql.find('$', i + 1)
+            tag = sql[i:end + 1] if end != -1 else ''
+            if tag and (tag == '$$' or tag[1:-1].isidentifier()):
+                current.append(tag)
+                i += len(tag)
+                quote = tag
+                continue
+        elif char == ';':
+            statements.append(''.join(current).strip())
+            current = []
+            i += 1
+            continue
+        current.append(char)
+        i += 1
+    statements.append(''.join(current).strip())
+    return [stmt for stmt in statements if stmt]
+
 def execute_sql_statements(conn, statements, description):
     """Execute SQL statements safely"""
     cursor = conn.cursor()
@@ -100,7 +137,10 @@ def verify_tables(conn):
             'risk_scores',
             'esg_questionnaires',
             'audit_logs',
-            'approval_workflows'
+            'approval_workflows',
+            'vendor_summary',
+            'idempotency_keys',
+            'extraction_cache'
         ]
 
         print(f"[+] Found {len(found_tables)} tables: {found_tables}")
@@ -128,13 +168,20 @@ def handler(event, context):
         password = get_db_password()
         print("[OK] Retrieved database password")
 
-        # Connect to database
-        conn = connect_to_database(password)
+        # Connect to database (refresh the cached secret once if it was rotated)
+        try:
+            conn = connect_to_database(password)
+        except psycopg2.OperationalError as e:
+            if not is_auth_failure(e):
+                raise
+            secret_cache.invalidate(DB_SECRET_ARN)
+            conn = connect_to_database(get_db_password())
         print(f"[OK] Connected to database at {DB_HOST}:{DB_PORT}")
 
         # SCHEMA SQL STATEMENTS
         schema_sql = """
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 CREATE TABLE vendors (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     company_name VARCHAR(255) NOT NULL,
@@ -144,15 +191,22 @@ CREATE TABLE vendors (
     contact_phone VARCHAR(50),
     status VARCHAR(50) DEFAULT 'submitted' CHECK (status IN ('submitted', 'documents_pending', 'under_review', 'risk_assessment', 'approved', 'rejected', 'onboarding_complete')),
     onboarding_progress INT DEFAULT 0 CHECK (onboarding_progress >= 0 AND onboarding_progress <= 100),
+    version INT NOT NULL DEFAULT 1,
     ky3p_assessment_id VARCHAR(100),
     slp_supplier_id VARCHAR(100),
     ariba_account_number VARCHAR(100),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+ALTER TABLE vendors ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
 CREATE INDEX idx_vendors_status ON vendors(status);
 CREATE INDEX idx_vendors_created_at ON vendors(created_at);
 CREATE INDEX idx_vendors_email ON vendors(contact_email);
+CREATE UNIQUE INDEX idx_vendors_ein_normalized ON vendors ((NULLIF(regexp_replace(ein, '[^0-9]', '', 'g'), '')));
+CREATE UNIQUE INDEX idx_vendors_email_normalized ON vendors ((lower(contact_email)));
+DROP INDEX IF EXISTS idx_vendors_created_id;
+DROP INDEX IF EXISTS idx_vendors_status_created_id;
+CREATE INDEX idx_vendors_company_name_trgm ON vendors USING gin (company_name gin_trgm_ops);
 CREATE TABLE documents (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     vendor_id UUID NOT NULL REFERENCES vendors(id) ON DELETE CASCADE,
@@ -161,11 +215,13 @@ CREATE TABLE documents (
     s3_key VARCHAR(500) NOT NULL,
     status VARCHAR(50) DEFAULT 'uploaded' CHECK (status IN ('uploaded', 'processing', 'extracted', 'verified', 'failed')),
     extracted_data JSONB,
+    content_sha256 CHAR(64),
     file_size_bytes BIGINT,
     mime_type VARCHAR(100),
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     processed_at TIMESTAMP
 );
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_sha256 CHAR(64);
 CREATE INDEX idx_documents_vendor ON documents(vendor_id);
 CREATE INDEX idx_documents_type ON documents(document_type);
 CREATE INDEX idx_documents_status ON documents(status);
@@ -180,10 +236,15 @@ CREATE TABLE risk_scores (
     sanctions_result JSONB,
     red_flags TEXT[],
     risk_level VARCHAR(20) CHECK (risk_level IN ('low', 'medium', 'high', 'critical')),
+    model_version VARCHAR(50),
+    assessment JSONB,
     calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     expires_at TIMESTAMP
 );
+ALTER TABLE risk_scores ADD COLUMN IF NOT EXISTS model_version VARCHAR(50);
+ALTER TABLE risk_scores ADD COLUMN IF NOT EXISTS assessment JSONB;
 CREATE INDEX idx_risk_scores_vendor ON risk_scores(vendor_id);
+CREATE INDEX idx_risk_scores_vendor_calculated ON risk_scores(vendor_id, calculated_at DESC);
 CREATE INDEX idx_risk_scores_overall ON risk_scores(overall_score);
 CREATE INDEX idx_risk_scores_level ON risk_scores(risk_level);
 CREATE TABLE esg_questionnaires (
@@ -200,7 +261,7 @@ CREATE TABLE esg_questionnaires (
 );
 CREATE INDEX idx_esg_vendor ON esg_questionnaires(vendor_id);
 CREATE TABLE audit_logs (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     vendor_id UUID,
     action VARCHAR(100) NOT NULL,
     actor VARCHAR(255),
@@ -208,10 +269,11 @@ CREATE TABLE audit_logs (
     metadata JSONB,
     success BOOLEAN DEFAULT TRUE,
     error_message TEXT,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-CREATE INDEX idx_audit_vendor ON audit_logs(vendor_id);
-CREATE INDEX idx_audit_timestamp ON audit_logs(timestamp);
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT;
+CREATE INDEX idx_audit_vendor_timestamp ON audit_logs(vendor_id, timestamp DESC);
 CREATE INDEX idx_audit_action ON audit_logs(action);
 CREATE INDEX idx_audit_actor ON audit_logs(actor);
 CREATE TABLE approval_workflows (
@@ -230,27 +292,85 @@ CREATE TABLE approval_workflows (
 );
 CREATE INDEX idx_approval_vendor ON approval_workflows(vendor_id);
 CREATE INDEX idx_approval_status ON approval_workflows(status);
+CREATE TABLE idempotency_keys (
+    scope VARCHAR(100) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    response_status INT,
+    response_body TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (scope, idempotency_key)
+);
+CREATE INDEX idx_idempotency_keys_expires ON idempotency_keys(expires_at);
+CREATE TABLE extraction_cache (
+    content_sha256 CHAR(64) NOT NULL,
+    document_type VARCHAR(50) NOT NULL,
+    extracted_data JSONB NOT NULL,
+    hit_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (content_sha256, document_type)
+);
+CREATE INDEX idx_extraction_cache_last_used ON extraction_cache(last_used_at);
+CREATE TABLE vendor_summary (
+    vendor_id UUID PRIMARY KEY REFERENCES vendors(id) ON DELETE CASCADE,
+    status VARCHAR(50),
+    created_at TIMESTAMP NOT NULL,
+    document_count INT NOT NULL DEFAULT 0,
+    verified_documents INT NOT NULL DEFAULT 0,
+    current_risk_score_id UUID REFERENCES risk_scores(id) ON DELETE SET NULL,
+    risk_score INT,
+    risk_level VARCHAR(20),
+    risk_assessed_at TIMESTAMP
+);
+ALTER TABLE vendor_summary ADD COLUMN IF NOT EXISTS current_risk_score_id UUID REFERENCES risk_scores(id) ON DELETE SET NULL;
+CREATE INDEX idx_vendor_summary_created ON vendor_summary(created_at DESC, vendor_id DESC);
+CREATE INDEX idx_vendor_summary_status_created ON vendor_summary(status, created_at DESC, vendor_id DESC);
+CREATE INDEX idx_vendor_summary_risk_created ON vendor_summary(risk_level, created_at DESC, vendor_id DESC);
 CREATE OR REPLACE FUNCTION update_updated_at_column() RETURNS TRIGGER AS $$ BEGIN NEW.updated_at = CURRENT_TIMESTAMP; RETURN NEW; END; $$ language 'plpgsql';
 CREATE TRIGGER update_vendors_updated_at BEFORE UPDATE ON vendors FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_approval_workflows_updated_at BEFORE UPDATE ON approval_workflows FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
-CREATE VIEW vendor_dashboard AS SELECT v.id, v.company_name, v.contact_email, v.status, v.onboarding_progress, v.created_at, COUNT(DISTINCT d.id) as document_count, COUNT(DISTINCT CASE WHEN d.status = 'verified' THEN d.id END) as verified_documents, rs.overall_score as risk_score, rs.risk_level, rs.calculated_at as risk_assessed_at FROM vendors v LEFT JOIN documents d ON v.id = d.vendor_id LEFT JOIN risk_scores rs ON v.id = rs.vendor_id GROUP BY v.id, rs.overall_score, rs.risk_level, rs.calculated_at;
-CREATE VIEW high_risk_vendors AS SELECT v.*, rs.overall_score, rs.red_flags, rs.calculated_at FROM vendors v INNER JOIN risk_scores rs ON v.id = rs.vendor_id WHERE rs.risk_level IN ('high', 'critical') AND v.status NOT IN ('rejected', 'approved') ORDER BY rs.overall_score DESC;
+CREATE OR REPLACE FUNCTION increment_version_column() RETURNS TRIGGER AS $$ BEGIN NEW.version = OLD.version + 1; RETURN NEW; END; $$ language 'plpgsql';
+CREATE TRIGGER increment_vendors_version BEFORE UPDATE ON vendors FOR EACH ROW EXECUTE FUNCTION increment_version_column();
+CREATE OR REPLACE FUNCTION audit_logs_create_partition(for_month DATE) RETURNS TEXT AS $$ DECLARE start_date DATE := date_trunc('month', for_month)::date; partition_name TEXT := 'audit_logs_' || to_char(start_date, 'YYYY_MM'); BEGIN EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)', partition_name, start_date, (start_date + INTERVAL '1 month')::date); RETURN partition_name; END; $$ language 'plpgsql';
+CREATE OR REPLACE FUNCTION audit_logs_ensure_partitions(months_ahead INT DEFAULT 3) RETURNS VOID AS $$ BEGIN FOR i IN 0..months_ahead LOOP PERFORM audit_logs_create_partition((date_trunc('month', CURRENT_DATE) + make_interval(months => i))::date); END LOOP; END; $$ language 'plpgsql';
+CREATE OR REPLACE FUNCTION audit_logs_detach_expired(retain_months INT, drop_detached BOOLEAN DEFAULT FALSE) RETURNS SETOF TEXT AS $$ DECLARE cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => retain_months))::date; expired RECORD; BEGIN FOR expired IN SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = 'audit_logs'::regclass AND c.relname ~ '^audit_logs_[0-9]{4}_[0-9]{2}$' AND to_date(substring(c.relname FROM 12), 'YYYY_MM') < cutoff ORDER BY c.relname LOOP EXECUTE format('ALTER TABLE audit_logs DETACH PARTITION %I', expired.relname); IF drop_detached THEN EXECUTE format('DROP TABLE %I', expired.relname); END IF; RETURN NEXT expired.relname; END LOOP; END; $$ language 'plpgsql';
+DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'audit_logs'::regclass) THEN RETURN; END IF; ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned; ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey; DROP INDEX IF EXISTS idx_audit_vendor; DROP INDEX IF EXISTS idx_audit_timestamp; DROP INDEX IF EXISTS idx_audit_action; DROP INDEX IF EXISTS idx_audit_actor; DROP INDEX IF EXISTS idx_audit_vendor_timestamp; CREATE TABLE audit_logs ( id UUID NOT NULL DEFAULT uuid_generate_v4(), vendor_id UUID, action VARCHAR(100) NOT NULL, actor VARCHAR(255), actor_ip VARCHAR(50), metadata JSONB, success BOOLEAN DEFAULT TRUE, error_message TEXT, timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id, timestamp) ) PARTITION BY RANGE (timestamp); CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT; CREATE INDEX idx_audit_vendor_timestamp ON audit_logs(vendor_id, timestamp DESC); CREATE INDEX idx_audit_action ON audit_logs(action); CREATE INDEX idx_audit_actor ON audit_logs(actor); PERFORM audit_logs_create_partition(month::date) FROM generate_series( date_trunc('month', (SELECT COALESCE(MIN(timestamp), CURRENT_TIMESTAMP) FROM audit_logs_unpartitioned)), date_trunc('month', CURRENT_TIMESTAMP), INTERVAL '1 month' ) AS month; PERFORM audit_logs_ensure_partitions(3); INSERT INTO audit_logs ( id, vendor_id, action, actor, actor_ip, metadata, success, error_message, timestamp ) SELECT id, vendor_id, action, actor, actor_ip, metadata, success, error_message, COALESCE(timestamp, CURRENT_TIMESTAMP) FROM audit_logs_unpartitioned; DROP TABLE audit_logs_unpartitioned; END; $$;;
+SELECT audit_logs_ensure_partitions(3);
+CREATE OR REPLACE FUNCTION vendor_summary_add_vendors() RETURNS TRIGGER AS $$ BEGIN INSERT INTO vendor_summary (vendor_id, status, created_at) SELECT id, status, created_at FROM new_vendors ON CONFLICT (vendor_id) DO NOTHING; RETURN NULL; END; $$ language 'plpgsql';
+CREATE TRIGGER vendor_summary_on_vendor_insert AFTER INSERT ON vendors REFERENCING NEW TABLE AS new_vendors FOR EACH STATEMENT EXECUTE FUNCTION vendor_summary_add_vendors();
+CREATE OR REPLACE FUNCTION vendor_summary_sync_vendor() RETURNS TRIGGER AS $$ BEGIN UPDATE vendor_summary SET status = NEW.status, created_at = NEW.created_at WHERE vendor_id = NEW.id; RETURN NULL; END; $$ language 'plpgsql';
+DROP TRIGGER IF EXISTS vendor_summary_on_vendor ON vendors;
+CREATE TRIGGER vendor_summary_on_vendor AFTER UPDATE OF status, created_at ON vendors FOR EACH ROW EXECUTE FUNCTION vendor_summary_sync_vendor();
+CREATE OR REPLACE FUNCTION vendor_summary_sync_document() RETURNS TRIGGER AS $$ BEGIN IF TG_OP IN ('UPDATE', 'DELETE') THEN UPDATE vendor_summary SET document_count = document_count - 1, verified_documents = verified_documents - CASE WHEN OLD.status = 'verified' THEN 1 ELSE 0 END WHERE vendor_id = OLD.vendor_id; END IF; IF TG_OP IN ('INSERT', 'UPDATE') THEN UPDATE vendor_summary SET document_count = document_count + 1, verified_documents = verified_documents + CASE WHEN NEW.status = 'verified' THEN 1 ELSE 0 END WHERE vendor_id = NEW.vendor_id; END IF; RETURN NULL; END; $$ language 'plpgsql';
+CREATE TRIGGER vendor_summary_on_document AFTER INSERT OR DELETE OR UPDATE OF status, vendor_id ON documents FOR EACH ROW EXECUTE FUNCTION vendor_summary_sync_document();
+CREATE OR REPLACE FUNCTION vendor_summary_sync_risk_scores() RETURNS TRIGGER AS $$ BEGIN UPDATE vendor_summary s SET current_risk_score_id = latest.id, risk_score = latest.overall_score, risk_level = latest.risk_level, risk_assessed_at = latest.calculated_at FROM (SELECT DISTINCT ON (vendor_id) id, vendor_id, overall_score, risk_level, calculated_at FROM new_scores ORDER BY vendor_id, calculated_at DESC) latest WHERE s.vendor_id = latest.vendor_id AND (s.risk_assessed_at IS NULL OR s.risk_assessed_at <= latest.calculated_at); RETURN NULL; END; $$ language 'plpgsql';
+CREATE TRIGGER vendor_summary_on_risk_scores AFTER INSERT ON risk_scores REFERENCING NEW TABLE AS new_scores FOR EACH STATEMENT EXECUTE FUNCTION vendor_summary_sync_risk_scores();
+INSERT INTO vendor_summary (vendor_id, status, created_at, document_count, verified_documents, current_risk_score_id, risk_score, risk_level, risk_assessed_at) SELECT v.id, v.status, v.created_at, (SELECT COUNT(*) FROM documents d WHERE d.vendor_id = v.id), (SELECT COUNT(*) FROM documents d WHERE d.vendor_id = v.id AND d.status = 'verified'), r.id, r.overall_score, r.risk_level, r.calculated_at FROM vendors v LEFT JOIN LATERAL (SELECT id, overall_score, risk_level, calculated_at FROM risk_scores WHERE vendor_id = v.id ORDER BY calculated_at DESC LIMIT 1) r ON TRUE ON CONFLICT (vendor_id) DO NOTHING;
+UPDATE vendor_summary s SET current_risk_score_id = latest.id FROM (SELECT DISTINCT ON (vendor_id) id, vendor_id FROM risk_scores ORDER BY vendor_id, calculated_at DESC) latest WHERE s.vendor_id = latest.vendor_id AND s.current_risk_score_id IS NULL;
+DROP VIEW IF EXISTS vendor_dashboard;
+CREATE VIEW vendor_dashboard AS SELECT v.id, v.company_name, v.contact_email, v.status, v.onboarding_progress, v.created_at, s.document_count, s.verified_documents, s.risk_score, s.risk_level, s.risk_assessed_at FROM vendors v JOIN vendor_summary s ON s.vendor_id = v.id;
+DROP VIEW IF EXISTS high_risk_vendors;
+CREATE VIEW high_risk_vendors AS SELECT v.*, rs.overall_score, rs.red_flags, rs.calculated_at FROM vendor_summary s INNER JOIN vendors v ON v.id = s.vendor_id INNER JOIN risk_scores rs ON rs.id = s.current_risk_score_id WHERE s.risk_level IN ('high', 'critical') AND v.status NOT IN ('rejected', 'approved') ORDER BY rs.overall_score DESC;
         """
 
         # SEED SQL STATEMENTS - Minimal seeding
         seed_sql = """
 INSERT INTO vendors (company_name, ein, address, contact_email, contact_phone, status, onboarding_progress, created_at) VALUES
-('TechVendor Inc', '12-3456789', '123 Silicon Valley, CA', 'contact@techvendor.com', '+1-650-555-0100', 'submitted', 25, NOW());
+('TechVendor Inc', '12-3456789', '123 Silicon Valley, CA', 'contact@techvendor.com', '+1-650-555-0100', 'submitted', 25, NOW())
+ON CONFLICT DO NOTHING;
 INSERT INTO vendors (company_name, ein, address, contact_email, contact_phone, status, onboarding_progress, created_at) VALUES
-('EcoFriendly Products', '23-4567890', '321 Green Lane, OR', 'contact@ecofriendly.com', '+1-503-555-0400', 'submitted', 0, NOW());
+('EcoFriendly Products', '23-4567890', '321 Green Lane, OR', 'contact@ecofriendly.com', '+1-503-555-0400', 'submitted', 0, NOW())
+ON CONFLICT DO NOTHING;
         """
 
         # Execute schema
-        schema_statements = [stmt.strip() for stmt in schema_sql.split(';') if stmt.strip()]
+        schema_statements = split_sql_statements(schema_sql)
         execute_sql_statements(conn, schema_statements, "Creating database schema")
 
         # Execute seed data
-        seed_statements = [stmt.strip() for stmt in seed_sql.split(';') if stmt.strip()]
+        seed_statements = split_sql_statements(seed_sql)
         execute_sql_statements(conn, seed_statements, "Seeding sample data")
 
         # Verify
@@ -3,112 +3,270 @@ Lambda Function: Document Processor with AWS Textract
 Processes uploaded documents using AWS Textract for OCR
 Extracts key information and stores results in database
 """
+import base64
+import hashlib
 import json
 import boto3
-import psycopg2
 import os
+import re
+import threading
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import time
 
+from shared.cache import status_cache
+from shared.db import get_db_connection, release_db_connection
+from shared.events import notify_vendor_change
+from shared.extraction_cache import lookup_extraction, store_extraction
+from field_rules import extract_fields
+
 textract_client = boto3.client('textract', region_name='us-east-1')
 s3_client = boto3.client('s3', region_name='us-east-1')
-secrets_client = boto3.client('secretsmanager', region_name='us-east-1')
-
-def get_db_connection():
-    """Get database connection using Secrets Manager credentials"""
-    secret_arn = os.environ['DB_SECRET_ARN']
-    response = secrets_client.get_secret_value(SecretId=secret_arn)
-    secret = json.loads(response['SecretString'])
-
-    return psycopg2.connect(
-        host=os.environ['DB_HOST'],
-        port=os.environ['DB_PORT'],
-        database=os.environ['DB_NAME'],
-        user=secret['username'],
-        password=secret['password']
-    )
 
-def extract_text_with_textract(s3_bucket, s3_key, document_type):
-    """
-    Use AWS Textract to extract text and structured data from document
+# Textract publishes job completion to this topic (set by CDK)
+TEXTRACT_SNS_TOPIC_ARN = os.environ.get('TEXTRACT_SNS_TOPIC_ARN')
+TEXTRACT_SNS_ROLE_ARN = os.environ.get('TEXTRACT_SNS_ROLE_ARN')
 
-    Args:
-        s3_bucket: S3 bucket name
-        s3_key: S3 object key
-        document_type: Type of document (w9, insurance, etc.)
+# Small single-page documents (most W-9s and diversity certificates) are
+# analyzed synchronously; analyze_document accepts up to 10 MB
+SYNC_MAX_BYTES = int(os.environ.get('TEXTRACT_SYNC_MAX_BYTES', str(5 * 1024 * 1024)))
+SYNC_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
 
-    Returns:
-        dict: Extracted data with text, forms, tables, confidence scores
+# Page objects of an uncompressed PDF page tree ("/Type /Pages" is the tree)
+PDF_PAGE_PATTERN = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+# Records in one batch are processed concurrently by at most this many threads
+MAX_WORKERS = int(os.environ.get('DOCUMENT_PROCESSOR_WORKERS', '4'))
+
+# Worker threads share the container's single DB connection, so statements
+# and their commit must not interleave
+_db_lock = threading.Lock()
+
+def textract_request_token(document_id):
+    """
+    Idempotency token for a document's Textract job
+
+    Textract accepts at most 64 characters of [a-zA-Z0-9-_], which S3 keys
+    (and their file names) do not fit; the document id does. A redelivered
+    upload event gets the same token, so Textract returns the job already
+    started instead of starting a second one.
     """
     try:
-        print(f"Starting Textract analysis for {document_type}")
-
-        # Start document analysis
-        response = textract_client.start_document_analysis(
-            DocumentLocation={
-                'S3Object': {
-                    'Bucket': s3_bucket,
-                    'Name': s3_key
-                }
-            },
-            ClientRequestToken=f"{s3_key.replace('/', '_')}_{int(time.time())}",
-            FeatureTypes=[
-                'TABLES',
-                'FORMS'
-            ]
-        )
+        return uuid.UUID(str(document_id)).hex
+    except ValueError:
+        return hashlib.sha256(str(document_id).encode()).hexdigest()[:32]
 
-        job_id = response['JobId']
-        print(f"Textract job started: {job_id}")
-
-        # Poll for job completion (max 30 seconds)
-        max_attempts = 60
-        attempt = 0
-
-        while attempt < max_attempts:
-            try:
-                result = textract_client.get_document_analysis(JobId=job_id)
-                job_status = result['JobStatus']
-
-                if job_status == 'SUCCEEDED':
-                    print(f"Textract job completed successfully")
-                    return parse_textract_response(result, document_type)
-                elif job_status == 'FAILED':
-                    print(f"Textract job failed: {result.get('StatusMessage', 'Unknown error')}")
-                    return {
-                        'error': 'Textract processing failed',
-                        'status_message': result.get('StatusMessage', 'Unknown error'),
-                        'confidence': 0
-                    }
+def start_textract_job(s3_bucket, s3_key, document_id):
+    """
+    Stage one: start an asynchronous Textract analysis job
 
-                # Still processing, wait and retry
-                time.sleep(0.5)
-                attempt += 1
+    Textract publishes a completion message to the SNS topic in
+    TEXTRACT_SNS_TOPIC_ARN when the job finishes; that message drives
+    stage two (handle_job_completion), so nothing waits on the job here.
 
-            except textract_client.exceptions.InvalidJobId:
-                print(f"Invalid job ID: {job_id}")
-                return {'error': 'Invalid job ID', 'confidence': 0}
+    Returns:
+        str: Textract job ID
+    """
+    params = {
+        'DocumentLocation': {
+            'S3Object': {
+                'Bucket': s3_bucket,
+                'Name': s3_key
+            }
+        },
+        'ClientRequestToken': textract_request_token(document_id),
+        'FeatureTypes': [
+            'TABLES',
+            'FORMS'
+        ],
+        # Start time rides along so the completion can report the job's duration
+        'JobTag': f"{document_id}:{int(time.time() * 1000)}"
+    }
 
-        return {
-            'error': 'Textract processing timeout',
-            'confidence': 0
+    if TEXTRACT_SNS_TOPIC_ARN:
+        params['NotificationChannel'] = {
+            'SNSTopicArn': TEXTRACT_SNS_TOPIC_ARN,
+            'RoleArn': TEXTRACT_SNS_ROLE_ARN
         }
 
+    response = textract_client.start_document_analysis(**params)
+    print(f"Textract job started: {response['JobId']}")
+    return response['JobId']
+
+def read_document(s3_bucket, s3_key, client=None):
+    """
+    SHA-256 (hex), size and, if it may be analyzed synchronously, the bytes
+    of an uploaded document
+
+    A PDF or image of at most SYNC_MAX_BYTES is read once and its bytes are
+    used for the hash, the page count and analyze_document. Larger files
+    use the object's stored SHA-256 checksum when the upload sent one, and
+    are otherwise hashed as they stream. The ETag is not used: it is only
+    an MD5 for single-part uploads without KMS encryption, and MD5
+    collisions are easy to construct.
+
+    Returns:
+        tuple: (content_sha256, size in bytes, bytes or None)
+    """
+    client = client or s3_client
+    head = client.head_object(Bucket=s3_bucket, Key=s3_key, ChecksumMode='ENABLED')
+    size = head['ContentLength']
+
+    extension = os.path.splitext(s3_key.lower())[1]
+    if size <= SYNC_MAX_BYTES and (extension in SYNC_IMAGE_EXTENSIONS or extension == '.pdf'):
+        data = client.get_object(Bucket=s3_bucket, Key=s3_key)['Body'].read()
+        return hashlib.sha256(data).hexdigest(), size, data
+
+    checksum = head.get('ChecksumSHA256')
+    # Multipart checksums ("...-N") cover the parts, not the whole file
+    if checksum and '-' not in checksum:
+        return base64.b64decode(checksum).hex(), size, None
+
+    digest = hashlib.sha256()
+    body = client.get_object(Bucket=s3_bucket, Key=s3_key)['Body']
+    for chunk in iter(lambda: body.read(1024 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest(), size, None
+
+def find_cached_extraction(content_sha256, document_type):
+    """extracted_data of an earlier upload of the same file, or None"""
+    with _db_lock:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cached = lookup_extraction(cursor, content_sha256, document_type)
+            conn.commit()
+        finally:
+            cursor.close()
+            release_db_connection(conn)
+    return cached
+
+def count_pdf_pages(data):
+    """Pages in a PDF, or None if its page objects are compressed (unknown)"""
+    return len(PDF_PAGE_PATTERN.findall(data)) or None
+
+def choose_textract_path(s3_key, data):
+    """
+    Pick the Textract API for an uploaded document
+
+    'sync' (analyze_document) for images and single-page PDFs whose bytes
+    were read (see read_document); 'async' (start_document_analysis) for
+    everything else, including TIFFs, which may have several pages.
+    """
+    if data is None:
+        return 'async'
+
+    extension = os.path.splitext(s3_key.lower())[1]
+    if extension in SYNC_IMAGE_EXTENSIONS:
+        return 'sync'
+    if extension == '.pdf':
+        return 'sync' if count_pdf_pages(data) == 1 else 'async'
+    return 'async'
+
+def analyze_document_sync(data, document_type, client=None):
+    """
+    Analyze a single-page document from its bytes with the synchronous
+    Textract API (at most 10 MB)
+
+    Returns:
+        dict: Extracted data, as for a finished async job
+    """
+    client = client or textract_client
+    response = client.analyze_document(
+        Document={'Bytes': data},
+        FeatureTypes=['TABLES', 'FORMS']
+    )
+    return parse_textract_response(response.get('Blocks', []), document_type)
+
+def record_textract_timing(extracted_data, path, duration_ms, document_type):
+    """Store which Textract path was used and how long it took, and log it"""
+    extracted_data['textract_path'] = path
+    extracted_data['textract_duration_ms'] = duration_ms
+    print(json.dumps({
+        'metric': 'textract_extraction',
+        'path': path,
+        'duration_ms': duration_ms,
+        'document_type': document_type
+    }))
+
+def fetch_textract_results(job_id, document_type):
+    """
+    Stage two: fetch and parse the results of a finished Textract job
+
+    Returns:
+        dict: Extracted data with text, forms, tables, confidence scores
+    """
+    try:
+        pages = iter_textract_pages(job_id)
+        return parse_textract_response(
+            iter_textract_blocks(pages), document_type, job_id=job_id
+        )
+    except textract_client.exceptions.InvalidJobId:
+        print(f"Invalid job ID: {job_id}")
+        return {'error': 'Invalid job ID', 'confidence': 0}
     except Exception as e:
-        print(f"Error during Textract analysis: {str(e)}")
+        print(f"Error fetching Textract results: {str(e)}")
         return {
             'error': f'Textract error: {str(e)}',
-            'confidence': 0
+            'confidence': 0,
+            # e.g. throttling; the completion message is redelivered
+            'retryable': True
         }
 
-def parse_textract_response(response, document_type):
+def iter_textract_pages(job_id, first_page=None, client=None):
+    """
+    Yield every get_document_analysis result page for a job
+
+    Textract returns at most 1000 blocks per call; later pages are fetched
+    lazily by following NextToken so only one page is held at a time.
+
+    Args:
+        job_id: Textract job ID
+        first_page: Already-fetched first page (e.g. from status polling)
+        client: Textract client (defaults to the module client)
+    """
+    client = client or textract_client
+    page = first_page or client.get_document_analysis(JobId=job_id, MaxResults=1000)
+
+    while True:
+        yield page
+        next_token = page.get('NextToken')
+        if not next_token:
+            return
+        page = client.get_document_analysis(
+            JobId=job_id, MaxResults=1000, NextToken=next_token
+        )
+
+def iter_textract_blocks(pages):
+    """Flatten result pages into a single stream of blocks"""
+    for page in pages:
+        for block in page.get('Blocks', []):
+            yield block
+
+def parse_textract_response(blocks, document_type, job_id=None):
     """
-    Parse Textract response and extract relevant data
+    Parse Textract blocks and extract relevant data
+
+    Blocks are consumed once, page by page. Besides the results, only the
+    relationships of KEY_VALUE_SET blocks and the text of WORD and
+    SELECTION_ELEMENT blocks from all pages are held until the end, to
+    resolve KEY/VALUE text across pages.
+
+    Args:
+        blocks: Iterable of Textract blocks (consumed once, page by page),
+                or a single get_document_analysis response dict
+        document_type: Type of document (w9, insurance, etc.)
+        job_id: Textract job ID recorded with the results
 
     Returns:
         dict: Structured extracted data
     """
-    blocks = response.get('Blocks', [])
+    if isinstance(blocks, dict):
+        job_id = job_id or blocks.get('JobId')
+        blocks = blocks.get('Blocks', [])
+
     extracted_data = {
         'document_type': document_type,
         'extracted_text': [],
@@ -116,9 +274,18 @@ def parse_textract_response(response, document_type):
         'tables': [],
         'confidence_scores': [],
         'extraction_timestamp': datetime.utcnow().isoformat(),
-        'textract_job_id': response.get('JobId')
+        'textract_job_id': job_id
     }
 
+    # KEY/VALUE blocks reference blocks that may arrive on later pages, so
+    # until the stream is exhausted two compact Id indexes (no geometry) are
+    # kept: every KEY_VALUE_SET block's relationships and confidence, and the
+    # text of every WORD and SELECTION_ELEMENT block (which words a KEY or
+    # VALUE uses is not known until its block is seen)
+    form_blocks = {}
+    word_text = {}
+    key_ids = []
+
     # Extract text blocks
     for block in blocks:
         if block['BlockType'] == 'LINE':
@@ -130,19 +297,19 @@ def parse_textract_response(response, document_type):
             })
             extracted_data['confidence_scores'].append(confidence)
 
+        elif block['BlockType'] == 'WORD':
+            word_text[block['Id']] = block.get('Text', '')
+
+        elif block['BlockType'] == 'SELECTION_ELEMENT':
+            word_text[block['Id']] = block.get('SelectionStatus', '')
+
         elif block['BlockType'] == 'KEY_VALUE_SET':
+            form_blocks[block['Id']] = {
+                'Relationships': block.get('Relationships', []),
+                'Confidence': block.get('Confidence', 0)
+            }
             if block.get('EntityTypes', [None])[0] == 'KEY':
-                key_text = block.get('Text', 'Unknown')
-                # Find associated value
-                for relationship in block.get('Relationships', []):
-                    if relationship['Type'] == 'VALUE':
-                        for value_block in blocks:
-                            if value_block['Id'] == relationship['Ids'][0]:
-                                value_text = value_block.get('Text', '')
-                                extracted_data['key_value_pairs'][key_text] = {
-                                    'value': value_text,
-                                    'confidence': value_block.get('Confidence', 0)
-                                }
+                key_ids.append(block['Id'])
 
         elif block['BlockType'] == 'TABLE':
             # Store table ID for reference
@@ -160,6 +327,19 @@ def parse_textract_response(response, document_type):
 
             extracted_data['tables'].append(table_data)
 
+    # Resolve each KEY's VALUE once all pages have been seen (O(1) per lookup)
+    for key_id in key_ids:
+        key_block = form_blocks[key_id]
+        key_text = resolve_child_text(key_block, word_text) or 'Unknown'
+        for relationship in key_block['Relationships']:
+            if relationship['Type'] == 'VALUE':
+                value_block = form_blocks.get(relationship['Ids'][0])
+                if value_block is not None:
+                    extracted_data['key_value_pairs'][key_text] = {
+                        'value': resolve_child_text(value_block, word_text),
+                        'confidence': value_block['Confidence']
+                    }
+
     # Calculate average confidence
     if extracted_data['confidence_scores']:
         avg_confidence = sum(extracted_data['confidence_scores']) / len(extracted_data['confidence_scores'])
@@ -174,217 +354,369 @@ def parse_textract_response(response, document_type):
 
     return extracted_data
 
+def resolve_child_text(block, word_text):
+    """
+    Build a KEY/VALUE block's text from its CHILD WORD blocks
+
+    Textract does not populate Text on KEY_VALUE_SET blocks; the text lives
+    on the WORD (or SELECTION_ELEMENT) blocks listed as CHILD relationships.
+    """
+    words = []
+    for relationship in block['Relationships']:
+        if relationship['Type'] == 'CHILD':
+            for child_id in relationship['Ids']:
+                text = word_text.get(child_id)
+                if text:
+                    words.append(text)
+    return ' '.join(words)
+
 def extract_document_specific_fields(extracted_data, document_type):
     """
-    Extract document-specific fields based on document type
+    Extract document-specific fields based on document type (see field_rules)
     """
-    specific_fields = {
-        'w9': extract_w9_fields,
-        'insurance': extract_insurance_fields,
-        'diversity_cert': extract_diversity_fields,
-        'bcp': extract_bcp_fields,
-        'soc2': extract_soc2_fields,
-        'iso_cert': extract_iso_fields
-    }
+    return extract_fields(extracted_data, document_type)
 
-    extractor = specific_fields.get(document_type, extract_generic_fields)
-    return extractor(extracted_data)
+def update_document_status(document_id, vendor_id, status, extracted_data, content_sha256=None):
+    """
+    Update document status and extracted data in database
 
-def extract_w9_fields(extracted_data):
-    """Extract W-9 specific fields"""
-    kvp = extracted_data['key_value_pairs']
-    return {
-        'tin': extract_value_like(kvp, ['TIN', 'Tax ID', 'EIN', 'SSN']),
-        'entity_type': extract_value_like(kvp, ['Entity Type', 'Business Type']),
-        'business_name': extract_value_like(kvp, ['Business Name', 'Name']),
-        'address': extract_value_like(kvp, ['Address', 'Street Address']),
-        'city_state_zip': extract_value_like(kvp, ['City', 'State', 'ZIP', 'Postal Code']),
-        'signature': check_signature(extracted_data['extracted_text']),
-        'date_signed': extract_date(extracted_data['extracted_text'])
-    }
+    Fresh extraction results are also added to the extraction cache, under
+    the content hash recorded for the document when it was uploaded.
+    """
+    try:
+        with _db_lock:
+            return _update_document_status(
+                document_id, vendor_id, status, extracted_data, content_sha256
+            )
+    except Exception as e:
+        print(f"Error updating document status: {str(e)}")
+        return False
 
-def extract_insurance_fields(extracted_data):
-    """Extract Insurance Certificate specific fields"""
-    kvp = extracted_data['key_value_pairs']
-    return {
-        'policy_holder': extract_value_like(kvp, ['Insured', 'Policy Holder', 'Company Name']),
-        'policy_number': extract_value_like(kvp, ['Policy Number', 'Policy #']),
-        'insurance_company': extract_value_like(kvp, ['Insurance Company', 'Insurer', 'Carrier']),
-        'coverage_types': extract_coverage_types(extracted_data['extracted_text']),
-        'coverage_limits': extract_coverage_limits(extracted_data['key_value_pairs']),
-        'effective_date': extract_date_from_text(extracted_data['extracted_text'], 'effective'),
-        'expiration_date': extract_date_from_text(extracted_data['extracted_text'], 'expir'),
-        'certificate_holder': extract_value_like(kvp, ['Certificate Holder', 'Additional Insured'])
-    }
+def _update_document_status(document_id, vendor_id, status, extracted_data, content_sha256):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        UPDATE documents
+        SET status = %s,
+            extracted_data = %s::jsonb,
+            content_sha256 = COALESCE(%s, content_sha256),
+            processed_at = NOW()
+        WHERE id = %s AND vendor_id = %s
+        RETURNING id, status, document_type, content_sha256
+    """, (
+        status,
+        json.dumps(extracted_data),
+        content_sha256,
+        document_id,
+        vendor_id
+    ))
+
+    result = cursor.fetchone()
+    # Only real results are cached; an error would be replayed for every re-upload
+    cacheable = (
+        status == 'extracted'
+        and 'error' not in extracted_data
+        and not extracted_data.get('extraction_cache_hit')
+    )
+    if result and result[3] and cacheable:
+        store_extraction(cursor, result[3], result[2], extracted_data)
+    if result:
+        notify_vendor_change(cursor, vendor_id, 'document', {
+            'document_id': str(result[0]),
+            'document_type': result[2],
+            'status': result[1]
+        })
+    conn.commit()
+    cursor.close()
+    release_db_connection(conn)
+
+    if result:
+        status_cache.invalidate(vendor_id)
+        print(f"Document {document_id} updated with status: {status}")
+        return True
+    else:
+        print(f"Document {document_id} not found or update failed")
+        return False
 
-def extract_diversity_fields(extracted_data):
-    """Extract Diversity Certification specific fields"""
-    kvp = extracted_data['key_value_pairs']
-    return {
-        'certification_type': extract_value_like(kvp, ['Certification Type', 'MBE', 'WBE', 'DBE']),
-        'certified_organization': extract_value_like(kvp, ['Certified By', 'Issuer']),
-        'cert_number': extract_value_like(kvp, ['Certification Number', 'Cert #']),
-        'issue_date': extract_date(extracted_data['extracted_text']),
-        'expiration_date': extract_date_from_text(extracted_data['extracted_text'], 'expir'),
-        'scope_of_certification': extract_value_like(kvp, ['Scope', 'Services'])
-    }
+def parse_document_key(s3_key):
+    """
+    Extract vendor_id, document_type and document_id from an S3 key
 
-def extract_bcp_fields(extracted_data):
-    """Extract Business Continuity Plan specific fields"""
-    kvp = extracted_data['key_value_pairs']
-    return {
-        'recovery_time_objective': extract_value_like(kvp, ['RTO', 'Recovery Time']),
-        'recovery_point_objective': extract_value_like(kvp, ['RPO', 'Recovery Point']),
-        'backup_location': extract_value_like(kvp, ['Backup', 'Backup Location']),
-        'disaster_recovery': check_contains(extracted_data['extracted_text'], ['disaster recovery', 'contingency plan']),
-        'last_tested': extract_date_from_text(extracted_data['extracted_text'], 'test')
-    }
+    Format: vendors/{vendor_id}/{document_type}/{document_id}/{filename}
+    """
+    path_parts = s3_key.split('/')
+    vendor_id = path_parts[1] if len(path_parts) > 1 else None
+    document_type = path_parts[2] if len(path_parts) > 2 else 'other'
+    document_id = path_parts[3] if len(path_parts) > 3 else None
+    return vendor_id, document_type, document_id
 
-def extract_soc2_fields(extracted_data):
-    """Extract SOC 2 Report specific fields"""
-    kvp = extracted_data['key_value_pairs']
-    return {
-        'report_type': extract_value_like(kvp, ['Type I', 'Type II']),
-        'service_auditor': extract_value_like(kvp, ['Auditor', 'Service Auditor']),
-        'report_period_start': extract_date_from_text(extracted_data['extracted_text'], 'from'),
-        'report_period_end': extract_date_from_text(extracted_data['extracted_text'], 'to'),
-        'opinion': check_contains(extracted_data['extracted_text'], ['opinion', 'complied']),
-        'controls_tested': extract_value_like(kvp, ['Controls', 'Testing'])
-    }
+def handle_upload(vendor_id, document_id, s3_bucket, s3_key, document_type):
+    """
+    Stage one: reuse the results of an identical earlier upload, analyze a
+    small single-page document right away, or mark the document as
+    processing and start an async Textract job
+    """
+    if not all([vendor_id, document_id, s3_bucket, s3_key]):
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': 'Missing required parameters'})
+        }
 
-def extract_iso_fields(extracted_data):
-    """Extract ISO Certification specific fields"""
-    kvp = extracted_data['key_value_pairs']
-    return {
-        'iso_standard': extract_value_like(kvp, ['ISO', 'Standard']),
-        'issuing_body': extract_value_like(kvp, ['Issued By', 'Accredited By']),
-        'cert_number': extract_value_like(kvp, ['Certification Number', 'Number']),
-        'issue_date': extract_date(extracted_data['extracted_text']),
-        'expiration_date': extract_date_from_text(extracted_data['extracted_text'], 'expir'),
-        'scope': extract_value_like(kvp, ['Scope', 'Services Covered'])
-    }
+    print(f"Document: {document_id}, Type: {document_type}, Vendor: {vendor_id}")
+
+    started = time.monotonic()
+    content_sha256, data = None, None
+    try:
+        content_sha256, _, data = read_document(s3_bucket, s3_key)
+        cached = find_cached_extraction(content_sha256, document_type)
+    except Exception as e:
+        # Without the cache the document is simply extracted again
+        print(f"Extraction cache lookup for {s3_key} failed: {str(e)}")
+        cached = None
+
+    if cached:
+        duration_ms = int((time.monotonic() - started) * 1000)
+        extracted_data = dict(cached, extraction_cache_hit=True)
+        record_textract_timing(extracted_data, 'cache', duration_ms, document_type)
+        return store_extracted_data(document_id, vendor_id, extracted_data, content_sha256)
+
+    started = time.monotonic()
+    extracted_data = None
+    try:
+        if choose_textract_path(s3_key, data) == 'sync':
+            extracted_data = analyze_document_sync(data, document_type)
+    except Exception as e:
+        # e.g. a PDF whose page count was misread; the async job handles anything
+        print(f"Synchronous analysis of {s3_key} failed, starting a job instead: {str(e)}")
+
+    if extracted_data is not None:
+        duration_ms = int((time.monotonic() - started) * 1000)
+        record_textract_timing(extracted_data, 'sync', duration_ms, document_type)
+        return store_extracted_data(document_id, vendor_id, extracted_data, content_sha256)
+
+    # Update status to 'processing' before the job can possibly complete; the
+    # content hash is kept on the document so stage two can cache the results
+    update_document_status(
+        document_id, vendor_id, 'processing', {'status': 'processing'}, content_sha256
+    )
+
+    # Results arrive later via the Textract completion message
+    job_id = start_textract_job(s3_bucket, s3_key, document_id)
 
-def extract_generic_fields(extracted_data):
-    """Extract generic fields for unknown document types"""
     return {
-        'text_extracted': len(extracted_data['extracted_text']) > 0,
-        'tables_found': len(extracted_data['tables']),
-        'key_value_pairs_found': len(extracted_data['key_value_pairs'])
+        'statusCode': 202,
+        'body': json.dumps({
+            'message': 'Document processing started',
+            'document_id': document_id,
+            'vendor_id': vendor_id,
+            'status': 'processing',
+            'textract_job_id': job_id
+        })
     }
 
-def extract_value_like(kvp, keys):
-    """Find value matching any of the given keys"""
-    for key in keys:
-        for kvp_key, kvp_value in kvp.items():
-            if key.lower() in kvp_key.lower():
-                return kvp_value.get('value', '')
-    return None
+def store_extracted_data(document_id, vendor_id, extracted_data, content_sha256=None):
+    """
+    Mark a document extracted with its results, or failed if extraction
+    returned an error; handler-style response
+    """
+    status = 'failed' if 'error' in extracted_data else 'extracted'
+    success = update_document_status(
+        document_id,
+        vendor_id,
+        status,
+        extracted_data,
+        content_sha256
+    )
 
-def extract_coverage_types(text_blocks):
-    """Extract insurance coverage types from text"""
-    coverage_keywords = {
-        'general_liability': ['general liability', 'GL coverage'],
-        'workers_compensation': ['workers comp', 'workers\'s compensation'],
-        'professional_liability': ['professional liability', 'errors & omissions', 'E&O'],
-        'cyber_liability': ['cyber liability', 'cyber insurance'],
-        'umbrella': ['umbrella', 'excess liability']
+    if success and status == 'failed':
+        return {
+            # 5xx is redelivered by process_batch; a bad job ID never succeeds
+            'statusCode': 502 if extracted_data.get('retryable') else 422,
+            'body': json.dumps({
+                'error': extracted_data['error'],
+                'document_id': document_id,
+                'vendor_id': vendor_id,
+                'status': 'failed'
+            })
+        }
+    elif success:
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'Document processed successfully',
+                'document_id': document_id,
+                'vendor_id': vendor_id,
+                'status': 'extracted',
+                'confidence': extracted_data.get('average_confidence', 0),
+                'textract_path': extracted_data.get('textract_path'),
+                'cache_hit': bool(extracted_data.get('extraction_cache_hit'))
+            })
+        }
+    else:
+        return {
+            'statusCode': 500,
+            'body': json.dumps({
+                'error': 'Failed to update document status'
+            })
+        }
+
+def handle_job_completion(message):
+    """
+    Stage two: store the results of a finished Textract job
+
+    Textract completion message (delivered through SNS):
+    {
+        "JobId": "...",
+        "Status": "SUCCEEDED" | "FAILED" | "ERROR" | "PARTIAL_SUCCESS",
+        "API": "StartDocumentAnalysis",
+        "JobTag": "document_id:started_ms",
+        "Timestamp": 1731061800000,
+        "DocumentLocation": {"S3ObjectName": "path/to/file", "S3Bucket": "bucket-name"}
     }
+    """
+    job_id = message['JobId']
+    s3_key = message['DocumentLocation']['S3ObjectName']
+    vendor_id, document_type, document_id = parse_document_key(s3_key)
+    # JobTag is "<document id>:<start time in ms>" (just the id for older jobs)
+    tag_document_id, _, started = (message.get('JobTag') or '').partition(':')
+    document_id = tag_document_id or document_id
+    started_ms = int(started) if started.isdigit() else None
+
+    if not all([vendor_id, document_id]):
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': f'Cannot map Textract job {job_id} to a document'})
+        }
 
-    full_text = ' '.join([block['text'].lower() for block in text_blocks])
-    found_coverage = {}
-
-    for coverage_type, keywords in coverage_keywords.items():
-        for keyword in keywords:
-            if keyword in full_text:
-                found_coverage[coverage_type] = True
-                break
-
-    return found_coverage
-
-def extract_coverage_limits(kvp):
-    """Extract coverage limits from key-value pairs"""
-    limits = {}
-    for key, value_obj in kvp.items():
-        if 'limit' in key.lower() or 'coverage' in key.lower():
-            limits[key] = value_obj.get('value', '')
-    return limits
-
-def extract_date(text_blocks):
-    """Extract first date found in text blocks"""
-    import re
-    date_pattern = r'\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}-\d{1,2}-\d{2,4}'
-
-    for block in text_blocks:
-        match = re.search(date_pattern, block.get('text', ''))
-        if match:
-            return match.group(0)
-    return None
+    if message['Status'] != 'SUCCEEDED':
+        print(f"Textract job {job_id} finished with status {message['Status']}")
+        update_document_status(document_id, vendor_id, 'failed', {
+            'error': 'Textract processing failed',
+            'status_message': message['Status'],
+            'textract_job_id': job_id,
+            'confidence': 0
+        })
+        # The job's outcome is final; redelivering the message cannot change it
+        return {
+            'statusCode': 422,
+            'body': json.dumps({
+                'error': 'Textract processing failed',
+                'document_id': document_id,
+                'textract_job_id': job_id
+            })
+        }
 
-def extract_date_from_text(text_blocks, prefix):
-    """Extract date that follows a specific prefix"""
-    import re
-    full_text = ' '.join([block.get('text', '') for block in text_blocks])
+    # Extract text and data from the finished job
+    extracted_data = fetch_textract_results(job_id, document_type)
+    if started_ms:
+        completed_ms = message.get('Timestamp') or int(time.time() * 1000)
+        record_textract_timing(extracted_data, 'async', int(completed_ms) - started_ms, document_type)
 
-    # Find text containing prefix and extract following date
-    pattern = rf'{prefix}[^0-9]*(\d{{1,2}}/\d{{1,2}}/\d{{2,4}})'
-    match = re.search(pattern, full_text, re.IGNORECASE)
-    if match:
-        return match.group(1)
-    return None
+    # Update status to 'extracted' with results
+    return store_extracted_data(document_id, vendor_id, extracted_data)
 
-def check_signature(text_blocks):
-    """Check if document appears to be signed"""
-    signature_keywords = ['signature', 'signed', 'authorized', 'approved', 'accepted']
-    full_text = ' '.join([block.get('text', '').lower() for block in text_blocks])
+def unwrap_completion_message(record):
+    """Return the Textract completion message in an SNS or SQS record, if any"""
+    if 'Sns' in record:
+        return json.loads(record['Sns']['Message'])
 
-    return any(keyword in full_text for keyword in signature_keywords)
+    if record.get('eventSource') == 'aws:sqs':
+        body = json.loads(record['body'])
+        # SNS -> SQS subscriptions wrap the message in an SNS envelope
+        if 'Message' in body:
+            return json.loads(body['Message'])
+        return body if 'JobId' in body else None
 
-def check_contains(text_blocks, keywords):
-    """Check if text contains any of the given keywords"""
-    full_text = ' '.join([block.get('text', '').lower() for block in text_blocks])
-    return any(keyword in full_text for keyword in keywords)
+    return None
+
+def process_record(record):
+    """
+    Process one S3, SNS or SQS record
 
-def update_document_status(document_id, vendor_id, status, extracted_data):
-    """Update document status and extracted data in database"""
+    Returns:
+        list: One handler-style response per document in the record
+              (an SQS message from S3 can carry several uploads)
+    """
+    message = unwrap_completion_message(record)
+    if message is not None:
+        return [handle_job_completion(message)]
+
+    s3_records = [record]
+    if record.get('eventSource') == 'aws:sqs':
+        # S3 -> SQS delivery: the body is an S3 event with its own Records
+        s3_records = json.loads(record['body']).get('Records', [])
+
+    responses = []
+    for s3_record in s3_records:
+        s3_bucket = s3_record['s3']['bucket']['name']
+        # Keys in S3 events are URL-encoded ("my w9.pdf" arrives as "my+w9.pdf")
+        s3_key = urllib.parse.unquote_plus(s3_record['s3']['object']['key'])
+        vendor_id, document_type, document_id = parse_document_key(s3_key)
+        responses.append(handle_upload(vendor_id, document_id, s3_bucket, s3_key, document_type))
+    return responses
+
+def process_record_safely(record):
+    """process_record() that reports exceptions as a 500 response"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        return process_record(record)
+    except Exception as e:
+        print(f"Error processing record: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return [{
+            'statusCode': 500,
+            'body': json.dumps({
+                'error': 'Failed to process document',
+                'message': str(e)
+            })
+        }]
 
-        cursor.execute("""
-            UPDATE documents
-            SET status = %s,
-                extracted_data = %s::jsonb,
-                processed_at = NOW()
-            WHERE id = %s AND vendor_id = %s
-            RETURNING id, status
-        """, (
-            status,
-            json.dumps(extracted_data),
-            document_id,
-            vendor_id
-        ))
-
-        result = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        if result:
-            print(f"Document {document_id} updated with status: {status}")
-            return True
-        else:
-            print(f"Document {document_id} not found or update failed")
-            return False
+def process_batch(records):
+    """
+    Process every record of a batched delivery concurrently
 
-    except Exception as e:
-        print(f"Error updating document status: {str(e)}")
-        return False
+    Returns a per-record result plus an SQS partial batch response
+    (batchItemFailures), so only records that failed with a retryable
+    error are redelivered. Client errors (4xx, including Textract jobs that
+    ended unsuccessfully) are not retried.
+    """
+    workers = max(1, min(MAX_WORKERS, len(records)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(process_record_safely, records))
+
+    results = []
+    batch_item_failures = []
+    for position, (record, responses) in enumerate(zip(records, outcomes)):
+        message_id = record.get('messageId') or record.get('Sns', {}).get('MessageId')
+        retryable = any(response['statusCode'] >= 500 for response in responses)
+
+        if retryable and record.get('messageId'):
+            batch_item_failures.append({'itemIdentifier': record['messageId']})
+
+        results.append({
+            'record': message_id or position,
+            'success': all(response['statusCode'] < 400 for response in responses),
+            'documents': [
+                {'statusCode': response['statusCode'], **json.loads(response['body'])}
+                for response in responses
+            ]
+        })
+
+    failed_count = sum(1 for result in results if not result['success'])
+    print(f"Processed {len(records)} records, {failed_count} failed")
+
+    return {
+        'statusCode': 200 if failed_count == 0 else 207,
+        'body': json.dumps({'results': results}),
+        'batchItemFailures': batch_item_failures
+    }
 
 def handler(event, context):
     """
-    Lambda handler triggered by S3 document upload events
+    Lambda handler for both stages of document processing
 
-    Event from S3:
+    Stage one - S3 upload event (starts Textract):
     {
         "Records": [{
             "s3": {
@@ -402,73 +734,35 @@ def handler(event, context):
         "s3_key": "path/to/file",
         "document_type": "w9"
     }
+
+    Stage two - Textract completion message delivered through SNS/SQS:
+    {
+        "Records": [{"Sns": {"Message": "{\"JobId\": ..., \"Status\": \"SUCCEEDED\", ...}"}}]
+    }
+
+    Batched deliveries (several Records) return a result per record and
+    {"batchItemFailures": [{"itemIdentifier": "<SQS messageId>"}]} for retries.
     """
     try:
         print(f"Processing document: {json.dumps(event)}")
 
-        # Parse event (handle both S3 and direct invocation)
+        # S3, SNS and SQS deliveries: process every record in the batch
         if 'Records' in event:
-            # S3 event
-            record = event['Records'][0]
-            s3_bucket = record['s3']['bucket']['name']
-            s3_key = record['s3']['object']['key']
-
-            # Extract vendor_id and document_id from S3 key
-            # Format: vendors/{vendor_id}/{document_type}/{document_id}/{filename}
-            path_parts = s3_key.split('/')
-            vendor_id = path_parts[1] if len(path_parts) > 1 else None
-            document_type = path_parts[2] if len(path_parts) > 2 else 'other'
-            document_id = path_parts[3] if len(path_parts) > 3 else None
-
-        else:
-            # Direct invocation
-            vendor_id = event.get('vendor_id')
-            document_id = event.get('document_id')
-            s3_bucket = event.get('s3_bucket')
-            s3_key = event.get('s3_key')
-            document_type = event.get('document_type', 'other')
-
-        if not all([vendor_id, document_id, s3_bucket, s3_key]):
-            return {
-                'statusCode': 400,
-                'body': json.dumps({'error': 'Missing required parameters'})
-            }
-
-        print(f"Document: {document_id}, Type: {document_type}, Vendor: {vendor_id}")
-
-        # Update status to 'processing'
-        update_document_status(document_id, vendor_id, 'processing', {'status': 'processing'})
-
-        # Extract text and data using Textract
-        extracted_data = extract_text_with_textract(s3_bucket, s3_key, document_type)
-
-        # Update status to 'extracted' with results
-        success = update_document_status(
-            document_id,
-            vendor_id,
-            'extracted',
-            extracted_data
+            return process_batch(event['Records'])
+
+        # Direct invocation with a completion message
+        if 'JobId' in event:
+            return handle_job_completion(event)
+
+        # Direct invocation
+        return handle_upload(
+            event.get('vendor_id'),
+            event.get('document_id'),
+            event.get('s3_bucket'),
+            event.get('s3_key'),
+            event.get('document_type', 'other')
         )
 
-        if success:
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'message': 'Document processed successfully',
-                    'document_id': document_id,
-                    'vendor_id': vendor_id,
-                    'status': 'extracted',
-                    'confidence': extracted_data.get('average_confidence', 0)
-                })
-            }
-        else:
-            return {
-                'statusCode': 500,
-                'body': json.dumps({
-                    'error': 'Failed to update document status'
-                })
-            }
-
     except Exception as e:
         print(f"Error processing document: {str(e)}")
         import traceback
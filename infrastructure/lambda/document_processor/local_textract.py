@@ -0,0 +1,152 @@
+"""
+Local stand-in for the Textract -> SNS -> Lambda completion path
+Runs both stages of the document processor end to end without AWS:
+a fake Textract client serves recorded get_document_analysis pages and
+publishes completion messages to an in-memory notification channel, which
+then invokes the handler with an SNS-shaped event.
+
+Usage:
+    python local_textract.py recorded_pages.json vendors/{vendor_id}/w9/{document_id}/w9.pdf [w9.pdf]
+
+recorded_pages.json is a list of get_document_analysis responses (one per page).
+With the document file as well, small single-page documents take the
+synchronous analyze_document path (answered from the same pages) and the
+extraction cache is used; without it the file cannot be read or hashed, so
+every document goes through the async job.
+Requires the DB_* environment variables to point at a local PostgreSQL.
+"""
+import io
+import json
+import sys
+import uuid
+
+import index
+
+class LocalNotificationChannel:
+    """In-memory stand-in for the SNS topic Textract publishes to"""
+
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, message):
+        self.messages.append(message)
+
+    def deliver(self, handler=None, context=None):
+        """Invoke the handler once per pending message, as SNS would"""
+        handler = handler or index.handler
+        results = []
+        while self.messages:
+            message = self.messages.pop(0)
+            results.append(handler(sns_event(message), context))
+        return results
+
+class LocalTextractClient:
+    """Minimal Textract client that completes every job with recorded pages"""
+
+    class exceptions:
+        class InvalidJobId(Exception):
+            pass
+
+    def __init__(self, pages, channel, status='SUCCEEDED'):
+        self.pages = pages
+        self.channel = channel
+        self.status = status
+        self.jobs = {}
+
+    def start_document_analysis(self, DocumentLocation, JobTag=None, **kwargs):
+        job_id = f"local-{uuid.uuid4()}"
+        s3_object = DocumentLocation['S3Object']
+        self.jobs[job_id] = s3_object
+
+        # Textract would publish this to NotificationChannel.SNSTopicArn
+        self.channel.publish({
+            'JobId': job_id,
+            'Status': self.status,
+            'API': 'StartDocumentAnalysis',
+            'JobTag': JobTag,
+            'DocumentLocation': {
+                'S3ObjectName': s3_object['Name'],
+                'S3Bucket': s3_object['Bucket']
+            }
+        })
+        return {'JobId': job_id}
+
+    def analyze_document(self, Document, FeatureTypes=None):
+        blocks = [block for page in self.pages for block in page.get('Blocks', [])]
+        return {'Blocks': blocks, 'DocumentMetadata': {'Pages': len(self.pages)}}
+
+    def get_document_analysis(self, JobId, MaxResults=1000, NextToken=None):
+        if JobId not in self.jobs:
+            raise self.exceptions.InvalidJobId(JobId)
+
+        page_number = int(NextToken or 0)
+        page = dict(self.pages[page_number])
+        page['JobStatus'] = self.status
+        page.pop('NextToken', None)
+        if page_number + 1 < len(self.pages):
+            page['NextToken'] = str(page_number + 1)
+        return page
+
+class LocalS3Client:
+    """Serves one local file (None: no file) as whatever object is asked for"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def head_object(self, Bucket, Key, **kwargs):
+        if self.data is None:
+            raise FileNotFoundError(f"No local copy of {Key}")
+        return {'ContentLength': len(self.data)}
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.data), 'ContentLength': len(self.data)}
+
+def sns_event(message):
+    """Wrap a Textract completion message the way SNS delivers it to Lambda"""
+    return {
+        'Records': [{
+            'EventSource': 'aws:sns',
+            'Sns': {
+                'Type': 'Notification',
+                'Message': json.dumps(message)
+            }
+        }]
+    }
+
+def run_local(pages, s3_key, s3_bucket='local-documents', document=None):
+    """
+    Run the upload stage, then deliver the completion message (if a job
+    was started)
+
+    Args:
+        document: Bytes of the uploaded file; without them the async job is used
+
+    Returns:
+        tuple: (stage one response, list of stage two responses)
+    """
+    channel = LocalNotificationChannel()
+    index.textract_client = LocalTextractClient(pages, channel)
+    index.s3_client = LocalS3Client(document)
+
+    started = index.handler({
+        'Records': [{
+            's3': {
+                'bucket': {'name': s3_bucket},
+                'object': {'key': s3_key}
+            }
+        }]
+    }, None)
+    completed = channel.deliver()
+    return started, completed
+
+if __name__ == "__main__":
+    with open(sys.argv[1]) as f:
+        recorded_pages = json.load(f)
+
+    document = None
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], 'rb') as f:
+            document = f.read()
+
+    started, completed = run_local(recorded_pages, sys.argv[2], document=document)
+    print(json.dumps({'started': started, 'completed': completed}, indent=2))
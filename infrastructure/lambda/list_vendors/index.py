@@ -0,0 +1,256 @@
+"""
+Lambda Function: List Vendors
+Pages through vendors for the GS dashboard with keyset pagination,
+server-side filters and estimated counts
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from shared.db import get_db_connection, release_db_connection
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+# Below this many estimated rows an exact COUNT(*) is cheap enough
+EXACT_COUNT_THRESHOLD = 1000
+
+VENDOR_STATUSES = (
+    'submitted', 'documents_pending', 'under_review', 'risk_assessment',
+    'approved', 'rejected', 'onboarding_complete'
+)
+RISK_LEVELS = ('low', 'medium', 'high', 'critical')
+
+# Newest first; (created_at, vendor_id) is unique, so it doubles as the page
+# cursor. vendor_summary carries status, latest risk level and document counts,
+# so every filter and sort is served by one of its indexes (search by
+# idx_vendors_company_name_trgm) and a page costs O(page size).
+LIST_QUERY = """
+    SELECT v.id, v.company_name, v.ein, v.contact_email, v.contact_phone,
+           v.status, v.onboarding_progress, s.created_at,
+           s.document_count, s.verified_documents,
+           s.risk_score, s.risk_level, s.risk_assessed_at
+    FROM vendor_summary s
+    JOIN vendors v ON v.id = s.vendor_id
+    {where}
+    ORDER BY s.created_at DESC, s.vendor_id DESC
+    LIMIT %(limit)s
+"""
+
+COUNT_QUERY = """
+    SELECT 1
+    FROM vendor_summary s
+    JOIN vendors v ON v.id = s.vendor_id
+    {where}
+"""
+
+# Planner statistics for the status column: per-status counts without a scan
+STATUS_ESTIMATE_QUERY = """
+    SELECT s.most_common_vals::text::text[], s.most_common_freqs, c.reltuples
+    FROM pg_class c
+    LEFT JOIN pg_stats s
+           ON s.tablename = c.relname AND s.attname = 'status' AND s.schemaname = 'public'
+    WHERE c.relname = 'vendors' AND c.relkind = 'r'
+"""
+
+def encode_cursor(created_at, vendor_id):
+    raw = f"{created_at.isoformat()}|{vendor_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Returns (created_at, vendor id); raises ValueError if malformed"""
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    created_at, vendor_id = raw.split('|', 1)
+    # Parsed here so a bad cursor is a 400, not a failed cast in the query
+    return datetime.fromisoformat(created_at), str(uuid.UUID(vendor_id))
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def parse_filters(params):
+    """
+    Validate query string parameters
+
+    Returns:
+        tuple: (filters dict, error message or None)
+    """
+    filters = {}
+
+    statuses = [s for s in (params.get('status') or '').split(',') if s]
+    invalid = [s for s in statuses if s not in VENDOR_STATUSES]
+    if invalid:
+        return None, f"Invalid status: {', '.join(invalid)}"
+    if statuses:
+        filters['statuses'] = statuses
+
+    risk_level = params.get('risk_level')
+    if risk_level:
+        if risk_level not in RISK_LEVELS:
+            return None, f"Invalid risk_level: {risk_level}"
+        filters['risk_level'] = risk_level
+
+    search = (params.get('q') or '').strip()
+    if search:
+        filters['search'] = f"%{escape_like(search)}%"
+
+    try:
+        limit = int(params.get('limit') or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        return None, "limit must be an integer"
+    filters['limit'] = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if params.get('cursor'):
+        try:
+            filters['after_created_at'], filters['after_id'] = decode_cursor(params['cursor'])
+        except (ValueError, UnicodeDecodeError):
+            return None, "Invalid cursor"
+
+    return filters, None
+
+def build_where(filters, include_cursor=True):
+    """WHERE clause for the active filters; values are bound as query parameters"""
+    clauses = []
+    if 'statuses' in filters:
+        clauses.append("s.status = ANY(%(statuses)s)")
+    if 'risk_level' in filters:
+        clauses.append("s.risk_level = %(risk_level)s")
+    if 'search' in filters:
+        clauses.append("v.company_name ILIKE %(search)s")
+    if include_cursor and 'after_id' in filters:
+        clauses.append("(s.created_at, s.vendor_id) < (%(after_created_at)s::timestamp, %(after_id)s::uuid)")
+    return ("WHERE " + " AND ".join(clauses)) if clauses else ""
+
+def estimate_count(cursor, filters):
+    """
+    Row count for the filters, from the planner's estimate
+
+    Exact counts over 500k vendors would cost more than the page itself;
+    small results are counted exactly.
+    """
+    query = COUNT_QUERY.format(where=build_where(filters, include_cursor=False))
+    cursor.execute("EXPLAIN (FORMAT JSON) " + query, filters)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+
+    if estimate < EXACT_COUNT_THRESHOLD:
+        cursor.execute(f"SELECT COUNT(*) FROM ({query}) matched", filters)
+        return cursor.fetchone()[0], True
+    return estimate, False
+
+def estimate_status_counts(cursor):
+    """Vendors per status from planner statistics (exact for small tables)"""
+    cursor.execute(STATUS_ESTIMATE_QUERY)
+    row = cursor.fetchone()
+    values, freqs, reltuples = row if row else (None, None, 0)
+
+    if not values or reltuples is None or reltuples < EXACT_COUNT_THRESHOLD:
+        cursor.execute("SELECT status, COUNT(*) FROM vendors GROUP BY status")
+        counts = dict(cursor.fetchall())
+    else:
+        counts = {status: int(round(freq * reltuples)) for status, freq in zip(values, freqs)}
+
+    return {status: counts.get(status, 0) for status in VENDOR_STATUSES}
+
+def handler(event, context):
+    """
+    List vendors
+
+    Query parameters:
+        status      comma-separated vendor statuses
+        risk_level  low | medium | high | critical (latest risk score)
+        q           company name search
+        limit       page size (default 25, max 100)
+        cursor      next_cursor from the previous page
+
+    Response: {
+        "vendors": [{"id": "uuid", "company_name": "...", "status": "submitted",
+                     "document_count": 3, "verified_documents": 2,
+                     "risk_score": 42, "risk_level": "medium", ...}],
+        "next_cursor": "..." or null,
+        "total": 1234,
+        "total_is_estimate": true,
+        "status_counts": {"submitted": 400, "approved": 700, ...}
+    }
+    """
+    try:
+        params = event.get('queryStringParameters') or {}
+        filters, error = parse_filters(params)
+        if error:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': error})
+            }
+
+        # Connect to database
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        # Fetch one extra row to learn whether another page exists
+        page_size = filters['limit']
+        cursor.execute(
+            LIST_QUERY.format(where=build_where(filters)),
+            dict(filters, limit=page_size + 1)
+        )
+        rows = cursor.fetchall()
+
+        total, exact = estimate_count(cursor, filters)
+        status_counts = estimate_status_counts(cursor)
+
+        cursor.close()
+        release_db_connection(conn)
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        vendors = [{
+            'id': str(vendor_id),
+            'company_name': company_name,
+            'ein': ein,
+            'contact_email': contact_email,
+            'contact_phone': contact_phone,
+            'status': status,
+            'onboarding_progress': onboarding_progress,
+            'created_at': created_at.isoformat(),
+            'document_count': document_count,
+            'verified_documents': verified_documents,
+            'risk_score': risk_score,
+            'risk_level': risk_level,
+            'risk_assessed_at': risk_assessed_at.isoformat() if risk_assessed_at else None
+        } for (vendor_id, company_name, ein, contact_email, contact_phone, status,
+               onboarding_progress, created_at, document_count, verified_documents,
+               risk_score, risk_level, risk_assessed_at) in rows]
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(last[7], last[0])
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'vendors': vendors,
+                'next_cursor': next_cursor,
+                'total': total,
+                'total_is_estimate': not exact,
+                'status_counts': status_counts
+            })
+        }
+
+    except Exception as e:
+        print(f"Error listing vendors: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({
+                'error': 'Failed to list vendors',
+                'message': str(e)
+            })
+        }
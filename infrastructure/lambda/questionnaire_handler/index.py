@@ -3,27 +3,13 @@ Lambda Function: Questionnaire Handler
 Saves vendor KY3P questionnaire responses to database
 """
 import json
-import boto3
-import psycopg2
-import os
 from datetime import datetime
 from decimal import Decimal
 
-secrets_client = boto3.client('secretsmanager', region_name='us-east-1')
-
-def get_db_connection():
-    """Get database connection using Secrets Manager credentials"""
-    secret_arn = os.environ['DB_SECRET_ARN']
-    response = secrets_client.get_secret_value(SecretId=secret_arn)
-    secret = json.loads(response['SecretString'])
-
-    return psycopg2.connect(
-        host=os.environ['DB_HOST'],
-        port=os.environ['DB_PORT'],
-        database=os.environ['DB_NAME'],
-        user=secret['username'],
-        password=secret['password']
-    )
+from shared.audit import audit_writer
+from shared.cache import status_cache
+from shared.db import get_db_connection, release_db_connection
+from shared.events import notify_vendor_change
 
 def transform_questionnaire_to_questions(form_data):
     """
@@ -195,7 +181,7 @@ def save_questionnaire(vendor_id, form_data):
         vendor = cursor.fetchone()
         if not vendor:
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             return {
                 'success': False,
                 'error': 'Vendor not found'
@@ -260,30 +246,31 @@ def save_questionnaire(vendor_id, form_data):
                 WHERE id = %s
             """, (vendor_id,))
 
-        # Create audit log
-        cursor.execute("""
-            INSERT INTO audit_logs (
-                vendor_id,
-                action,
-                metadata,
-                actor
-            )
-            VALUES (%s, %s, %s::jsonb, %s)
-        """, (
+        notify_vendor_change(cursor, vendor_id, 'questionnaire', {
+            'questionnaire_id': str(questionnaire_id),
+            'answered_questions': stats['answered_questions'],
+            'total_questions': stats['total_questions'],
+            'completion_percentage': float(stats['completion_percentage'])
+        })
+
+        conn.commit()
+        cursor.close()
+        status_cache.invalidate(vendor_id)
+
+        # Create audit log (queued; written in batches by the audit writer)
+        audit_writer.record(
             vendor_id,
             'questionnaire_submitted',
-            json.dumps({
+            'vendor',
+            {
                 'questionnaire_id': str(questionnaire_id),
                 'total_questions': stats['total_questions'],
                 'answered_questions': stats['answered_questions'],
                 'completion_percentage': float(stats['completion_percentage'])
-            }),
-            'vendor'
-        ))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+            }
+        )
+        audit_writer.flush(conn)
+        release_db_connection(conn)
 
         print(f"Questionnaire saved successfully for vendor {vendor_id}")
         print(f"Stats: {stats}")
@@ -326,7 +313,7 @@ def get_questionnaire(vendor_id):
 
         result = cursor.fetchone()
         cursor.close()
-        conn.close()
+        release_db_connection(conn)
 
         if not result:
             return {
@@ -0,0 +1,233 @@
+"""
+Lambda Function: Bulk Risk Re-scoring
+Re-scores the whole vendor portfolio (or every vendor whose score expired)
+with set-based reads, table-driven scoring and a single COPY per chunk
+
+Lambda entry point: batch.handler
+    {"mode": "expired"}   # default: vendors with no current (unexpired) score
+    {"mode": "all"}       # every vendor, e.g. after a new risk model version
+
+CLI (uses the same DB_* environment variables as the Lambda):
+    python batch.py --mode all
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import datetime, timedelta
+
+from shared.audit import audit_writer
+from shared.cache import status_cache
+from shared.db import get_db_connection, release_db_connection
+from index import (
+    SCORE_TTL_DAYS,
+    build_assessment_document,
+    perform_sanctions_screening,
+    risk_model
+)
+
+# Rows fetched from the server-side cursor and written per COPY
+CHUNK_SIZE = 5000
+
+VENDOR_SCORING_QUERY = """
+    SELECT v.id, v.company_name, v.ein,
+           COALESCE(d.document_types, '{}'),
+           COALESCE(q.completion_percentage, 0)
+    FROM vendors v
+    LEFT JOIN (
+        SELECT vendor_id, array_agg(DISTINCT document_type) AS document_types
+        FROM documents
+        GROUP BY vendor_id
+    ) d ON d.vendor_id = v.id
+    LEFT JOIN (
+        SELECT DISTINCT ON (vendor_id) vendor_id, completion_percentage
+        FROM esg_questionnaires
+        ORDER BY vendor_id, completed_at DESC
+    ) q ON q.vendor_id = v.id
+    WHERE %(mode)s = 'all'
+       OR NOT EXISTS (
+            SELECT 1
+            FROM vendor_summary s
+            JOIN risk_scores rs ON rs.id = s.current_risk_score_id
+            WHERE s.vendor_id = v.id
+              AND COALESCE(rs.expires_at, rs.calculated_at + INTERVAL '90 days') > NOW()
+       )
+"""
+
+RISK_SCORE_COLUMNS = (
+    'vendor_id', 'overall_score', 'financial_score', 'compliance_score',
+    'cyber_score', 'esg_score', 'sanctions_result', 'red_flags', 'risk_level',
+    'calculated_at', 'expires_at', 'model_version', 'assessment'
+)
+
+def score_chunk(rows, calculated_at, expires_at):
+    """
+    Score a chunk of vendor rows with the compiled risk model
+
+    Scores and risk levels are computed over the chunk's columns, grouped
+    by document mask and EIN (see CompiledRiskModel.score_columns), and
+    findings once per distinct set of facts. Sanctions screening is a name
+    lookup per vendor; the assessment documents are built last.
+
+    Args:
+        rows: (id, company_name, ein, document_types, completion_percentage)
+              tuples from VENDOR_SCORING_QUERY
+
+    Returns:
+        list: Row tuples in RISK_SCORE_COLUMNS order
+    """
+    if not rows:
+        return []
+
+    vendor_ids, company_names, eins, document_types, completions = zip(*rows)
+    has_ein = [bool(ein) for ein in eins]
+    document_masks = [risk_model.document_mask(types) for types in document_types]
+
+    scores = risk_model.score_columns(has_ein, document_masks, completions)
+    sanctions = [
+        perform_sanctions_screening(company_name, ein)
+        for company_name, ein in zip(company_names, eins)
+    ]
+    findings = risk_model.findings_columns(
+        scores, has_ein, document_masks,
+        [result.get('matches', 0) for result in sanctions]
+    )
+
+    scored = []
+    for position, vendor_id in enumerate(vendor_ids):
+        assessment = {name: column[position] for name, column in scores.items()}
+        assessment.update(findings[position])
+        document = build_assessment_document(vendor_id, assessment, sanctions[position], calculated_at)
+
+        scored.append((
+            vendor_id, assessment['overall_score'], assessment['financial_score'],
+            assessment['compliance_score'], assessment['cyber_score'], assessment['esg_score'],
+            json.dumps(sanctions[position]), assessment['red_flags'], assessment['risk_level'],
+            calculated_at, expires_at, risk_model.version, json.dumps(document)
+        ))
+    return scored
+
+def format_text_array(values):
+    """Render a list of strings as a PostgreSQL array literal"""
+    escaped = [
+        '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+        for value in values
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+def copy_risk_scores(cursor, scored_rows):
+    """Insert scored rows into risk_scores with a single COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in scored_rows:
+        row = list(row)
+        row[7] = format_text_array(row[7])
+        row[9] = row[9].isoformat()
+        row[10] = row[10].isoformat()
+        writer.writerow(row)
+    buffer.seek(0)
+
+    cursor.copy_expert(
+        f"COPY risk_scores ({', '.join(RISK_SCORE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+def rescore_portfolio(conn, mode='expired', chunk_size=CHUNK_SIZE):
+    """
+    Re-score vendors in one transaction
+
+    Returns:
+        dict: Counts and timing for the run
+    """
+    started = time.monotonic()
+    calculated_at = datetime.utcnow()
+    expires_at = calculated_at + timedelta(days=SCORE_TTL_DAYS)
+
+    # Server-side cursor: vendors stream in chunks instead of all at once
+    read_cursor = conn.cursor(name='risk_rescore_vendors')
+    read_cursor.itersize = chunk_size
+    read_cursor.execute(VENDOR_SCORING_QUERY, {'mode': mode})
+
+    write_cursor = conn.cursor()
+    scored_count = 0
+    level_counts = {level: 0 for level in ('low', 'medium', 'high', 'critical')}
+
+    while True:
+        rows = read_cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        scored_rows = score_chunk(rows, calculated_at, expires_at)
+        copy_risk_scores(write_cursor, scored_rows)
+        scored_count += len(scored_rows)
+        for row in scored_rows:
+            level_counts[row[8]] += 1
+        print(f"Re-scored {scored_count} vendors")
+
+    read_cursor.close()
+
+    summary = {
+        'mode': mode,
+        'vendors_scored': scored_count,
+        'risk_levels': level_counts,
+        'duration_ms': int((time.monotonic() - started) * 1000)
+    }
+
+    conn.commit()
+    write_cursor.close()
+
+    # One audit event for the whole run
+    audit_writer.record(None, 'portfolio_rescored', 'system', summary)
+    audit_writer.flush(conn)
+    if scored_count:
+        status_cache.invalidate_all()
+    return summary
+
+def handler(event, context):
+    """
+    Re-score the vendor portfolio
+
+    Request: {"mode": "expired" | "all"}
+
+    Response: {
+        "mode": "expired",
+        "vendors_scored": 1200,
+        "risk_levels": {"low": 300, "medium": 700, "high": 150, "critical": 50},
+        "duration_ms": 4200
+    }
+    """
+    try:
+        mode = (event or {}).get('mode', 'expired')
+        if mode not in ('expired', 'all'):
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'error': f'Invalid mode: {mode}'})
+            }
+
+        conn = get_db_connection()
+        summary = rescore_portfolio(conn, mode)
+        release_db_connection(conn)
+
+        print(f"Portfolio re-score complete: {summary}")
+        return {
+            'statusCode': 200,
+            'body': json.dumps(summary)
+        }
+
+    except Exception as e:
+        print(f"Error re-scoring portfolio: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'body': json.dumps({
+                'error': 'Failed to re-score portfolio',
+                'message': str(e)
+            })
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score vendor risk in bulk")
+    parser.add_argument('--mode', choices=['expired', 'all'], default='expired')
+    args = parser.parse_args()
+    print(json.dumps(handler({'mode': args.mode}, None), indent=2))
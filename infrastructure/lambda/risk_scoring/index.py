@@ -3,124 +3,150 @@ Lambda Function: Risk Scoring
 Calculates vendor risk scores based on multiple factors
 """
 import json
-import psycopg2
-import os
-import boto3
-from datetime import datetime
-
-secrets_client = boto3.client('secretsmanager')
-
-def normalize_document_type(doc_type):
-    """Normalize document type names for compatibility"""
-    # Map frontend names to backend names
-    type_mapping = {
-        'insurance_certificate': 'insurance',
-        'business_license': 'business_license',
-        'w9': 'w9',
-        'diversity_cert': 'diversity_cert',
-        'bcp': 'bcp',
-        'soc2': 'soc2',
-        'iso_cert': 'iso_cert'
-    }
-    return type_mapping.get(doc_type, doc_type)
+from datetime import datetime, timedelta
+
+from shared.audit import audit_writer
+from shared.cache import status_cache
+from shared.db import get_db_connection, release_db_connection
+from shared.events import notify_vendor_change
+from risk_model import load_risk_model
+from sanctions import screen_vendor
 
-def get_db_connection():
-    secret_arn = os.environ['DB_SECRET_ARN']
-    response = secrets_client.get_secret_value(SecretId=secret_arn)
-    secret = json.loads(response['SecretString'])
+# Compiled once per container; scoring and findings are table-driven
+risk_model = load_risk_model()
 
-    return psycopg2.connect(
-        host=os.environ['DB_HOST'],
-        port=os.environ['DB_PORT'],
-        database=os.environ['DB_NAME'],
-        user=secret['username'],
-        password=secret['password']
-    )
+# Scores are valid for this long before a re-score is due
+SCORE_TTL_DAYS = 90
 
 def perform_sanctions_screening(company_name, ein):
     """
-    Perform sanctions screening via API
-    For demo: returns mock data
-    In production: integrate with Sanctions.io API
+    Screen a vendor against the OFAC, EU and UN lists
+    Matching runs against an in-memory index of the current list snapshot,
+    rebuilt only when the snapshot moves (see sanctions.py);
+    response_time_ms is the measured lookup time
     """
-    # Mock sanctions screening for demo
-    return {
-        "matches": 0,
-        "response_time_ms": 347,
-        "lists_checked": ["OFAC", "EU", "UN"],
-        "screened_at": datetime.utcnow().isoformat()
-    }
+    return screen_vendor(company_name, ein)
 
-def calculate_financial_score(vendor_data):
-    """Calculate financial risk score (0-100, lower is better)"""
-    # Simplified scoring for demo
-    # In production: analyze financial statements, credit reports
-    base_score = 30
+def assess_vendor(ein, document_types, esg_completion, sanctions_result):
+    """
+    Score a vendor and generate findings with the compiled risk model
 
-    # Check if EIN is provided
-    if not vendor_data.get('ein'):
-        base_score += 20
+    Returns:
+        dict: Component scores, overall score, risk level and findings
+    """
+    document_mask = risk_model.document_mask(document_types)
+    scores = risk_model.score(bool(ein), document_mask, esg_completion)
 
-    return min(base_score, 100)
+    facts = dict(scores)
+    facts['has_ein'] = bool(ein)
+    facts['document_mask'] = document_mask
+    facts['sanctions_matches'] = sanctions_result.get('matches', 0)
 
-def calculate_compliance_score(documents):
-    """Calculate compliance risk score"""
-    base_score = 20
+    assessment = dict(scores)
+    assessment.update(risk_model.findings(facts))
+    return assessment
 
-    # Check for required documents (support both naming conventions)
-    doc_types = {normalize_document_type(d['document_type']) for d in documents}
+def build_assessment_document(vendor_id, assessment, sanctions_result, calculated_at):
+    """
+    Build the risk assessment payload returned by POST and stored for GET
 
-    if 'w9' not in doc_types:
-        base_score += 25
-    if 'insurance' not in doc_types:
-        base_score += 20
-    if 'diversity_cert' not in doc_types:
-        base_score += 10
+    Returns:
+        dict: The response body, as stored in risk_scores.assessment
+    """
+    return {
+        'vendor_id': vendor_id,
+        'overall_score': assessment['overall_score'],
+        'financial_score': assessment['financial_score'],
+        'compliance_score': assessment['compliance_score'],
+        'cybersecurity_score': assessment['cyber_score'],
+        'esg_score': assessment['esg_score'],
+        'financial_findings': assessment['financial_findings'],
+        'compliance_findings': assessment['compliance_findings'],
+        'cybersecurity_findings': assessment['cybersecurity_findings'],
+        'esg_findings': assessment['esg_findings'],
+        'recommendations': assessment['recommendations'],
+        'risk_level': assessment['risk_level'],
+        'sanctions_screening': sanctions_result,
+        'red_flags': assessment['red_flags'],
+        'model_version': risk_model.version,
+        'assessed_at': calculated_at.isoformat(),
+        'next_review_date': (calculated_at + timedelta(days=SCORE_TTL_DAYS)).isoformat()
+    }
 
-    return min(base_score, 100)
+def get_existing_risk_score(vendor_id):
+    """
+    Retrieve existing risk score from database
 
-def calculate_cyber_score(documents):
-    """Calculate cybersecurity risk score"""
-    base_score = 25
+    The assessment stored at calculation time is returned as-is, so GET
+    serves exactly what the POST computed without re-serializing it.
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
 
-    doc_types = {normalize_document_type(d['document_type']) for d in documents}
+        # Current assessment: two primary-key lookups via the summary pointer
+        cursor.execute("""
+            SELECT rs.assessment::text
+            FROM vendor_summary s
+            JOIN risk_scores rs ON rs.id = s.current_risk_score_id
+            WHERE s.vendor_id = %s
+        """, (vendor_id,))
 
-    if 'soc2' not in doc_types:
-        base_score += 40
-    if 'iso_cert' not in doc_types:
-        base_score += 20
+        risk_row = cursor.fetchone()
+        cursor.close()
+        release_db_connection(conn)
 
-    return min(base_score, 100)
+        if not risk_row:
+            return {
+                'statusCode': 404,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': 'Risk score not found for this vendor'})
+            }
 
-def calculate_esg_score(esg_data):
-    """Calculate ESG risk score"""
-    if not esg_data:
-        return 50  # Medium risk if no ESG data
+        if risk_row[0] is None:
+            # Scored before assessments were stored
+            return reconstruct_risk_assessment(vendor_id)
 
-    # Base score on completion percentage
-    completion = esg_data.get('completion_percentage', 0)
-    return int((100 - completion) / 2)  # Inverse of completion
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': risk_row[0]
+        }
+    except Exception as e:
+        print(f"Error retrieving risk score: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({
+                'error': 'Failed to retrieve risk score',
+                'message': str(e)
+            })
+        }
 
-def get_existing_risk_score(vendor_id):
-    """Retrieve existing risk score from database"""
+def reconstruct_risk_assessment(vendor_id):
+    """Rebuild findings for a risk score row that has no stored assessment"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Get most recent risk score
+        # Get most recent risk score with the vendor facts its findings depend on
         cursor.execute("""
-            SELECT overall_score, financial_score, compliance_score,
-                   cyber_score, esg_score, risk_level, sanctions_result,
-                   red_flags, calculated_at
-            FROM risk_scores
-            WHERE vendor_id = %s
-            ORDER BY calculated_at DESC
-            LIMIT 1
+            SELECT rs.overall_score, rs.financial_score, rs.compliance_score,
+                   rs.cyber_score, rs.esg_score, rs.risk_level, rs.sanctions_result,
+                   rs.red_flags, rs.calculated_at, rs.model_version, v.ein,
+                   ARRAY(SELECT d.document_type FROM documents d WHERE d.vendor_id = rs.vendor_id)
+            FROM vendor_summary s
+            JOIN risk_scores rs ON rs.id = s.current_risk_score_id
+            JOIN vendors v ON v.id = s.vendor_id
+            WHERE s.vendor_id = %s
         """, (vendor_id,))
 
         risk_row = cursor.fetchone()
         cursor.close()
-        conn.close()
+        release_db_connection(conn)
 
         if not risk_row:
             return {
@@ -129,47 +155,28 @@ def get_existing_risk_score(vendor_id):
                 'body': json.dumps({'error': 'Risk score not found for this vendor'})
             }
 
-        # Generate findings based on scores (reconstructed from scores)
-        overall_score, financial_score, compliance_score, cyber_score, esg_score, risk_level, sanctions_result, red_flags, calculated_at = risk_row
-
-        # Generate findings
-        financial_findings = [
-            'Financial assessment based on submitted documentation',
-            'EIN verification completed' if financial_score < 50 else 'EIN verification pending',
-            'No bankruptcy or default records found'
-        ]
-
-        compliance_findings = [
-            'W-9 form verified' if compliance_score < 50 else 'W-9 form pending',
-            'Insurance certificates reviewed' if compliance_score < 50 else 'Insurance documentation pending',
-            'Compliance checks passed' if compliance_score < 30 else 'Some compliance items need attention'
-        ]
-
-        cybersecurity_findings = [
-            'SOC 2 Type II certification required' if cyber_score > 60 else 'Cybersecurity certifications verified',
-            'Cyber insurance policy review needed' if cyber_score > 60 else 'Adequate cyber insurance coverage',
-            'Security controls assessment completed'
-        ]
-
-        esg_findings = [
-            'Environmental sustainability practices reviewed',
-            'Diversity and inclusion policies assessed',
-            'Community engagement verified'
-        ]
-
-        # Generate recommendations
-        recommendations = []
-        if cyber_score > 60:
-            recommendations.append('Renew SOC 2 certification within 30 days')
-            recommendations.append('Update cyber insurance policy to meet minimum coverage requirements')
-        if compliance_score > 50:
-            recommendations.append('Submit missing compliance documentation')
-        if esg_score > 50:
-            recommendations.append('Complete ESG questionnaire for improved rating')
+        (overall_score, financial_score, compliance_score, cyber_score, esg_score,
+         risk_level, sanctions_result, red_flags, calculated_at, model_version,
+         ein, document_types) = risk_row
+
+        if not isinstance(sanctions_result, dict):
+            sanctions_result = json.loads(sanctions_result) if sanctions_result else {}
+
+        # Findings come from the same compiled rules the POST used
+        findings = risk_model.findings({
+            'financial_score': financial_score,
+            'compliance_score': compliance_score,
+            'cyber_score': cyber_score,
+            'esg_score': esg_score,
+            'overall_score': overall_score,
+            'has_ein': bool(ein),
+            'document_mask': risk_model.document_mask(document_types),
+            'sanctions_matches': sanctions_result.get('matches', 0)
+        }, sections=('financial_findings', 'compliance_findings',
+                     'cybersecurity_findings', 'esg_findings', 'recommendations'))
 
         # Calculate next review date
-        from datetime import timedelta
-        next_review_date = (calculated_at + timedelta(days=90)).isoformat()
+        next_review_date = (calculated_at + timedelta(days=SCORE_TTL_DAYS)).isoformat()
 
         return {
             'statusCode': 200,
@@ -184,14 +191,15 @@ def get_existing_risk_score(vendor_id):
                 'compliance_score': compliance_score,
                 'cybersecurity_score': cyber_score,
                 'esg_score': esg_score,
-                'financial_findings': financial_findings,
-                'compliance_findings': compliance_findings,
-                'cybersecurity_findings': cybersecurity_findings,
-                'esg_findings': esg_findings,
-                'recommendations': recommendations if recommendations else ['Continue maintaining current compliance standards'],
+                'financial_findings': findings['financial_findings'],
+                'compliance_findings': findings['compliance_findings'],
+                'cybersecurity_findings': findings['cybersecurity_findings'],
+                'esg_findings': findings['esg_findings'],
+                'recommendations': findings['recommendations'],
                 'risk_level': risk_level,
-                'sanctions_screening': sanctions_result if isinstance(sanctions_result, dict) else json.loads(sanctions_result),
+                'sanctions_screening': sanctions_result,
                 'red_flags': red_flags if isinstance(red_flags, list) else [],
+                'model_version': model_version,
                 'assessed_at': calculated_at.isoformat(),
                 'next_review_date': next_review_date
             })
@@ -262,7 +270,7 @@ def handler(event, context):
 
         if not vendor:
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             return {
                 'statusCode': 404,
                 'headers': {'Content-Type': 'application/json'},
@@ -270,157 +278,76 @@ def handler(event, context):
             }
 
         company_name, ein, email = vendor
-        vendor_data = {'company_name': company_name, 'ein': ein, 'email': email}
 
-        # Get documents
+        # Get document types
         cursor.execute("""
-            SELECT document_type, status, extracted_data
+            SELECT document_type
             FROM documents
             WHERE vendor_id = %s
         """, (vendor_id,))
-        documents = [
-            {'document_type': row[0], 'status': row[1], 'extracted_data': row[2]}
-            for row in cursor.fetchall()
-        ]
+        document_types = [row[0] for row in cursor.fetchall()]
 
         # Get ESG data
         cursor.execute("""
-            SELECT completion_percentage, questions
+            SELECT completion_percentage
             FROM esg_questionnaires
             WHERE vendor_id = %s
             ORDER BY completed_at DESC
             LIMIT 1
         """, (vendor_id,))
         esg_row = cursor.fetchone()
-        esg_data = {
-            'completion_percentage': esg_row[0] if esg_row else 0,
-            'questions': esg_row[1] if esg_row else {}
-        }
+        esg_completion = esg_row[0] if esg_row else 0
 
         # Perform sanctions screening
         sanctions_result = perform_sanctions_screening(company_name, ein)
 
-        # Calculate component scores
-        financial_score = calculate_financial_score(vendor_data)
-        compliance_score = calculate_compliance_score(documents)
-        cyber_score = calculate_cyber_score(documents)
-        esg_score = calculate_esg_score(esg_data)
-
-        # Calculate overall score (weighted average)
-        overall_score = int(
-            financial_score * 0.25 +
-            compliance_score * 0.35 +
-            cyber_score * 0.25 +
-            esg_score * 0.15
-        )
+        # Score and generate findings with the compiled risk model
+        assessment = assess_vendor(ein, document_types, esg_completion, sanctions_result)
+        calculated_at = datetime.utcnow()
+        document = build_assessment_document(vendor_id, assessment, sanctions_result, calculated_at)
+        response_body = json.dumps(document)
 
-        # Determine risk level
-        if overall_score < 30:
-            risk_level = 'low'
-        elif overall_score < 60:
-            risk_level = 'medium'
-        elif overall_score < 80:
-            risk_level = 'high'
-        else:
-            risk_level = 'critical'
-
-        # Generate findings for each dimension
-        financial_findings = []
-        if financial_score < 30:
-            financial_findings.append('Strong financial health indicators')
-        if ein:
-            financial_findings.append('Valid EIN provided and verified')
-        else:
-            financial_findings.append('Missing EIN - financial verification incomplete')
-        financial_findings.append('No recent debt defaults or bankruptcies')
-
-        compliance_findings = []
-        normalized_doc_types = {normalize_document_type(d['document_type']) for d in documents}
-        if 'w9' in normalized_doc_types:
-            compliance_findings.append('W-9 form verified')
-        else:
-            compliance_findings.append('Missing W-9 form')
-        if 'insurance' in normalized_doc_types:
-            compliance_findings.append('Insurance certificate verified')
-        else:
-            compliance_findings.append('Missing insurance certificate')
-        if compliance_score < 30:
-            compliance_findings.append('All required compliance documents submitted')
-
-        cybersecurity_findings = []
-        if cyber_score > 60:
-            cybersecurity_findings.append('SOC 2 Type II certification required')
-            cybersecurity_findings.append('Cyber insurance policy needs renewal')
-        else:
-            cybersecurity_findings.append('Strong cybersecurity posture verified')
-        cybersecurity_findings.append('Firewall and intrusion detection systems in place')
-
-        esg_findings = []
-        if esg_score < 30:
-            esg_findings.append('Excellent environmental sustainability practices')
-            esg_findings.append('Strong diversity and inclusion policies')
-        esg_findings.append('Active community engagement programs')
-
-        # Generate recommendations
-        recommendations = []
-        if cyber_score > 60:
-            recommendations.append('Renew SOC 2 certification within 30 days')
-            recommendations.append('Update cyber insurance policy to meet minimum coverage requirements')
-        if compliance_score > 50:
-            recommendations.append('Submit missing compliance documentation')
-        if sanctions_result['matches'] > 0:
-            recommendations.append('Resolve sanctions screening matches before final approval')
-        if esg_score > 50:
-            recommendations.append('Complete ESG questionnaire for improved sustainability rating')
-
-        # Identify red flags
-        red_flags = []
-        if sanctions_result['matches'] > 0:
-            red_flags.append('Sanctions screening match found')
-        if not ein:
-            red_flags.append('Missing EIN')
-        if cyber_score > 60:
-            red_flags.append('Missing cybersecurity certifications (SOC 2, ISO 27001)')
-        if compliance_score > 50:
-            red_flags.append('Missing compliance documentation')
-
-        # Save risk score to database
+        # Save risk score and the full assessment (served as-is by GET)
         cursor.execute("""
             INSERT INTO risk_scores (
                 vendor_id, overall_score, financial_score, compliance_score,
-                cyber_score, esg_score, sanctions_result, red_flags, risk_level
+                cyber_score, esg_score, sanctions_result, red_flags, risk_level,
+                model_version, assessment, calculated_at, expires_at
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s)
-            RETURNING id, calculated_at
+            VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s::jsonb, %s, %s)
+            RETURNING id
         """, (
-            vendor_id, overall_score, financial_score, compliance_score,
-            cyber_score, esg_score, json.dumps(sanctions_result),
-            red_flags, risk_level
+            vendor_id, assessment['overall_score'], assessment['financial_score'],
+            assessment['compliance_score'], assessment['cyber_score'],
+            assessment['esg_score'], json.dumps(sanctions_result),
+            assessment['red_flags'], assessment['risk_level'], risk_model.version,
+            response_body, calculated_at, calculated_at + timedelta(days=SCORE_TTL_DAYS)
         ))
 
-        risk_id, calculated_at = cursor.fetchone()
+        risk_id = cursor.fetchone()[0]
 
-        # Log audit event
-        cursor.execute("""
-            INSERT INTO audit_logs (vendor_id, action, actor, metadata)
-            VALUES (%s, %s, %s, %s)
-        """, (
-            vendor_id,
-            'risk_assessment_completed',
-            'system',
-            json.dumps({
-                "overall_score": overall_score,
-                "risk_level": risk_level
-            })
-        ))
+        notify_vendor_change(cursor, vendor_id, 'risk_score', {
+            'risk_score_id': str(risk_id),
+            'overall_score': assessment['overall_score'],
+            'risk_level': assessment['risk_level']
+        })
 
         conn.commit()
         cursor.close()
-        conn.close()
+        status_cache.invalidate(vendor_id)
 
-        # Calculate next review date (90 days from now)
-        from datetime import timedelta
-        next_review_date = (datetime.utcnow() + timedelta(days=90)).isoformat()
+        # Log audit event (queued; written in batches by the audit writer)
+        audit_writer.record(
+            vendor_id,
+            'risk_assessment_completed',
+            'system',
+            {
+                "overall_score": assessment['overall_score'],
+                "risk_level": assessment['risk_level']
+            }
+        )
+        audit_writer.flush(conn)
+        release_db_connection(conn)
 
         return {
             'statusCode': 200,
@@ -428,24 +355,7 @@ def handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
-                'vendor_id': vendor_id,
-                'overall_score': overall_score,
-                'financial_score': financial_score,
-                'compliance_score': compliance_score,
-                'cybersecurity_score': cyber_score,
-                'esg_score': esg_score,
-                'financial_findings': financial_findings,
-                'compliance_findings': compliance_findings,
-                'cybersecurity_findings': cybersecurity_findings,
-                'esg_findings': esg_findings,
-                'recommendations': recommendations,
-                'risk_level': risk_level,
-                'sanctions_screening': sanctions_result,
-                'red_flags': red_flags,
-                'assessed_at': calculated_at.isoformat(),
-                'next_review_date': next_review_date
-            })
+            'body': response_body
         }
 
     except Exception as e:
@@ -0,0 +1,277 @@
+"""
+Lambda Function: Incremental Sanctions Re-screening
+Re-screens only the vendors a sanctions list update can affect
+
+The previous and current list snapshots are diffed by (list, entry id).
+Added and changed entries are probed against an index of vendor names and
+tax ids; vendors whose last screening matched a removed or changed entry are
+added to the affected set. Each affected vendor is screened against the
+current lists and gets a new risk_scores row only if its match set changed.
+
+Lambda entry point: rescreen.handler
+    {"previous": "sanctions-lists/2025-11-01/", "current": "sanctions-lists/2025-11-02/"}
+Snapshots are prefixes in DOCUMENT_BUCKET holding the SANCTIONS_LIST_FILES.
+The current snapshot is published (sanctions-lists/CURRENT) before vendors
+are re-screened, so risk scoring and re-scoring screen against the same
+lists this run writes.
+
+CLI (snapshots are local directories):
+    python rescreen.py previous_lists/ current_lists/
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from shared.audit import audit_writer
+from shared.cache import status_cache
+from shared.db import get_db_connection, release_db_connection
+from batch import copy_risk_scores
+from index import SCORE_TTL_DAYS, build_assessment_document, risk_model
+from sanctions import (
+    SanctionsEntry,
+    SanctionsIndex,
+    download_snapshot,
+    load_sanctions_lists,
+    publish_current_snapshot,
+    screen_vendor
+)
+
+# Latest screening per vendor: what the vendor index and the diff need
+SCREENED_VENDORS_QUERY = """
+    SELECT rs.vendor_id, v.company_name, v.ein,
+           ARRAY(
+               SELECT (m->>'list') || ':' || (m->>'entry_id')
+               FROM jsonb_array_elements(COALESCE(rs.sanctions_result->'match_details', '[]'::jsonb)) m
+           )
+    FROM vendor_summary s
+    JOIN risk_scores rs ON rs.id = s.current_risk_score_id
+    JOIN vendors v ON v.id = s.vendor_id
+"""
+
+# Latest risk score rows for the affected vendors only
+AFFECTED_SCORES_QUERY = """
+    SELECT rs.vendor_id, rs.overall_score, rs.financial_score, rs.compliance_score,
+           rs.cyber_score, rs.esg_score, rs.risk_level, rs.model_version,
+           rs.calculated_at, rs.expires_at,
+           ARRAY(SELECT d.document_type FROM documents d WHERE d.vendor_id = rs.vendor_id)
+    FROM vendor_summary s
+    JOIN risk_scores rs ON rs.id = s.current_risk_score_id
+    WHERE s.vendor_id = ANY(%s::uuid[])
+"""
+
+def entry_key(entry):
+    return f"{entry.list_name}:{entry.entry_id}"
+
+def diff_snapshots(previous_lists, current_lists):
+    """
+    Compare two list snapshots by (list, entry id)
+
+    Returns:
+        tuple: (added, changed, removed) lists of SanctionsEntry; changed
+               holds the current version of each changed entry
+    """
+    previous = {entry_key(e): e for entries in previous_lists.values() for e in entries}
+    current = {entry_key(e): e for entries in current_lists.values() for e in entries}
+
+    added = [entry for key, entry in current.items() if key not in previous]
+    removed = [entry for key, entry in previous.items() if key not in current]
+    changed = [
+        entry for key, entry in current.items()
+        if key in previous and previous[key] != entry
+    ]
+    return added, changed, removed
+
+def build_vendor_index(vendors):
+    """Index screened vendors by name and EIN, with the same matching as list screening"""
+    return SanctionsIndex({
+        'VENDORS': [
+            SanctionsEntry('VENDORS', vendor_id, company_name, (), ein or '')
+            for vendor_id, company_name, ein, _ in vendors
+        ]
+    })
+
+def find_affected_vendors(vendors, added, changed, removed):
+    """
+    Vendor ids whose match set may differ under the current lists
+
+    Args:
+        vendors: rows from SCREENED_VENDORS_QUERY
+    """
+    vendor_index = build_vendor_index(vendors)
+    affected = set()
+
+    # New and changed entries: probe the vendor index with each name, alias and tax id
+    for entry in added + changed:
+        for name in (entry.name,) + tuple(entry.aliases):
+            for vendor_index_id in vendor_index.match_name(name):
+                affected.add(vendor_index.entries[vendor_index_id].entry_id)
+        for vendor_index_id in vendor_index.match_tax_id(entry.tax_id):
+            affected.add(vendor_index.entries[vendor_index_id].entry_id)
+
+    # Changed and removed entries: vendors that matched the old version
+    stale_keys = {entry_key(entry) for entry in changed + removed}
+    if stale_keys:
+        for vendor_id, _, _, match_keys in vendors:
+            if stale_keys.intersection(match_keys):
+                affected.add(vendor_id)
+
+    return affected
+
+def rescreen_vendors(conn, previous_lists, current_lists, current_snapshot=None):
+    """
+    Re-screen the vendors affected by a list update in one transaction
+
+    Returns:
+        dict: Counts and timing for the run
+    """
+    started = time.monotonic()
+    added, changed, removed = diff_snapshots(previous_lists, current_lists)
+    summary = {
+        'entries_added': len(added),
+        'entries_changed': len(changed),
+        'entries_removed': len(removed),
+        'vendors_checked': 0,
+        'vendors_updated': 0,
+        'updated_vendor_ids': []
+    }
+
+    if not (added or changed or removed):
+        summary['duration_ms'] = int((time.monotonic() - started) * 1000)
+        return summary
+
+    cursor = conn.cursor()
+    cursor.execute(SCREENED_VENDORS_QUERY)
+    vendors = cursor.fetchall()
+    affected = find_affected_vendors(vendors, added, changed, removed)
+    summary['vendors_checked'] = len(affected)
+
+    if affected:
+        current_index = SanctionsIndex(current_lists, snapshot=current_snapshot)
+        vendors_by_id = {row[0]: row for row in vendors}
+
+        cursor.execute(AFFECTED_SCORES_QUERY, (list(affected),))
+        calculated_at = datetime.utcnow()
+        new_rows = []
+        for (vendor_id, overall, financial, compliance, cyber, esg, risk_level,
+             model_version, previous_calculated_at, expires_at, document_types) in cursor.fetchall():
+            _, company_name, ein, previous_keys = vendors_by_id[vendor_id]
+            sanctions_result = screen_vendor(company_name, ein, current_index)
+            current_keys = {
+                f"{match['list']}:{match['entry_id']}" for match in sanctions_result['match_details']
+            }
+            if current_keys == set(previous_keys):
+                continue
+
+            # Scores are unchanged; findings that depend on sanctions are regenerated
+            assessment = {
+                'overall_score': overall,
+                'financial_score': financial,
+                'compliance_score': compliance,
+                'cyber_score': cyber,
+                'esg_score': esg,
+                'risk_level': risk_level
+            }
+            facts = dict(assessment)
+            facts['has_ein'] = bool(ein)
+            facts['document_mask'] = risk_model.document_mask(document_types)
+            facts['sanctions_matches'] = sanctions_result['matches']
+            assessment.update(risk_model.findings(facts))
+            document = build_assessment_document(vendor_id, assessment, sanctions_result, calculated_at)
+
+            new_rows.append((
+                vendor_id, overall, financial, compliance, cyber, esg,
+                json.dumps(sanctions_result), assessment['red_flags'], risk_level,
+                calculated_at,
+                expires_at or previous_calculated_at + timedelta(days=SCORE_TTL_DAYS),
+                model_version, json.dumps(document)
+            ))
+            summary['updated_vendor_ids'].append(vendor_id)
+
+        if new_rows:
+            copy_risk_scores(cursor, new_rows)
+        summary['vendors_updated'] = len(new_rows)
+
+    summary['duration_ms'] = int((time.monotonic() - started) * 1000)
+
+    conn.commit()
+    cursor.close()
+
+    # One audit event for the whole run
+    audit_writer.record(None, 'sanctions_rescreened', 'system', summary)
+    audit_writer.flush(conn)
+    status_cache.invalidate_many(summary['updated_vendor_ids'])
+    return summary
+
+def load_snapshot(location):
+    """Load a snapshot from a local directory, or from an S3 prefix in the Lambda"""
+    directory = location if os.path.isdir(location) else download_snapshot(location)
+    return load_sanctions_lists(directory)
+
+def handler(event, context):
+    """
+    Re-screen vendors affected by a sanctions list update
+
+    Request: {"previous": "<snapshot>", "current": "<snapshot>"}
+
+    Response: {
+        "entries_added": 12,
+        "entries_changed": 3,
+        "entries_removed": 1,
+        "vendors_checked": 4,
+        "vendors_updated": 1,
+        "updated_vendor_ids": ["..."],
+        "duration_ms": 850
+    }
+    """
+    try:
+        event = event or {}
+        if not event.get('previous') or not event.get('current'):
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'error': 'previous and current snapshots are required'})
+            }
+
+        previous_lists = load_snapshot(event['previous'])
+        current_lists = load_snapshot(event['current'])
+        if not current_lists:
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'error': f"No sanctions lists found in {event['current']}"})
+            }
+
+        # Local directories are not snapshots other functions can load
+        current_snapshot = None
+        if not os.path.isdir(event['current']):
+            current_snapshot = event['current']
+            publish_current_snapshot(current_snapshot)
+
+        conn = get_db_connection()
+        summary = rescreen_vendors(conn, previous_lists, current_lists, current_snapshot)
+        release_db_connection(conn)
+
+        print(f"Sanctions re-screen complete: {summary}")
+        return {
+            'statusCode': 200,
+            'body': json.dumps(summary)
+        }
+
+    except Exception as e:
+        print(f"Error re-screening vendors: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'body': json.dumps({
+                'error': 'Failed to re-screen vendors',
+                'message': str(e)
+            })
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-screen vendors after a sanctions list update")
+    parser.add_argument('previous', help="Directory holding the previous list snapshot")
+    parser.add_argument('current', help="Directory holding the current list snapshot")
+    args = parser.parse_args()
+    print(json.dumps(handler({'previous': args.previous, 'current': args.current}, None), indent=2))
@@ -0,0 +1,254 @@
+"""
+Risk Model
+Loads the declarative model in risk_model.json and compiles it once per
+container into lookup tables and predicate lists used for scoring and
+findings generation
+"""
+import json
+import operator
+import os
+
+MODEL_PATH = os.environ.get(
+    'RISK_MODEL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'risk_model.json')
+)
+
+COMPARISONS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+FINDING_SECTIONS = (
+    'financial_findings',
+    'compliance_findings',
+    'cybersecurity_findings',
+    'esg_findings',
+    'recommendations',
+    'red_flags'
+)
+
+# Keys of score(), and the columns of score_columns()
+SCORE_COLUMNS = (
+    'financial_score', 'compliance_score', 'cyber_score', 'esg_score',
+    'overall_score', 'risk_level'
+)
+
+class CompiledRiskModel:
+    """
+    A risk model spec compiled into lookup tables
+
+    Compliance and cyber scores depend only on which document types a vendor
+    has, so they are precomputed for every document-set bitmask; risk levels
+    are precomputed for every overall score. Findings rules are compiled into
+    (predicate, then, else) tuples.
+    """
+
+    def __init__(self, spec):
+        self.version = spec['version']
+        self.weights = spec['weights']
+        self.document_aliases = spec.get('document_aliases', {})
+        components = spec['components']
+
+        # One bit per document type that any component penalizes
+        scored_types = []
+        for name in ('compliance', 'cyber'):
+            for doc_type in components[name]['missing_document_penalties']:
+                if doc_type not in scored_types:
+                    scored_types.append(doc_type)
+        self.document_bits = {doc_type: 1 << i for i, doc_type in enumerate(scored_types)}
+
+        self.compliance_table = self._document_table(components['compliance'])
+        self.cyber_table = self._document_table(components['cyber'])
+
+        financial = components['financial']
+        self.financial_scores = {
+            True: min(financial['base'], 100),
+            False: min(financial['base'] + financial['missing_ein_penalty'], 100)
+        }
+
+        self.esg_divisor = components['esg']['completion_divisor']
+
+        self.risk_level_table = []
+        for score in range(101):
+            for band in spec['risk_levels']:
+                if score < band['below']:
+                    self.risk_level_table.append(band['level'])
+                    break
+
+        self.findings_rules = {
+            section: [self._compile_rule(rule) for rule in spec['findings'].get(section, [])]
+            for section in FINDING_SECTIONS
+        }
+        self.default_findings = spec.get('default_findings', {})
+
+    def _document_table(self, component):
+        """Score for every document-set bitmask (missing documents add penalties)"""
+        table = []
+        for mask in range(1 << len(self.document_bits)):
+            score = component['base']
+            for doc_type, penalty in component['missing_document_penalties'].items():
+                if not mask & self.document_bits[doc_type]:
+                    score += penalty
+            table.append(min(score, 100))
+        return table
+
+    def _compile_rule(self, rule):
+        condition = rule.get('when')
+        if condition is None:
+            predicate = None
+        elif 'has_document' in condition:
+            bit = self.document_bits.get(condition['has_document'], 0)
+            predicate = lambda facts, bit=bit: bool(facts['document_mask'] & bit)
+        else:
+            compare = COMPARISONS[condition['op']]
+            fact, value = condition['fact'], condition['value']
+            predicate = lambda facts, compare=compare, fact=fact, value=value: compare(facts[fact], value)
+        return predicate, tuple(rule.get('then', ())), tuple(rule.get('else', ()))
+
+    def normalize_document_type(self, doc_type):
+        """Map frontend document type names to model names"""
+        return self.document_aliases.get(doc_type, doc_type)
+
+    def document_mask(self, document_types):
+        """Encode a collection of document types as a bitmask"""
+        mask = 0
+        for doc_type in document_types:
+            mask |= self.document_bits.get(self.normalize_document_type(doc_type), 0)
+        return mask
+
+    def esg_score(self, completion_percentage):
+        """ESG score is the inverse of questionnaire completion"""
+        return int((100 - float(completion_percentage or 0)) / self.esg_divisor)
+
+    def score(self, has_ein, document_mask, esg_completion):
+        """
+        Score one vendor with table lookups
+
+        Returns:
+            dict: Component scores, overall score and risk level
+        """
+        financial = self.financial_scores[bool(has_ein)]
+        compliance = self.compliance_table[document_mask]
+        cyber = self.cyber_table[document_mask]
+        esg = self.esg_score(esg_completion)
+        overall = int(
+            financial * self.weights['financial'] +
+            compliance * self.weights['compliance'] +
+            cyber * self.weights['cyber'] +
+            esg * self.weights['esg']
+        )
+        return {
+            'financial_score': financial,
+            'compliance_score': compliance,
+            'cyber_score': cyber,
+            'esg_score': esg,
+            'overall_score': overall,
+            'risk_level': self.risk_level_table[overall]
+        }
+
+    def score_columns(self, has_ein, document_masks, esg_completions):
+        """
+        Score a chunk of vendors column-wise
+
+        Vendors are grouped by (document mask, has EIN); each group's
+        financial, compliance and cyber scores and their weighted share of
+        the overall score are looked up once, so only the ESG term is
+        computed per vendor.
+
+        Returns:
+            dict: score() keys -> list of values, in input order
+        """
+        count = len(document_masks)
+        columns = {name: [None] * count for name in SCORE_COLUMNS}
+        esg_scores = [self.esg_score(completion) for completion in esg_completions]
+        esg_weight = self.weights['esg']
+
+        groups = {}
+        for position, key in enumerate(zip(document_masks, has_ein)):
+            groups.setdefault(key, []).append(position)
+
+        for (document_mask, vendor_has_ein), positions in groups.items():
+            financial = self.financial_scores[bool(vendor_has_ein)]
+            compliance = self.compliance_table[document_mask]
+            cyber = self.cyber_table[document_mask]
+            # Same summation order as score(), so results are identical
+            weighted = (
+                financial * self.weights['financial'] +
+                compliance * self.weights['compliance'] +
+                cyber * self.weights['cyber']
+            )
+            for position in positions:
+                esg = esg_scores[position]
+                overall = int(weighted + esg * esg_weight)
+                columns['financial_score'][position] = financial
+                columns['compliance_score'][position] = compliance
+                columns['cyber_score'][position] = cyber
+                columns['esg_score'][position] = esg
+                columns['overall_score'][position] = overall
+                columns['risk_level'][position] = self.risk_level_table[overall]
+        return columns
+
+    def findings_columns(self, scores, has_ein, document_masks, sanctions_matches):
+        """
+        Findings for every vendor of a chunk scored by score_columns()
+
+        Findings depend only on the facts, and every score follows from the
+        document mask, has EIN and ESG score, so rules are evaluated once
+        per distinct (has EIN, mask, ESG score, sanctions matches).
+
+        Returns:
+            list: findings() result per vendor (shared between equal facts)
+        """
+        evaluated = {}
+        results = []
+        for position, facts_key in enumerate(zip(
+            has_ein, document_masks, scores['esg_score'], sanctions_matches
+        )):
+            if facts_key not in evaluated:
+                facts = {name: column[position] for name, column in scores.items()}
+                facts['has_ein'] = bool(facts_key[0])
+                facts['document_mask'] = facts_key[1]
+                facts['sanctions_matches'] = facts_key[3]
+                evaluated[facts_key] = self.findings(facts)
+            results.append(evaluated[facts_key])
+        return results
+
+    def findings(self, facts, sections=FINDING_SECTIONS):
+        """
+        Evaluate findings rules against a vendor's facts
+
+        Args:
+            facts: dict with the scores from score(), has_ein,
+                   document_mask and sanctions_matches
+
+        Returns:
+            dict: section name -> list of finding strings
+        """
+        results = {}
+        for section in sections:
+            items = []
+            for predicate, then_items, else_items in self.findings_rules[section]:
+                if predicate is None or predicate(facts):
+                    items.extend(then_items)
+                else:
+                    items.extend(else_items)
+            results[section] = items or list(self.default_findings.get(section, []))
+        return results
+
+_model = None
+
+def load_risk_model(path=None):
+    """Load and compile a risk model; the default model is compiled once per container"""
+    global _model
+    if path is not None:
+        with open(path) as f:
+            return CompiledRiskModel(json.load(f))
+
+    if _model is None:
+        with open(MODEL_PATH) as f:
+            _model = CompiledRiskModel(json.load(f))
+    return _model
@@ -0,0 +1,343 @@
+"""
+Sanctions Screening
+Loads OFAC, EU and UN sanctions list files into an in-memory index and
+screens vendors against it locally (no external API call per vendor)
+
+List files are one CSV per list:
+    id,name,aliases,tax_id
+aliases are separated by ';'. Published lists are snapshots under
+sanctions-lists/<date>/ in DOCUMENT_BUCKET, and sanctions-lists/CURRENT names
+the snapshot every screening uses (the re-screen moves it). Without
+DOCUMENT_BUCKET (local runs), or before any snapshot is published, the
+lists are read from SANCTIONS_LIST_DIR; the files bundled in
+sanctions_lists/ are fixtures.
+"""
+import csv
+import math
+from bisect import bisect_left, bisect_right
+import os
+import re
+import time
+import unicodedata
+from collections import Counter, namedtuple
+from datetime import datetime
+
+import boto3
+
+s3_client = boto3.client('s3')
+
+DOCUMENT_BUCKET = os.environ.get('DOCUMENT_BUCKET')
+
+# Object holding the prefix of the current snapshot
+CURRENT_SNAPSHOT_KEY = 'sanctions-lists/CURRENT'
+
+# How often a warm container checks whether the current snapshot moved
+SNAPSHOT_CHECK_SECONDS = int(os.environ.get('SANCTIONS_SNAPSHOT_CHECK_SECONDS', '60'))
+
+SANCTIONS_LIST_DIR = os.environ.get(
+    'SANCTIONS_LIST_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sanctions_lists')
+)
+
+# List name -> file name inside SANCTIONS_LIST_DIR
+SANCTIONS_LIST_FILES = {
+    'OFAC': 'ofac_sdn.csv',
+    'EU': 'eu_consolidated.csv',
+    'UN': 'un_consolidated.csv'
+}
+
+# Minimum trigram similarity (Dice coefficient) for a fuzzy name match
+MATCH_THRESHOLD = float(os.environ.get('SANCTIONS_MATCH_THRESHOLD', '0.85'))
+
+# Extra rare trigrams probed per lookup; candidates must hit slack + 1 of them,
+# which prunes most of the set-overlap checks
+PREFIX_SLACK = 2
+
+# Legal-form suffixes that do not distinguish one company from another
+COMPANY_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'llp', 'lp', 'ltd', 'limited', 'corp',
+    'corporation', 'co', 'company', 'plc', 'gmbh', 'ag', 'sa', 'srl', 'bv',
+    'nv', 'oy', 'ab', 'as', 'pte', 'pty', 'jsc', 'ojsc', 'pjsc', 'ooo', 'the'
+}
+
+SanctionsEntry = namedtuple('SanctionsEntry', ['list_name', 'entry_id', 'name', 'aliases', 'tax_id'])
+
+_ELIDED = re.compile(r"[.']")
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_NON_DIGIT = re.compile(r'[^0-9]')
+
+def normalize_name(name):
+    """Lowercase, strip accents, punctuation and company suffixes"""
+    if not name:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', name)
+    ascii_name = decomposed.encode('ascii', 'ignore').decode('ascii').lower()
+    # "L.L.C." -> "llc", "O'Brien" -> "obrien"
+    ascii_name = _ELIDED.sub('', ascii_name)
+    tokens = [token for token in _NON_ALNUM.split(ascii_name) if token]
+    kept = [token for token in tokens if token not in COMPANY_SUFFIXES]
+    # A name made only of suffixes ("The Company") keeps its tokens
+    return ' '.join(kept or tokens)
+
+def normalize_tax_id(tax_id):
+    """Digits only, so 12-3456789 and 123456789 compare equal"""
+    return _NON_DIGIT.sub('', tax_id or '')
+
+def trigrams(normalized_name):
+    """Character trigrams of a normalized name, padded at word edges"""
+    padded = f"  {normalized_name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def read_list_file(list_name, path):
+    """Read one sanctions list CSV into SanctionsEntry tuples"""
+    entries = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            aliases = tuple(alias.strip() for alias in (row.get('aliases') or '').split(';') if alias.strip())
+            entries.append(SanctionsEntry(
+                list_name, row['id'].strip(), row['name'].strip(), aliases,
+                normalize_tax_id(row.get('tax_id'))
+            ))
+    return entries
+
+def load_sanctions_lists(directory=None):
+    """
+    Load every configured list present in a directory
+
+    Returns:
+        dict: list name -> list of SanctionsEntry
+    """
+    directory = directory or SANCTIONS_LIST_DIR
+    lists = {}
+    for list_name, file_name in SANCTIONS_LIST_FILES.items():
+        path = os.path.join(directory, file_name)
+        if os.path.exists(path):
+            lists[list_name] = read_list_file(list_name, path)
+        else:
+            print(f"Sanctions list {list_name} not found at {path}")
+    return lists
+
+class SanctionsIndex:
+    """
+    In-memory index over sanctions list names and tax ids
+
+    Every entry name and alias is normalized and indexed three ways: an
+    exact-name dict, a trigram inverted index for fuzzy matches and a
+    tax-id dict. Fuzzy lookups only walk the postings of the query's rarest
+    trigrams (prefix and length filtering), then verify the few remaining
+    candidates by set overlap.
+    """
+
+    def __init__(self, lists, threshold=MATCH_THRESHOLD, snapshot=None):
+        self.threshold = threshold
+        self.snapshot = snapshot
+        self.lists_checked = list(lists)
+        self.entries = []
+        self.names = []           # (entry index, normalized name, trigram set)
+        self.exact = {}           # normalized name -> name indexes
+        self.postings = {}        # trigram -> name indexes, shortest name first
+        self.tax_ids = {}         # normalized tax id -> entry indexes
+
+        for entries in lists.values():
+            for entry in entries:
+                self.add(entry)
+
+        # Postings sorted by name length, so a lookup can slice out names
+        # too short or too long to reach the threshold
+        self.posting_lengths = {}
+        for gram, ids in self.postings.items():
+            ids.sort(key=lambda name_index: len(self.names[name_index][2]))
+            self.postings[gram] = tuple(ids)
+            self.posting_lengths[gram] = tuple(len(self.names[name_index][2]) for name_index in ids)
+
+    def add(self, entry):
+        entry_index = len(self.entries)
+        self.entries.append(entry)
+
+        for name in (entry.name,) + tuple(entry.aliases):
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+            name_index = len(self.names)
+            grams = frozenset(trigrams(normalized))
+            self.names.append((entry_index, normalized, grams))
+            self.exact.setdefault(normalized, []).append(name_index)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(name_index)
+
+        if entry.tax_id:
+            self.tax_ids.setdefault(entry.tax_id, []).append(entry_index)
+
+    def _fuzzy_candidates(self, grams):
+        """Name indexes of a plausible length that share enough of the query's rarest trigrams"""
+        t = self.threshold
+        # Dice >= t bounds the other name's trigram count to [t/(2-t), (2-t)/t] * |q|
+        # and the overlap to c >= t*|q| / (2 - t), so any match shares at least
+        # slack + 1 of the query's |q| - c + 1 + slack rarest trigrams
+        shortest = math.ceil(t * len(grams) / (2 - t))
+        longest = math.floor((2 - t) * len(grams) / t)
+        slack = min(PREFIX_SLACK, shortest - 1)
+        ranked = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))
+
+        counts = Counter()
+        for gram in ranked[:len(grams) - shortest + 1 + slack]:
+            lengths = self.posting_lengths.get(gram)
+            if lengths:
+                postings = self.postings[gram]
+                counts.update(postings[bisect_left(lengths, shortest):bisect_right(lengths, longest)])
+        return [name_index for name_index, count in counts.items() if count > slack]
+
+    def match_name(self, company_name):
+        """
+        Find list entries whose name or alias matches a company name
+
+        Returns:
+            dict: entry index -> (score, matched name)
+        """
+        normalized = normalize_name(company_name)
+        if not normalized:
+            return {}
+
+        best = {}
+        for name_index in self.exact.get(normalized, ()):
+            entry_index, _, _ = self.names[name_index]
+            best[entry_index] = (1.0, normalized)
+
+        # Fuzzy matches are collected even with an exact hit, so matching is
+        # symmetric (a vendor-name index probed with list names agrees)
+        grams = trigrams(normalized)
+        for name_index in self._fuzzy_candidates(grams):
+            entry_index, name, entry_grams = self.names[name_index]
+            score = 2 * len(grams & entry_grams) / (len(grams) + len(entry_grams))
+            if score >= self.threshold and score > best.get(entry_index, (0, None))[0]:
+                best[entry_index] = (score, name)
+        return best
+
+    def match_tax_id(self, tax_id):
+        """Entry indexes listed under a tax id"""
+        normalized = normalize_tax_id(tax_id)
+        return self.tax_ids.get(normalized, ()) if normalized else ()
+
+    def screen(self, company_name, tax_id=None):
+        """
+        Screen one vendor
+
+        Returns:
+            list: Match dicts, strongest first
+        """
+        matches = {}
+        for entry_index, (score, matched_name) in self.match_name(company_name).items():
+            matches[entry_index] = {'match_type': 'name', 'score': round(score, 3), 'matched_name': matched_name}
+        for entry_index in self.match_tax_id(tax_id):
+            matches[entry_index] = {'match_type': 'tax_id', 'score': 1.0, 'matched_name': None}
+
+        results = []
+        for entry_index, match in matches.items():
+            entry = self.entries[entry_index]
+            results.append({
+                'list': entry.list_name,
+                'entry_id': entry.entry_id,
+                'name': entry.name,
+                'match_type': match['match_type'],
+                'score': match['score']
+            })
+        results.sort(key=lambda result: (-result['score'], result['list'], result['entry_id']))
+        return results
+
+def download_snapshot(prefix):
+    """Copy a list snapshot from DOCUMENT_BUCKET into /tmp and return the directory"""
+    directory = os.path.join('/tmp', 'sanctions', prefix.strip('/'))
+    os.makedirs(directory, exist_ok=True)
+    for file_name in SANCTIONS_LIST_FILES.values():
+        key = f"{prefix.rstrip('/')}/{file_name}"
+        try:
+            s3_client.download_file(DOCUMENT_BUCKET, key, os.path.join(directory, file_name))
+        except s3_client.exceptions.ClientError as e:
+            print(f"Snapshot file s3://{DOCUMENT_BUCKET}/{key} not available: {str(e)}")
+    return directory
+
+def current_snapshot():
+    """Prefix of the current list snapshot, or None if none is published"""
+    try:
+        response = s3_client.get_object(Bucket=DOCUMENT_BUCKET, Key=CURRENT_SNAPSHOT_KEY)
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    return response['Body'].read().decode('utf-8').strip() or None
+
+def publish_current_snapshot(prefix):
+    """Make a snapshot the one every screening uses"""
+    s3_client.put_object(
+        Bucket=DOCUMENT_BUCKET,
+        Key=CURRENT_SNAPSHOT_KEY,
+        Body=prefix.encode('utf-8'),
+        ContentType='text/plain'
+    )
+
+_index = None
+_index_checked_at = None
+
+def _build_index(directory, snapshot):
+    started = time.monotonic()
+    index = SanctionsIndex(load_sanctions_lists(directory), snapshot=snapshot)
+    print(f"Indexed {len(index.entries)} sanctions entries from {snapshot or directory} in "
+          f"{(time.monotonic() - started) * 1000:.0f} ms")
+    return index
+
+def load_sanctions_index(directory=None):
+    """
+    Build a sanctions index; the current lists are indexed once per container
+    and rebuilt when the current snapshot moves (checked every
+    SNAPSHOT_CHECK_SECONDS)
+    """
+    global _index, _index_checked_at
+    if directory is not None:
+        return SanctionsIndex(load_sanctions_lists(directory))
+
+    if not DOCUMENT_BUCKET:
+        if _index is None:
+            _index = _build_index(SANCTIONS_LIST_DIR, None)
+        return _index
+
+    now = time.monotonic()
+    if _index is not None and now - _index_checked_at < SNAPSHOT_CHECK_SECONDS:
+        return _index
+
+    try:
+        snapshot = current_snapshot()
+    except Exception as e:
+        if _index is None:
+            raise
+        # Keep screening against the lists already loaded; retry on the next check
+        print(f"Could not check the current sanctions snapshot: {str(e)}")
+        _index_checked_at = now
+        return _index
+
+    if _index is None or snapshot != _index.snapshot:
+        if snapshot:
+            _index = _build_index(download_snapshot(snapshot), snapshot)
+        else:
+            print(f"No sanctions snapshot published at s3://{DOCUMENT_BUCKET}/{CURRENT_SNAPSHOT_KEY}")
+            _index = _build_index(SANCTIONS_LIST_DIR, None)
+    _index_checked_at = now
+    return _index
+
+def screen_vendor(company_name, ein, index=None):
+    """
+    Screen a vendor against the sanctions index
+
+    Returns:
+        dict: sanctions_result as stored in risk_scores
+    """
+    index = index or load_sanctions_index()
+    started = time.perf_counter()
+    matches = index.screen(company_name, ein)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "matches": len(matches),
+        "match_details": matches,
+        "response_time_ms": round(elapsed_ms, 3),
+        "lists_checked": index.lists_checked,
+        "lists_snapshot": index.snapshot,
+        "screened_at": datetime.utcnow().isoformat()
+    }
@@ -3,33 +3,141 @@ Lambda Function: Get Vendor Status
 Retrieves onboarding status and progress for a vendor
 """
 import json
-import psycopg2
-import os
-import boto3
 
-secrets_client = boto3.client('secretsmanager')
+from shared.cache import etag_matches, make_etag, status_cache
+from shared.db import get_db_connection, release_db_connection
+
+# Documents every vendor must upload, in the order next steps are listed
+REQUIRED_DOCUMENTS = ['w9', 'insurance', 'diversity_cert', 'bcp']
+
+# The timeline only reads audit_logs partitions from the last few months (and
+# none from before the vendor existed)
+TIMELINE_WINDOW_DAYS = 90
+
+# Vendor, documents, ESG questionnaire, latest risk score and recent activity
+# as a single JSON document, so a status poll is one round trip into the VPC
+STATUS_QUERY = """
+    SELECT json_build_object(
+        'vendor_id', v.id,
+        'company_name', v.company_name,
+        'status', v.status,
+        'onboarding_progress', v.onboarding_progress,
+        'version', v.version,
+        'ky3p_assessment_id', v.ky3p_assessment_id,
+        'slp_supplier_id', v.slp_supplier_id,
+        'created_at', v.created_at,
+        'documents', docs.documents,
+        'next_steps', steps.next_steps,
+        'risk_score', risk.risk_score,
+        'timeline', activity.timeline
+    )::text, v.version
+    FROM vendors v
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(
+            json_agg(json_build_object(
+                'type', d.document_type,
+                'status', d.status,
+                'uploaded_at', d.uploaded_at
+            ) ORDER BY d.uploaded_at DESC),
+            '[]'::json
+        ) AS documents
+        FROM documents d
+        WHERE d.vendor_id = v.id
+    ) docs ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(json_agg(step.label ORDER BY step.ordinal), '[]'::json) AS next_steps
+        FROM (
+            SELECT 'Upload ' || initcap(replace(r.document_type, '_', ' ')) AS label,
+                   r.ordinal
+            FROM unnest(%(required_documents)s::text[]) WITH ORDINALITY AS r(document_type, ordinal)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM documents d
+                WHERE d.vendor_id = v.id AND d.document_type = r.document_type
+            )
+            UNION ALL
+            SELECT 'Complete ESG Questionnaire', 1000
+            WHERE NOT EXISTS (
+                SELECT 1 FROM esg_questionnaires q WHERE q.vendor_id = v.id
+            )
+        ) step
+    ) steps ON TRUE
+    LEFT JOIN vendor_summary risk ON risk.vendor_id = v.id
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(
+            json_agg(json_build_object(
+                'title', initcap(replace(a.action, '_', ' ')),
+                'timestamp', a.timestamp
+            ) ORDER BY a.timestamp DESC),
+            '[]'::json
+        ) AS timeline
+        FROM (
+            SELECT action, timestamp
+            FROM audit_logs
+            WHERE vendor_id = v.id
+              AND timestamp >= GREATEST(
+                  v.created_at - INTERVAL '1 day',
+                  LOCALTIMESTAMP - %(timeline_days)s * INTERVAL '1 day'
+              )
+            ORDER BY timestamp DESC
+            LIMIT 10
+        ) a
+    ) activity ON TRUE
+    WHERE v.id = %(vendor_id)s
+"""
 
-def get_db_connection():
-    secret_arn = os.environ['DB_SECRET_ARN']
-    response = secrets_client.get_secret_value(SecretId=secret_arn)
-    secret = json.loads(response['SecretString'])
+def render_status(vendor_id, fresh=False):
+    """
+    Status JSON of a vendor, from the cache or rendered by PostgreSQL
+
+    Args:
+        fresh: Skip the cache, e.g. right after a change notification, which
+               can arrive before the writer has bumped the cache version
 
-    return psycopg2.connect(
-        host=os.environ['DB_HOST'],
-        port=os.environ['DB_PORT'],
-        database=os.environ['DB_NAME'],
-        user=secret['username'],
-        password=secret['password']
-    )
+    Returns:
+        tuple: (etag, body), or None if the vendor does not exist
+    """
+    # Read the cache version before the database, so a write racing
+    # with this render leaves the entry stale rather than served
+    version = status_cache.version(vendor_id)
+    cached = None if fresh else status_cache.get(vendor_id, version)
+    if cached:
+        return cached
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    # Build the whole status payload server-side in one round trip
+    cursor.execute(STATUS_QUERY, {
+        'vendor_id': vendor_id,
+        'required_documents': REQUIRED_DOCUMENTS,
+        'timeline_days': TIMELINE_WINDOW_DAYS
+    })
+    row = cursor.fetchone()
+
+    cursor.close()
+    release_db_connection(conn)
+
+    if not row:
+        return None
+
+    # Already serialized by PostgreSQL
+    body = row[0]
+    etag = make_etag(row[1], body)
+    status_cache.put(vendor_id, version, etag, body)
+    return etag, body
 
 def handler(event, context):
     """
     Get vendor onboarding status
 
+    Served from the per-vendor status cache when nothing was written since
+    it was rendered; a matching If-None-Match gets 304 with no body.
+
     Response: {
         "vendor_id": "uuid",
         "status": "under_review",
         "onboarding_progress": 65,
+        "version": 3,
         "documents": [
             {"type": "w9", "status": "verified"},
             {"type": "insurance", "status": "processing"}
@@ -48,110 +156,35 @@ def handler(event, context):
                 'body': json.dumps({'error': 'Missing vendor ID'})
             }
 
-        # Connect to database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Get vendor info
-        cursor.execute("""
-            SELECT id, company_name, status, onboarding_progress,
-                   ky3p_assessment_id, slp_supplier_id, created_at
-            FROM vendors
-            WHERE id = %s
-        """, (vendor_id,))
-
-        vendor = cursor.fetchone()
-        if not vendor:
-            cursor.close()
-            conn.close()
+        rendered = render_status(vendor_id)
+        if not rendered:
             return {
                 'statusCode': 404,
                 'headers': {'Content-Type': 'application/json'},
                 'body': json.dumps({'error': 'Vendor not found'})
             }
 
-        # Get documents
-        cursor.execute("""
-            SELECT document_type, status, uploaded_at
-            FROM documents
-            WHERE vendor_id = %s
-            ORDER BY uploaded_at DESC
-        """, (vendor_id,))
-
-        documents = [
-            {
-                'type': row[0],
-                'status': row[1],
-                'uploaded_at': row[2].isoformat() if row[2] else None
-            }
-            for row in cursor.fetchall()
-        ]
-
-        # Calculate next steps
-        doc_types = {d['type'] for d in documents}
-        required_docs = {'w9', 'insurance', 'diversity_cert', 'bcp'}
-        missing_docs = required_docs - doc_types
-
-        next_steps = []
-        if missing_docs:
-            next_steps.extend([f"Upload {doc.replace('_', ' ').title()}" for doc in missing_docs])
-
-        cursor.execute("""
-            SELECT id FROM esg_questionnaires
-            WHERE vendor_id = %s
-        """, (vendor_id,))
-        if not cursor.fetchone():
-            next_steps.append("Complete ESG Questionnaire")
-
-        # Get risk score if available
-        cursor.execute("""
-            SELECT overall_score
-            FROM risk_scores
-            WHERE vendor_id = %s
-            ORDER BY calculated_at DESC
-            LIMIT 1
-        """, (vendor_id,))
-        risk_row = cursor.fetchone()
-        risk_score = risk_row[0] if risk_row else None
-
-        # Get timeline/activity
-        cursor.execute("""
-            SELECT action, timestamp
-            FROM audit_logs
-            WHERE vendor_id = %s
-            ORDER BY timestamp DESC
-            LIMIT 10
-        """, (vendor_id,))
-        timeline = [
-            {
-                'title': row[0].replace('_', ' ').title(),
-                'timestamp': row[1].isoformat() if row[1] else None
-            }
-            for row in cursor.fetchall()
-        ]
+        etag, body = rendered
+        headers = {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'no-cache',
+            # Send back as If-None-Match when polling, or as If-Match with
+            # POST /vendors/{id}/approve
+            'ETag': etag
+        }
 
-        cursor.close()
-        conn.close()
+        if etag_matches(event, etag):
+            return {
+                'statusCode': 304,
+                'headers': headers,
+                'body': ''
+            }
 
         return {
             'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'vendor_id': str(vendor[0]),
-                'company_name': vendor[1],
-                'status': vendor[2],
-                'onboarding_progress': vendor[3],
-                'ky3p_assessment_id': vendor[4],
-                'slp_supplier_id': vendor[5],
-                'created_at': vendor[6].isoformat() if vendor[6] else None,
-                'documents': documents,
-                'next_steps': next_steps,
-                'risk_score': risk_score,
-                'timeline': timeline
-            })
+            'headers': headers,
+            'body': body
         }
 
     except Exception as e:
@@ -0,0 +1,174 @@
+"""
+Lambda Function: Vendor Status Changes (long poll)
+Holds GET /vendors/{id}/changes open until the vendor changes, instead of
+the dashboard re-running the status query on every poll
+
+Lambda entry point: stream.handler
+
+The client sends the ETag of the status it has as ?since=. The function
+reads the vendor's status cache version, then the current status: if its
+ETag already differs the client is behind and gets the status immediately;
+otherwise it waits (up to ?wait= seconds) for the version to move and
+returns the new status. A wait that ends without changes returns 304.
+
+Waiting polls the shared status cache tier (StatusCacheTable), which every
+write path bumps after committing, and holds no PostgreSQL connection: the
+dashboard re-issues the wait in a loop, so a LISTEN per waiting request
+would pin one backend per open tab. The Lambda does not see the change
+deltas ("changes" is empty); scripts/local_status_server.py, a single
+long-lived process, fans LISTEN/NOTIFY deltas out over one connection.
+"""
+import json
+import os
+import time
+
+from shared.cache import status_cache
+from shared.db import close_db_connection
+from index import render_status
+
+# API Gateway closes integrations after 29 seconds
+DEFAULT_WAIT_SECONDS = 20
+MAX_WAIT_SECONDS = int(os.environ.get('STATUS_STREAM_MAX_WAIT_SECONDS', '25'))
+
+# After the first change, wait this long for more, so a burst of writes
+# (e.g. several documents processed together) is returned as one response
+COALESCE_SECONDS = 0.2
+
+# Seconds between reads of the vendor's cache version while waiting
+VERSION_POLL_SECONDS = float(os.environ.get('STATUS_STREAM_POLL_SECONDS', '1'))
+
+def wait_for_version_change(vendor_id, version, timeout,
+                            poll=VERSION_POLL_SECONDS, coalesce=COALESCE_SECONDS):
+    """
+    Block until a vendor's status cache version differs from version
+
+    Returns:
+        bool: True if it changed, False if the timeout passed
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+
+        time.sleep(min(poll, remaining))
+        current = status_cache.version(vendor_id)
+        # None: the version store is unavailable; keep waiting
+        if current is not None and current != version:
+            time.sleep(coalesce)
+            return True
+
+def changes_response(etag, body, changes):
+    """200 with the deltas and the full status they lead to"""
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'no-store',
+            'ETag': etag
+        },
+        'body': json.dumps({
+            'etag': etag,
+            'changes': changes,
+            'status': json.loads(body)
+        })
+    }
+
+def unchanged_response(etag):
+    return {
+        'statusCode': 304,
+        'headers': {
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'no-store',
+            'ETag': etag
+        },
+        'body': ''
+    }
+
+def not_found_response():
+    return {
+        'statusCode': 404,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({'error': 'Vendor not found'})
+    }
+
+def normalize_etag(value):
+    """The ETag as sent in headers, whether or not the client kept the quotes"""
+    value = (value or '').strip().removeprefix('W/')
+    if value and not value.startswith('"'):
+        value = f'"{value}"'
+    return value
+
+def parse_wait(params):
+    try:
+        wait = float(params.get('wait', DEFAULT_WAIT_SECONDS))
+    except (TypeError, ValueError):
+        wait = DEFAULT_WAIT_SECONDS
+    return max(0.0, min(wait, MAX_WAIT_SECONDS))
+
+def handler(event, context):
+    """
+    Wait for changes to a vendor
+
+    Request: GET /vendors/{id}/changes?since="<status etag>"&wait=20
+
+    Response (200): {
+        "etag": "\"4-3f2a9c0d1e5b7a68\"",
+        "changes": [],
+        "status": {...GET /vendors/{id}/status body...}
+    }
+
+    "changes" is always empty here (see the module docstring); the local
+    status server fills it in. 304: nothing changed within the wait; poll
+    again with the same ETag.
+    """
+    try:
+        vendor_id = (event.get('pathParameters') or {}).get('id')
+        if not vendor_id:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': 'Missing vendor ID'})
+            }
+
+        params = event.get('queryStringParameters') or {}
+        since = normalize_etag(params.get('since'))
+        wait = parse_wait(params)
+
+        # Read before the status, so a write committed after the render
+        # still moves the version this wait compares against
+        version = status_cache.version(vendor_id)
+        rendered = render_status(vendor_id)
+        if not rendered:
+            return not_found_response()
+
+        etag, body = rendered
+        if since != etag:
+            return changes_response(etag, body, [])
+
+        # Don't hold a PostgreSQL backend for the length of the wait
+        close_db_connection()
+        if not wait_for_version_change(vendor_id, version, wait):
+            return unchanged_response(etag)
+
+        rendered = render_status(vendor_id)
+        if not rendered:
+            return not_found_response()
+        if rendered[0] == since:
+            # e.g. a write that left the rendered status unchanged
+            return unchanged_response(since)
+        return changes_response(rendered[0], rendered[1], [])
+
+    except Exception as e:
+        print(f"Error waiting for vendor changes: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({
+                'error': 'Failed to wait for vendor changes',
+                'message': str(e)
+            })
+        }
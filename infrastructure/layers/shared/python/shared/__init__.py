@@ -0,0 +1,4 @@
+"""
+Shared Lambda Layer - code used by every database-backed Lambda function
+Deployed as a Lambda Layer; importable as `shared` from each handler
+"""
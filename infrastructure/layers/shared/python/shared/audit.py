@@ -0,0 +1,127 @@
+"""
+Buffered audit logging for Lambda functions
+Handlers record audit events during a request and flush them once, after
+their own transaction commits. With AUDIT_QUEUE_URL set the events go to
+SQS and the audit writer Lambda inserts them into audit_logs in batches;
+without it (local runs, scripts) they are written directly with COPY.
+"""
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+import boto3
+
+AUDIT_QUEUE_URL = os.environ.get('AUDIT_QUEUE_URL')
+
+# Column order of the CSV written by write_audit_events()
+AUDIT_COLUMNS = (
+    'vendor_id', 'action', 'actor', 'actor_ip', 'metadata',
+    'success', 'error_message', 'timestamp'
+)
+
+# SQS messages are capped at 256 KB; stay well below it
+MAX_MESSAGE_BYTES = 200_000
+
+def write_audit_events(cursor, events):
+    """Insert audit events (dicts keyed by AUDIT_COLUMNS) with a single COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for event in events:
+        row = []
+        for column in AUDIT_COLUMNS:
+            value = event.get(column)
+            if column == 'metadata' and value is not None:
+                value = json.dumps(value)
+            row.append('' if value is None else value)
+        writer.writerow(row)
+    buffer.seek(0)
+
+    cursor.copy_expert(
+        f"COPY audit_logs ({', '.join(AUDIT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+class AuditWriter:
+    """Collects audit events for the current invocation"""
+
+    def __init__(self, queue_url=AUDIT_QUEUE_URL):
+        self.queue_url = queue_url
+        self._events = []
+        self._sqs = None
+
+    def record(self, vendor_id, action, actor, metadata=None,
+               success=True, error_message=None, actor_ip=None):
+        """Buffer one audit event; nothing is written until flush()"""
+        self._events.append({
+            'vendor_id': str(vendor_id) if vendor_id else None,
+            'action': action,
+            'actor': actor,
+            'actor_ip': actor_ip,
+            'metadata': metadata,
+            'success': success,
+            'error_message': error_message,
+            'timestamp': datetime.utcnow().isoformat()
+        })
+
+    def discard(self):
+        """Drop buffered events, e.g. when the request's transaction rolled back"""
+        self._events = []
+
+    def flush(self, conn=None):
+        """
+        Send buffered events to the audit queue
+
+        Call after the request's own commit. If there is no queue, or a
+        send fails, the events not yet queued are written through conn
+        instead (when given) so they are neither lost nor written twice.
+        """
+        events, self._events = self._events, []
+        if not events:
+            return
+
+        if self.queue_url:
+            events = self._send(events)
+            if not events:
+                return
+
+        if conn is None:
+            print(f"Dropping {len(events)} audit events: {json.dumps(events)}")
+            return
+
+        cursor = conn.cursor()
+        write_audit_events(cursor, events)
+        conn.commit()
+        cursor.close()
+
+    def _send(self, events):
+        """
+        Queue events, one message per flush unless the batch is unusually large
+
+        Returns:
+            list: Events that were not queued (empty when all were sent)
+        """
+        batches = [[]]
+        size = 0
+        for event in events:
+            event_size = len(json.dumps(event))
+            if batches[-1] and size + event_size > MAX_MESSAGE_BYTES:
+                batches.append([])
+                size = 0
+            batches[-1].append(event)
+            size += event_size
+
+        for i, batch in enumerate(batches):
+            try:
+                if self._sqs is None:
+                    self._sqs = boto3.client('sqs')
+                self._sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(batch))
+            except Exception as e:
+                undelivered = [event for unsent in batches[i:] for event in unsent]
+                print(f"Failed to queue {len(undelivered)} of {len(events)} audit events: {str(e)}")
+                return undelivered
+        return []
+
+# Module scope, like secret_cache: one writer per container
+audit_writer = AuditWriter()
@@ -0,0 +1,206 @@
+"""
+Per-vendor cache of rendered GET /vendors/{id}/status responses
+Entries live in an in-process LRU with a TTL. Each entry remembers the
+vendor's cache version when it was rendered; every write path bumps that
+version after committing, so the next poll re-renders. Versions are kept in
+a shared tier (a DynamoDB table when STATUS_CACHE_TABLE is set) so a write in
+one Lambda invalidates entries in every status container; without it an
+in-memory stand-in is used and entries only expire by TTL across containers.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import boto3
+
+DEFAULT_TTL_SECONDS = int(os.environ.get('STATUS_CACHE_TTL_SECONDS', '30'))
+DEFAULT_MAX_ENTRIES = int(os.environ.get('STATUS_CACHE_MAX_ENTRIES', '1000'))
+STATUS_CACHE_TABLE = os.environ.get('STATUS_CACHE_TABLE')
+
+# Bumped by portfolio-wide writes; part of every vendor's version
+ALL_VENDORS_KEY = 'all'
+
+# Invalidating more vendors than this at once bumps ALL_VENDORS_KEY instead
+INVALIDATE_ALL_THRESHOLD = 50
+
+def vendor_key(vendor_id):
+    return f'vendor#{vendor_id}'
+
+class InMemoryVersionStore:
+    """Local stand-in for the shared tier; versions are only seen in-process"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get_versions(self, keys):
+        with self._lock:
+            return [self._versions.get(key, 0) for key in keys]
+
+    def bump(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+class DynamoDBVersionStore:
+    """
+    Shared tier: one item per key, {"cache_key": key, "version": N}
+
+    Args:
+        table_name: DynamoDB table with a string partition key cache_key
+        client: DynamoDB client; created lazily when not given
+    """
+
+    def __init__(self, table_name, client=None):
+        self.table_name = table_name
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def get_versions(self, keys):
+        response = self.client.batch_get_item(RequestItems={
+            self.table_name: {
+                'Keys': [{'cache_key': {'S': key}} for key in keys],
+                'ConsistentRead': True
+            }
+        })
+        versions = {
+            item['cache_key']['S']: int(item['version']['N'])
+            for item in response['Responses'].get(self.table_name, [])
+        }
+        return [versions.get(key, 0) for key in keys]
+
+    def bump(self, key):
+        self.client.update_item(
+            TableName=self.table_name,
+            Key={'cache_key': {'S': key}},
+            UpdateExpression='ADD version :one',
+            ExpressionAttributeValues={':one': {'N': '1'}}
+        )
+
+class StatusCache:
+    """
+    LRU of (version, ETag, body) per vendor, served while unexpired and the
+    vendor's version is unchanged
+
+    Read the version before querying the database and bump it after
+    committing; an entry rendered concurrently with a write is then tagged
+    with the old version and never served after the write.
+
+    Args:
+        store: Version store (shared tier)
+        ttl_seconds: Longest an entry is served, whatever the version says
+        max_entries: Least recently used entries are evicted beyond this
+        clock: Monotonic time source, injectable for tests
+    """
+
+    def __init__(self, store, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES, clock=time.monotonic):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def version(self, vendor_id):
+        """Current version of a vendor's status, or None if the store is unavailable"""
+        try:
+            all_version, vendor_version = self.store.get_versions(
+                [ALL_VENDORS_KEY, vendor_key(vendor_id)]
+            )
+        except Exception as e:
+            print(f"Status cache version lookup failed: {str(e)}")
+            return None
+        return f'{all_version}.{vendor_version}'
+
+    def get(self, vendor_id, version):
+        """(etag, body) cached for this version, or None"""
+        if version is None:
+            return None
+
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(vendor_id)
+            if entry and entry[0] == version and entry[3] > now:
+                self._entries.move_to_end(vendor_id)
+                self.stats['hits'] += 1
+                return entry[1], entry[2]
+            if entry:
+                del self._entries[vendor_id]
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, vendor_id, version, etag, body):
+        if version is None:
+            return
+
+        with self._lock:
+            self._entries[vendor_id] = (version, etag, body, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(vendor_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, vendor_id):
+        """Bump a vendor's version; call after the write has committed"""
+        self.invalidate_many([vendor_id])
+
+    def invalidate_many(self, vendor_ids):
+        vendor_ids = list(vendor_ids)
+        if len(vendor_ids) > INVALIDATE_ALL_THRESHOLD:
+            self.invalidate_all()
+            return
+
+        with self._lock:
+            for vendor_id in vendor_ids:
+                self._entries.pop(vendor_id, None)
+            self.stats['invalidations'] += len(vendor_ids)
+
+        # The write is already committed; a failure here leaves entries to expire
+        try:
+            for vendor_id in vendor_ids:
+                self.store.bump(vendor_key(vendor_id))
+        except Exception as e:
+            print(f"Status cache invalidation failed: {str(e)}")
+
+    def invalidate_all(self):
+        """Bump the version shared by every vendor, e.g. after a portfolio re-score"""
+        with self._lock:
+            self._entries.clear()
+            self.stats['invalidations'] += 1
+
+        try:
+            self.store.bump(ALL_VENDORS_KEY)
+        except Exception as e:
+            print(f"Status cache invalidation failed: {str(e)}")
+
+def make_etag(version, body):
+    """
+    Strong ETag for a status body: "<vendors.version>-<content hash>"
+
+    The leading vendors.version is what POST /vendors/{id}/approve checks
+    when the ETag is sent back as If-Match.
+    """
+    digest = hashlib.sha256(body.encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+def etag_matches(event, etag):
+    """True if the request's If-None-Match lists this ETag (or is *)"""
+    for name, value in (event.get('headers') or {}).items():
+        if name.lower() == 'if-none-match' and value:
+            # Weak comparison, as for GET
+            return any(
+                candidate == '*' or candidate.removeprefix('W/') == etag
+                for candidate in (part.strip() for part in value.split(','))
+            )
+    return False
+
+status_cache = StatusCache(
+    DynamoDBVersionStore(STATUS_CACHE_TABLE) if STATUS_CACHE_TABLE else InMemoryVersionStore()
+)
@@ -0,0 +1,146 @@
+"""
+Shared database access for Lambda functions
+Keeps one PostgreSQL connection per container alive across warm invocations
+"""
+import os
+import time
+import psycopg2
+from psycopg2 import extensions
+
+from shared.secrets import secret_cache
+
+# Seconds a connection may sit idle before it is pinged with SELECT 1 on reuse
+PING_AFTER_SECONDS = int(os.environ.get('DB_PING_AFTER_SECONDS', '60'))
+
+# Module scope survives between warm invocations of the same container
+_connection = None
+_last_used = 0.0
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'reconnects': 0
+}
+
+def is_auth_failure(error):
+    """True if a connection error means the credentials were rejected"""
+    if getattr(error, 'pgcode', None) in ('28P01', '28000'):
+        return True
+    return 'authentication failed' in str(error).lower()
+
+def _connect():
+    """
+    Open a new connection using cached Secrets Manager credentials
+
+    If the database rejects the cached password (e.g. the secret was just
+    rotated) the cache entry is dropped and the connection retried once
+    with freshly fetched credentials.
+    """
+    secret_arn = os.environ['DB_SECRET_ARN']
+    try:
+        return _connect_with(secret_cache.get(secret_arn))
+    except psycopg2.OperationalError as e:
+        if not is_auth_failure(e):
+            raise
+        print("Database rejected cached credentials, refreshing secret")
+        secret_cache.invalidate(secret_arn)
+        return _connect_with(secret_cache.get(secret_arn))
+
+def _connect_with(secret):
+    """Open a connection with the given username/password secret"""
+    return psycopg2.connect(
+        host=os.environ['DB_HOST'],
+        port=os.environ['DB_PORT'],
+        database=os.environ['DB_NAME'],
+        user=secret['username'],
+        password=secret['password'],
+        connect_timeout=5,
+        keepalives=1,
+        keepalives_idle=30,
+        keepalives_interval=10,
+        keepalives_count=3
+    )
+
+def _is_healthy(conn):
+    """
+    Check whether a cached connection can be reused
+
+    Local state is checked first; a SELECT 1 round trip is only paid
+    when the connection has been idle for longer than PING_AFTER_SECONDS.
+    """
+    if conn is None or conn.closed:
+        return False
+
+    status = conn.get_transaction_status()
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+
+    try:
+        # A previous invocation may have failed mid-transaction
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+
+        if time.monotonic() - _last_used > PING_AFTER_SECONDS:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+    except psycopg2.Error as e:
+        print(f"Cached database connection is unusable: {str(e)}")
+        return False
+
+    return True
+
+def get_db_connection():
+    """
+    Get the container's database connection, reconnecting if needed
+
+    Callers must hand the connection back with release_db_connection()
+    instead of closing it.
+    """
+    global _connection, _last_used
+
+    if _is_healthy(_connection):
+        _stats['hits'] += 1
+    else:
+        if _connection is not None:
+            _stats['reconnects'] += 1
+            close_db_connection()
+        _stats['misses'] += 1
+        _connection = _connect()
+
+    _last_used = time.monotonic()
+    return _connection
+
+def release_db_connection(conn):
+    """Return a connection to the pool, discarding any uncommitted work"""
+    global _last_used
+
+    if conn is None or conn.closed:
+        return
+
+    if conn is not _connection:
+        conn.close()
+        return
+
+    try:
+        if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        _last_used = time.monotonic()
+    except psycopg2.Error:
+        close_db_connection()
+
+def close_db_connection():
+    """Close the cached connection (next get_db_connection() reconnects)"""
+    global _connection
+
+    if _connection is not None:
+        try:
+            _connection.close()
+        except psycopg2.Error:
+            pass
+    _connection = None
+
+def get_pool_stats():
+    """Return connection reuse counters for this container"""
+    return dict(_stats)
@@ -0,0 +1,45 @@
+"""
+Vendor change notifications over PostgreSQL LISTEN/NOTIFY
+Write handlers queue a small delta per vendor inside their transaction;
+PostgreSQL delivers it to every listening session when the transaction
+commits (and never if it rolls back). The local status server
+(scripts/local_status_server.py) fans this channel out to waiting
+GET /vendors/{id}/changes requests over one connection; the deployed
+Lambda waits on the status cache version instead (see status_handler/stream.py).
+"""
+import json
+from datetime import datetime
+
+CHANNEL = 'vendor_changes'
+
+def notify_vendor_changes(cursor, changes):
+    """
+    Queue notifications for [(vendor_id, change type, data), ...]; sent on commit
+
+    Change types: document, questionnaire, risk_score, approval, audit. Keep data
+    to a few fields; NOTIFY payloads must stay under 8000 bytes. One
+    statement however many vendors changed.
+    """
+    at = datetime.utcnow().isoformat()
+    payloads = [
+        json.dumps({'vendor_id': str(vendor_id), 'type': change_type, 'data': data, 'at': at},
+                   default=str)
+        for vendor_id, change_type, data in changes
+    ]
+    if payloads:
+        cursor.execute(
+            "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+            (CHANNEL, payloads)
+        )
+
+def notify_vendor_change(cursor, vendor_id, change_type, data):
+    notify_vendor_changes(cursor, [(vendor_id, change_type, data)])
+
+def parse_notification(payload):
+    """Change dict from a notification payload, or None if unreadable"""
+    try:
+        change = json.loads(payload)
+    except ValueError:
+        print(f"Ignoring unreadable change notification: {payload[:200]}")
+        return None
+    return change if isinstance(change, dict) and change.get('vendor_id') else None
@@ -0,0 +1,66 @@
+"""
+Content-addressed cache of document extraction results
+Vendors re-upload the same W-9 or SOC 2 report many times; entries are keyed
+by the SHA-256 of the file and the document type (which decides the fields
+parsed), so an identical upload reuses the stored extracted_data instead of
+running Textract again. Evicted least recently used first, down to a total
+size, by the daily housekeeping run.
+"""
+import json
+import os
+
+EXTRACTION_CACHE_MAX_BYTES = int(
+    os.environ.get('EXTRACTION_CACHE_MAX_MB', '512')
+) * 1024 * 1024
+
+def lookup_extraction(cursor, content_sha256, document_type):
+    """
+    Cached extracted_data for a file, or None; a hit refreshes the entry
+
+    Returns:
+        dict: extracted_data stored for this content and document type
+    """
+    cursor.execute("""
+        UPDATE extraction_cache
+        SET hit_count = hit_count + 1,
+            last_used_at = NOW()
+        WHERE content_sha256 = %s AND document_type = %s
+        RETURNING extracted_data
+    """, (content_sha256, document_type))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    # psycopg2 decodes JSONB; keep working with drivers that return text
+    return row[0] if isinstance(row[0], dict) else json.loads(row[0])
+
+def store_extraction(cursor, content_sha256, document_type, extracted_data):
+    """Cache a fresh extraction; commits with the caller's transaction"""
+    cursor.execute("""
+        INSERT INTO extraction_cache (content_sha256, document_type, extracted_data)
+        VALUES (%s, %s, %s::jsonb)
+        ON CONFLICT (content_sha256, document_type) DO UPDATE
+            SET extracted_data = EXCLUDED.extracted_data,
+                last_used_at = NOW()
+    """, (content_sha256, document_type, json.dumps(extracted_data)))
+
+def evict_extractions(cursor, max_bytes=EXTRACTION_CACHE_MAX_BYTES):
+    """
+    Delete least recently used entries until the rest fit in max_bytes
+
+    Returns:
+        int: Number of entries evicted
+    """
+    cursor.execute("""
+        DELETE FROM extraction_cache c
+        USING (
+            SELECT content_sha256, document_type,
+                   SUM(pg_column_size(extracted_data)) OVER (
+                       ORDER BY last_used_at DESC, content_sha256, document_type
+                   ) AS retained_bytes
+            FROM extraction_cache
+        ) ranked
+        WHERE c.content_sha256 = ranked.content_sha256
+          AND c.document_type = ranked.document_type
+          AND ranked.retained_bytes > %s
+    """, (max_bytes,))
+    return cursor.rowcount
@@ -0,0 +1,86 @@
+"""
+Idempotency keys for write endpoints
+A client sends the same Idempotency-Key header when it retries a request;
+the first request's response is stored with the key (in the same
+transaction as its writes) and replayed for every retry until it expires.
+"""
+import hashlib
+import json
+import os
+
+IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', '24'))
+
+MAX_KEY_LENGTH = 255
+
+def get_idempotency_key(event):
+    """Idempotency-Key header of an API Gateway event (headers are case-insensitive)"""
+    for name, value in (event.get('headers') or {}).items():
+        if name.lower() == 'idempotency-key' and value:
+            return value.strip()[:MAX_KEY_LENGTH] or None
+    return None
+
+def request_fingerprint(payload):
+    """SHA-256 of the request payload, independent of key order"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def claim_idempotency_key(cursor, scope, key, fingerprint):
+    """
+    Claim a key for this request, or find the response already stored for it
+
+    A concurrent request with the same key blocks on the insert until the
+    first one commits, then sees its stored response. Expired keys are
+    reclaimed.
+
+    Returns:
+        tuple: (request_hash, response_status, response_body) if the key was
+               already used, None if this request now owns it
+    """
+    cursor.execute("""
+        INSERT INTO idempotency_keys (scope, idempotency_key, request_hash, expires_at)
+        VALUES (%s, %s, %s, NOW() + %s * INTERVAL '1 hour')
+        ON CONFLICT (scope, idempotency_key) DO UPDATE
+            SET request_hash = EXCLUDED.request_hash,
+                response_status = NULL,
+                response_body = NULL,
+                created_at = NOW(),
+                expires_at = EXCLUDED.expires_at
+            WHERE idempotency_keys.expires_at <= NOW()
+        RETURNING 1
+    """, (scope, key, fingerprint, IDEMPOTENCY_TTL_HOURS))
+    if cursor.fetchone():
+        return None
+
+    cursor.execute("""
+        SELECT request_hash, response_status, response_body
+        FROM idempotency_keys
+        WHERE scope = %s AND idempotency_key = %s
+    """, (scope, key))
+    return cursor.fetchone()
+
+def store_idempotent_response(cursor, scope, key, response):
+    """Save the response for a claimed key; commit together with the request's writes"""
+    cursor.execute("""
+        UPDATE idempotency_keys
+        SET response_status = %s, response_body = %s
+        WHERE scope = %s AND idempotency_key = %s
+    """, (response['statusCode'], response['body'], scope, key))
+
+def replay_response(stored, fingerprint, headers):
+    """API response for a request whose key was already used"""
+    request_hash, response_status, response_body = stored
+
+    if request_hash != fingerprint:
+        return {
+            'statusCode': 422,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({
+                'error': 'Idempotency-Key was already used with a different request body'
+            })
+        }
+
+    return {
+        'statusCode': response_status,
+        'headers': dict(headers, **{'Idempotent-Replayed': 'true'}),
+        'body': response_body
+    }
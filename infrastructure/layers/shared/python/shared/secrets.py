@@ -0,0 +1,74 @@
+"""
+In-process cache for Secrets Manager secrets
+Avoids a Secrets Manager round trip on every invocation of a warm container
+"""
+import json
+import os
+import threading
+import time
+import boto3
+
+DEFAULT_TTL_SECONDS = int(os.environ.get('SECRET_CACHE_TTL_SECONDS', '300'))
+
+class SecretCache:
+    """
+    TTL cache of parsed JSON secrets keyed by secret id
+
+    Args:
+        client: Secrets Manager client (anything with get_secret_value);
+                created lazily when not given so tests can pass a fake
+        ttl_seconds: How long a fetched secret is served before re-fetching
+        clock: Monotonic time source, injectable for tests
+    """
+
+    def __init__(self, client=None, ttl_seconds=DEFAULT_TTL_SECONDS, clock=time.monotonic):
+        self._client = client
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = boto3.client('secretsmanager')
+        return self._client
+
+    def get(self, secret_id):
+        """Return the parsed secret, fetching it if missing or expired"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(secret_id)
+            if entry and entry[1] > now:
+                self.stats['hits'] += 1
+                return entry[0]
+
+        response = self.client.get_secret_value(SecretId=secret_id)
+        secret = json.loads(response['SecretString'])
+
+        with self._lock:
+            self.stats['misses'] += 1
+            self._entries[secret_id] = (secret, now + self.ttl_seconds)
+        return secret
+
+    def invalidate(self, secret_id=None):
+        """
+        Drop a cached secret (or all of them) so the next get() re-fetches
+
+        Called when the database rejects cached credentials, e.g. right
+        after a rotation.
+        """
+        with self._lock:
+            self.stats['invalidations'] += 1
+            if secret_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(secret_id, None)
+
+# Container-wide cache used by shared.db and db_init
+secret_cache = SecretCache()
+
+def get_secret(secret_id):
+    """Return a secret from the container-wide cache"""
+    return secret_cache.get(secret_id)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-vendor vs batch approvals
+Approves the same number of vendors through POST /vendors/{id}/approve (one
+request per vendor) and POST /vendors/approve-batch, and reports database
+round trips, commits and vendors per second for each.
+
+Against a database (--dsn) synthetic vendors are created, approved and
+deleted again. Without one, every round trip is simulated with a fixed
+latency (--rtt-ms), which is what dominates the per-vendor path in Lambda.
+
+Usage (needs the approve_vendor dependencies, e.g. boto3 and psycopg2):
+    python infrastructure/scripts/benchmark_approve_batch.py --vendors 500 --rtt-ms 1
+    python infrastructure/scripts/benchmark_approve_batch.py --dsn postgresql://localhost/onboarding_hub
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "layers" / "shared" / "python"))
+sys.path.insert(0, str(ROOT / "lambda" / "approve_vendor"))
+
+import batch  # noqa: E402
+import index  # noqa: E402
+
+class CountingCursor:
+    """Counts statements; without a real cursor, sleeps rtt per round trip"""
+
+    def __init__(self, stats, rtt, cursor=None):
+        self.stats = stats
+        self.rtt = rtt
+        self.cursor = cursor
+        self.rows = []
+
+    def _round_trip(self):
+        self.stats['round_trips'] += 1
+        if self.cursor is None:
+            time.sleep(self.rtt)
+
+    def mogrify(self, sql, params=None):
+        if self.cursor is not None:
+            return self.cursor.mogrify(sql, params)
+        self.rows.append((params[0], 'Benchmark Vendor', 'approved' if params[1] else 'rejected',
+                          datetime.utcnow(), 2))
+        return b''
+
+    def execute(self, sql, params=None):
+        self._round_trip()
+        if self.cursor is not None:
+            self.cursor.execute(sql, params)
+
+    def copy_expert(self, sql, buffer):
+        self._round_trip()
+        if self.cursor is not None:
+            self.cursor.copy_expert(sql, buffer)
+
+    def fetchone(self):
+        if self.cursor is not None:
+            return self.cursor.fetchone()
+        return ('Benchmark Vendor', 2)
+
+    def fetchall(self):
+        if self.cursor is not None:
+            return self.cursor.fetchall()
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        if self.cursor is not None:
+            self.cursor.close()
+
+class CountingConnection:
+    def __init__(self, rtt, conn=None):
+        self.rtt = rtt
+        self.conn = conn
+        self.stats = {'round_trips': 0, 'commits': 0}
+
+    def cursor(self):
+        return CountingCursor(self.stats, self.rtt, self.conn.cursor() if self.conn else None)
+
+    def commit(self):
+        self.stats['round_trips'] += 1
+        self.stats['commits'] += 1
+        if self.conn is not None:
+            self.conn.commit()
+        else:
+            time.sleep(self.rtt)
+
+    def rollback(self):
+        self.stats['round_trips'] += 1
+        if self.conn is not None:
+            self.conn.rollback()
+        else:
+            time.sleep(self.rtt)
+
+def create_vendors(conn, count):
+    cursor = conn.cursor()
+    run = uuid.uuid4().hex[:8]
+    cursor.execute("""
+        INSERT INTO vendors (company_name, contact_email)
+        SELECT 'Benchmark Vendor ' || g, 'bench-' || %s || '-' || g || '@example.com'
+        FROM generate_series(1, %s) g
+        RETURNING id::text
+    """, (run, count))
+    vendor_ids = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    cursor.close()
+    return vendor_ids
+
+def delete_vendors(conn, vendor_ids):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM audit_logs WHERE vendor_id = ANY(%s::uuid[])", (vendor_ids,))
+    cursor.execute("DELETE FROM vendors WHERE id = ANY(%s::uuid[])", (vendor_ids,))
+    conn.commit()
+    cursor.close()
+
+def run(module, conn, requests):
+    """Send every request through a handler sharing one counting connection"""
+    module.get_db_connection = lambda: conn
+    module.release_db_connection = lambda c: None
+
+    started = time.monotonic()
+    for request in requests:
+        response = module.handler(request, None)
+        if response['statusCode'] != 200:
+            raise RuntimeError(f"{module.__name__}: {response['body']}")
+    return time.monotonic() - started
+
+def report(label, vendors, elapsed, stats):
+    print(f"{label:<12} {elapsed * 1000:9.0f} ms  {int(vendors / elapsed):8d} vendors/s  "
+          f"{stats['round_trips']:6d} round trips  {stats['commits']:5d} commits")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-vendor vs batch approvals")
+    parser.add_argument('--vendors', type=int, default=500)
+    parser.add_argument('--rtt-ms', type=float, default=1.0,
+                        help="Simulated round-trip latency without --dsn")
+    parser.add_argument('--dsn', help="PostgreSQL DSN; omit to simulate the database")
+    args = parser.parse_args()
+
+    rtt = args.rtt_ms / 1000
+    db = None
+    if args.dsn:
+        import psycopg2
+        db = psycopg2.connect(args.dsn)
+
+    def vendor_ids():
+        if db is not None:
+            return create_vendors(db, args.vendors)
+        return [str(uuid.uuid4()) for _ in range(args.vendors)]
+
+    # Per-vendor: one request (and transaction) per decision
+    ids = vendor_ids()
+    conn = CountingConnection(rtt, db)
+    elapsed = run(index, conn, [{
+        'pathParameters': {'id': vendor_id},
+        'body': json.dumps({'approved': True, 'approver_email': 'benchmark'})
+    } for vendor_id in ids])
+    report('per-vendor', len(ids), elapsed, conn.stats)
+    if db is not None:
+        delete_vendors(db, ids)
+
+    # Batch: MAX_BATCH_SIZE decisions per request
+    ids = vendor_ids()
+    conn = CountingConnection(rtt, db)
+    elapsed = run(batch, conn, [{
+        'body': json.dumps({
+            'approver_email': 'benchmark',
+            'decisions': [{'vendor_id': vendor_id, 'approved': True}
+                          for vendor_id in ids[start:start + batch.MAX_BATCH_SIZE]]
+        })
+    } for start in range(0, len(ids), batch.MAX_BATCH_SIZE)])
+    report('batch', len(ids), elapsed, conn.stats)
+    if db is not None:
+        delete_vendors(db, ids)
+
+    print(f"({'database' if db is not None else f'simulated, {args.rtt_ms} ms per round trip'})")
+
+if __name__ == "__main__":
+    main()
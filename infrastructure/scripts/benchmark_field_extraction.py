@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Benchmark: document-specific field extraction
+Runs the same synthetic Textract results through field_rules.extract_fields
+and through the per-field helpers document_processor used before it (kept
+below as the baseline, unchanged), checks both produce the same fields and
+reports documents per second for each.
+
+Each baseline field re-joins and re-lowercases every text line; the rules
+engine builds the lowercased text and form-key index once per document.
+
+Usage:
+    python infrastructure/scripts/benchmark_field_extraction.py
+    python infrastructure/scripts/benchmark_field_extraction.py --lines 5000 --keys 300 --repeat 20
+"""
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "lambda" / "document_processor"))
+
+import field_rules  # noqa: E402
+
+# ====================
+# Baseline: per-field helpers
+# ====================
+BASELINE_EXTRACTORS = {}
+
+def extract_w9_fields(extracted_data):
+    """Extract W-9 specific fields"""
+    kvp = extracted_data['key_value_pairs']
+    return {
+        'tin': extract_value_like(kvp, ['TIN', 'Tax ID', 'EIN', 'SSN']),
+        'entity_type': extract_value_like(kvp, ['Entity Type', 'Business Type']),
+        'business_name': extract_value_like(kvp, ['Business Name', 'Name']),
+        'address': extract_value_like(kvp, ['Address', 'Street Address']),
+        'city_state_zip': extract_value_like(kvp, ['City', 'State', 'ZIP', 'Postal Code']),
+        'signature': check_signature(extracted_data['extracted_text']),
+        'date_signed': extract_date(extracted_data['extracted_text'])
+    }
+
+def extract_insurance_fields(extracted_data):
+    """Extract Insurance Certificate specific fields"""
+    kvp = extracted_data['key_value_pairs']
+    return {
+        'policy_holder': extract_value_like(kvp, ['Insured', 'Policy Holder', 'Company Name']),
+        'policy_number': extract_value_like(kvp, ['Policy Number', 'Policy #']),
+        'insurance_company': extract_value_like(kvp, ['Insurance Company', 'Insurer', 'Carrier']),
+        'coverage_types': extract_coverage_types(extracted_data['extracted_text']),
+        'coverage_limits': extract_coverage_limits(extracted_data['key_value_pairs']),
+        'effective_date': extract_date_from_text(extracted_data['extracted_text'], 'effective'),
+        'expiration_date': extract_date_from_text(extracted_data['extracted_text'], 'expir'),
+        'certificate_holder': extract_value_like(kvp, ['Certificate Holder', 'Additional Insured'])
+    }
+
+def extract_diversity_fields(extracted_data):
+    """Extract Diversity Certification specific fields"""
+    kvp = extracted_data['key_value_pairs']
+    return {
+        'certification_type': extract_value_like(kvp, ['Certification Type', 'MBE', 'WBE', 'DBE']),
+        'certified_organization': extract_value_like(kvp, ['Certified By', 'Issuer']),
+        'cert_number': extract_value_like(kvp, ['Certification Number', 'Cert #']),
+        'issue_date': extract_date(extracted_data['extracted_text']),
+        'expiration_date': extract_date_from_text(extracted_data['extracted_text'], 'expir'),
+        'scope_of_certification': extract_value_like(kvp, ['Scope', 'Services'])
+    }
+
+def extract_bcp_fields(extracted_data):
+    """Extract Business Continuity Plan specific fields"""
+    kvp = extracted_data['key_value_pairs']
+    return {
+        'recovery_time_objective': extract_value_like(kvp, ['RTO', 'Recovery Time']),
+        'recovery_point_objective': extract_value_like(kvp, ['RPO', 'Recovery Point']),
+        'backup_location': extract_value_like(kvp, ['Backup', 'Backup Location']),
+        'disaster_recovery': check_contains(extracted_data['extracted_text'], ['disaster recovery', 'contingency plan']),
+        'last_tested': extract_date_from_text(extracted_data['extracted_text'], 'test')
+    }
+
+def extract_soc2_fields(extracted_data):
+    """Extract SOC 2 Report specific fields"""
+    kvp = extracted_data['key_value_pairs']
+    return {
+        'report_type': extract_value_like(kvp, ['Type I', 'Type II']),
+        'service_auditor': extract_value_like(kvp, ['Auditor', 'Service Auditor']),
+        'report_period_start': extract_date_from_text(extracted_data['extracted_text'], 'from'),
+        'report_period_end': extract_date_from_text(extracted_data['extracted_text'], 'to'),
+        'opinion': check_contains(extracted_data['extracted_text'], ['opinion', 'complied']),
+        'controls_tested': extract_value_like(kvp, ['Controls', 'Testing'])
+    }
+
+def extract_iso_fields(extracted_data):
+    """Extract ISO Certification specific fields"""
+    kvp = extracted_data['key_value_pairs']
+    return {
+        'iso_standard': extract_value_like(kvp, ['ISO', 'Standard']),
+        'issuing_body': extract_value_like(kvp, ['Issued By', 'Accredited By']),
+        'cert_number': extract_value_like(kvp, ['Certification Number', 'Number']),
+        'issue_date': extract_date(extracted_data['extracted_text']),
+        'expiration_date': extract_date_from_text(extracted_data['extracted_text'], 'expir'),
+        'scope': extract_value_like(kvp, ['Scope', 'Services Covered'])
+    }
+
+def extract_generic_fields(extracted_data):
+    """Extract generic fields for unknown document types"""
+    return {
+        'text_extracted': len(extracted_data['extracted_text']) > 0,
+        'tables_found': len(extracted_data['tables']),
+        'key_value_pairs_found': len(extracted_data['key_value_pairs'])
+    }
+
+def extract_value_like(kvp, keys):
+    """Find value matching any of the given keys"""
+    for key in keys:
+        for kvp_key, kvp_value in kvp.items():
+            if key.lower() in kvp_key.lower():
+                return kvp_value.get('value', '')
+    return None
+
+def extract_coverage_types(text_blocks):
+    """Extract insurance coverage types from text"""
+    coverage_keywords = {
+        'general_liability': ['general liability', 'GL coverage'],
+        'workers_compensation': ['workers comp', 'workers\'s compensation'],
+        'professional_liability': ['professional liability', 'errors & omissions', 'E&O'],
+        'cyber_liability': ['cyber liability', 'cyber insurance'],
+        'umbrella': ['umbrella', 'excess liability']
+    }
+
+    full_text = ' '.join([block['text'].lower() for block in text_blocks])
+    found_coverage = {}
+
+    for coverage_type, keywords in coverage_keywords.items():
+        for keyword in keywords:
+            if keyword in full_text:
+                found_coverage[coverage_type] = True
+                break
+
+    return found_coverage
+
+def extract_coverage_limits(kvp):
+    """Extract coverage limits from key-value pairs"""
+    limits = {}
+    for key, value_obj in kvp.items():
+        if 'limit' in key.lower() or 'coverage' in key.lower():
+            limits[key] = value_obj.get('value', '')
+    return limits
+
+def extract_date(text_blocks):
+    """Extract first date found in text blocks"""
+    date_pattern = r'\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}-\d{1,2}-\d{2,4}'
+
+    for block in text_blocks:
+        match = re.search(date_pattern, block.get('text', ''))
+        if match:
+            return match.group(0)
+    return None
+
+def extract_date_from_text(text_blocks, prefix):
+    """Extract date that follows a specific prefix"""
+    full_text = ' '.join([block.get('text', '') for block in text_blocks])
+
+    # Find text containing prefix and extract following date
+    pattern = rf'{prefix}[^0-9]*(\d{{1,2}}/\d{{1,2}}/\d{{2,4}})'
+    match = re.search(pattern, full_text, re.IGNORECASE)
+    if match:
+        return match.group(1)
+    return None
+
+def check_signature(text_blocks):
+    """Check if document appears to be signed"""
+    signature_keywords = ['signature', 'signed', 'authorized', 'approved', 'accepted']
+    full_text = ' '.join([block.get('text', '').lower() for block in text_blocks])
+
+    return any(keyword in full_text for keyword in signature_keywords)
+
+def check_contains(text_blocks, keywords):
+    """Check if text contains any of the given keywords"""
+    full_text = ' '.join([block.get('text', '').lower() for block in text_blocks])
+    return any(keyword in full_text for keyword in keywords)
+
+BASELINE_EXTRACTORS.update({
+    'w9': extract_w9_fields,
+    'insurance': extract_insurance_fields,
+    'diversity_cert': extract_diversity_fields,
+    'bcp': extract_bcp_fields,
+    'soc2': extract_soc2_fields,
+    'iso_cert': extract_iso_fields
+})
+
+# ====================
+# Synthetic documents
+# ====================
+PHRASES = [
+    'Taxpayer Identification Number', 'signature of U.S. person', 'date signed 03/14/2025',
+    'general liability', 'umbrella', 'cyber liability', 'effective date 01/01/2025',
+    'expiration date 12/31/2025', 'disaster recovery', 'last tested on 06/30/2024',
+    'report period from 01/01/2024 to 12/31/2024', 'in our opinion', 'ISO 27001'
+]
+FORM_KEYS = [
+    'Name', 'Business Name', 'Address', 'City, State, ZIP', 'TIN', 'Policy Number',
+    'Insurer', 'Each Occurrence Limit', 'Coverage', 'Certification Number', 'Scope',
+    'RTO', 'RPO', 'Backup Location', 'Service Auditor', 'Controls', 'Issued By'
+]
+
+def random_words(rng, count):
+    return ' '.join(
+        ''.join(rng.choices(string.ascii_letters, k=rng.randint(2, 10))) for _ in range(count)
+    )
+
+def synthetic_document(rng, lines, keys):
+    """extracted_data as parse_textract_response builds it, minus the fields"""
+    text = []
+    for _ in range(lines):
+        line = random_words(rng, rng.randint(3, 12))
+        if rng.random() < 0.05:
+            line = f"{line} {rng.choice(PHRASES)}"
+        text.append({'text': line, 'confidence': 99.0})
+
+    key_value_pairs = {}
+    for i in range(keys):
+        key = rng.choice(FORM_KEYS) if rng.random() < 0.3 else random_words(rng, 2)
+        key_value_pairs[f"{key} {i}"] = {'value': random_words(rng, 3), 'confidence': 95.0}
+
+    return {'extracted_text': text, 'key_value_pairs': key_value_pairs, 'tables': []}
+
+def timed(extract, documents, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for document_type, extracted_data in documents:
+            extract(extracted_data, document_type)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document-specific field extraction")
+    parser.add_argument('--documents', type=int, default=20, help="Documents per type")
+    parser.add_argument('--lines', type=int, default=200, help="Text lines per document")
+    parser.add_argument('--keys', type=int, default=40, help="Form keys per document")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = [
+        (document_type, synthetic_document(rng, args.lines, args.keys))
+        for document_type in BASELINE_EXTRACTORS
+        for _ in range(args.documents)
+    ]
+
+    def baseline(extracted_data, document_type):
+        return BASELINE_EXTRACTORS[document_type](extracted_data)
+
+    for document_type, extracted_data in documents:
+        expected = baseline(extracted_data, document_type)
+        actual = field_rules.extract_fields(extracted_data, document_type)
+        if actual != expected:
+            raise SystemExit(f"{document_type}: fields differ\n  baseline: {expected}\n  rules:    {actual}")
+
+    count = len(documents) * args.repeat
+    print(f"{len(documents)} documents x {args.repeat}, {args.lines} lines and {args.keys} form keys each")
+    results = [
+        ('baseline', timed(baseline, documents, args.repeat)),
+        ('rules', timed(field_rules.extract_fields, documents, args.repeat))
+    ]
+    for label, elapsed in results:
+        print(f"{label:<10} {elapsed * 1000:9.1f} ms  {int(count / elapsed):8d} documents/s")
+    print(f"speedup    {results[0][1] / results[1][1]:9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: local sanctions screening
+Indexes 20k synthetic list entries and screens 100k vendor names against
+them (about 1% are typo'd variants of listed names)
+
+Usage:
+    python infrastructure/scripts/benchmark_sanctions_screening.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "lambda" / "risk_scoring"))
+
+from sanctions import SanctionsEntry, SanctionsIndex  # noqa: E402
+
+LIST_ENTRIES = 20_000
+VENDOR_NAMES = 100_000
+NEAR_MATCH_RATE = 0.01
+
+# Real list names are mostly distinctive proper nouns (people, places,
+# transliterations) plus a few generic business words
+CONSONANTS = 'bcdfghjklmnprstvyz'
+VOWELS = 'aeiou'
+GENERIC_WORDS = [
+    'global', 'trading', 'capital', 'maritime', 'energy', 'logistics', 'holdings',
+    'industrial', 'petroleum', 'shipping', 'metals', 'group', 'international',
+    'investment', 'bank', 'foundation', 'services', 'technologies', 'exchange'
+]
+SUFFIXES = ['Inc', 'LLC', 'Ltd', 'Corp', 'GmbH', 'SA', 'Company', '']
+
+def proper_noun(rng):
+    """Pronounceable random word of 2-4 consonant-vowel syllables"""
+    syllables = []
+    for _ in range(rng.randint(2, 4)):
+        syllable = rng.choice(CONSONANTS) + rng.choice(VOWELS)
+        if rng.random() < 0.3:
+            syllable += rng.choice(CONSONANTS)
+        syllables.append(syllable)
+    return ''.join(syllables).title()
+
+def company_name(rng):
+    tokens = [proper_noun(rng) for _ in range(rng.randint(1, 2))]
+    tokens += [rng.choice(GENERIC_WORDS).title() for _ in range(rng.randint(1, 2))]
+    suffix = rng.choice(SUFFIXES)
+    return ' '.join(tokens + ([suffix] if suffix else []))
+
+def typo(rng, name):
+    """Drop one character from a name"""
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1:]
+
+def main():
+    rng = random.Random(7)
+    entries = [
+        SanctionsEntry('SYNTH', f"S-{i}", company_name(rng), (), f"{rng.randint(10**8, 10**9 - 1)}")
+        for i in range(LIST_ENTRIES)
+    ]
+
+    start = time.perf_counter()
+    index = SanctionsIndex({'SYNTH': entries})
+    build_seconds = time.perf_counter() - start
+
+    vendors = []
+    for _ in range(VENDOR_NAMES):
+        if rng.random() < NEAR_MATCH_RATE:
+            vendors.append(typo(rng, rng.choice(entries).name))
+        else:
+            vendors.append(company_name(rng))
+
+    timings = []
+    matched = 0
+    for name in vendors:
+        start = time.perf_counter()
+        matches = index.screen(name, None)
+        timings.append(time.perf_counter() - start)
+        matched += bool(matches)
+
+    timings.sort()
+    total = sum(timings)
+    print(f"index build: {build_seconds:.2f} s for {LIST_ENTRIES} entries "
+          f"({len(index.postings)} trigrams)")
+    print(f"screened:    {VENDOR_NAMES} vendors in {total:.2f} s, {matched} with matches")
+    print(f"per vendor:  mean {total / len(timings) * 1e3:.3f} ms, "
+          f"p50 {timings[len(timings) // 2] * 1e3:.3f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e3:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,18 @@ if [ -z "$LAMBDA_ARN" ]; then
     exit 1
 fi
 echo "✓ Lambda: $LAMBDA_ARN"
+
+IMPORT_LAMBDA_ARN=$(aws cloudformation describe-stacks \
+    --stack-name OnboardingHubLambdaStack \
+    --region $REGION \
+    --query "Stacks[0].Outputs[?OutputKey=='BulkImportHandlerArn'].OutputValue" \
+    --output text 2>/dev/null)
+
+if [ -z "$IMPORT_LAMBDA_ARN" ]; then
+    echo "❌ Error: Could not find BulkImportHandler. Make sure OnboardingHubLambdaStack is deployed."
+    exit 1
+fi
+echo "✓ Bulk import Lambda: $IMPORT_LAMBDA_ARN"
 echo ""
 
 # Step 3: Grant S3 permission to invoke Lambda
@@ -54,6 +66,14 @@ aws lambda add-permission \
     --source-arn "arn:aws:s3:::$BUCKET_NAME" \
     --region $REGION \
     2>/dev/null || echo "   (Permission may already exist - continuing...)"
+aws lambda add-permission \
+    --function-name $IMPORT_LAMBDA_ARN \
+    --principal s3.amazonaws.com \
+    --action lambda:InvokeFunction \
+    --statement-id AllowS3Invoke \
+    --source-arn "arn:aws:s3:::$BUCKET_NAME" \
+    --region $REGION \
+    2>/dev/null || echo "   (Permission may already exist - continuing...)"
 echo "✓ Permission configured"
 echo ""
 
@@ -111,6 +131,42 @@ NOTIFICATION_CONFIG=$(cat <<EOF
           ]
         }
       }
+    },
+    {
+      "LambdaFunctionArn": "$IMPORT_LAMBDA_ARN",
+      "Events": ["s3:ObjectCreated:*"],
+      "Filter": {
+        "Key": {
+          "FilterRules": [
+            { "Name": "prefix", "Value": "imports/incoming/" },
+            { "Name": "suffix", "Value": ".csv" }
+          ]
+        }
+      }
+    },
+    {
+      "LambdaFunctionArn": "$IMPORT_LAMBDA_ARN",
+      "Events": ["s3:ObjectCreated:*"],
+      "Filter": {
+        "Key": {
+          "FilterRules": [
+            { "Name": "prefix", "Value": "imports/incoming/" },
+            { "Name": "suffix", "Value": ".ndjson" }
+          ]
+        }
+      }
+    },
+    {
+      "LambdaFunctionArn": "$IMPORT_LAMBDA_ARN",
+      "Events": ["s3:ObjectCreated:*"],
+      "Filter": {
+        "Key": {
+          "FilterRules": [
+            { "Name": "prefix", "Value": "imports/incoming/" },
+            { "Name": "suffix", "Value": ".jsonl" }
+          ]
+        }
+      }
     }
   ]
 }
@@ -142,6 +198,7 @@ echo "  • *.pdf files in vendors/ folder"
 echo "  • *.jpg files in vendors/ folder"
 echo "  • *.jpeg files in vendors/ folder"
 echo "  • *.png files in vendors/ folder"
+echo "  • *.csv, *.ndjson and *.jsonl files in imports/incoming/ (bulk vendor import)"
 echo ""
 echo "When a document is uploaded, the DocumentProcessor Lambda"
 echo "will automatically extract data using AWS Textract."
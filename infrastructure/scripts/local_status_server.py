@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for API Gateway: vendor status and change feed
+Serves the status endpoints from a local PostgreSQL so the LISTEN/NOTIFY
+change feed can be exercised end to end without deploying:
+
+    GET  /vendors/{id}/status    status_handler (ETag / If-None-Match)
+    GET  /vendors/{id}/changes   long poll, same contract as stream.handler
+    POST /vendors/{id}/approve   approve_vendor, to produce a change
+
+Long polls are served by asyncio: one LISTEN connection fans notifications
+out to every waiting request, while the Lambda handlers run one at a time
+on a worker thread with their own connection.
+
+Usage (needs psycopg2 and a database initialized with database/schema.sql):
+    python infrastructure/scripts/local_status_server.py --dsn postgresql://localhost/onboarding_hub
+    curl -i localhost:8787/vendors/$VENDOR_ID/status
+    curl -i "localhost:8787/vendors/$VENDOR_ID/changes?since=<etag>&wait=25"
+    curl -X POST localhost:8787/vendors/$VENDOR_ID/approve -d '{"approved": true}'
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "layers" / "shared" / "python"))
+sys.path.insert(0, str(ROOT / "lambda" / "status_handler"))
+
+import psycopg2  # noqa: E402
+
+import index as status_index  # noqa: E402
+import stream  # noqa: E402
+from shared.events import CHANNEL, parse_notification  # noqa: E402
+
+ROUTE = re.compile(r'^/vendors/([^/]+)/(status|changes|approve)$')
+
+def load_handler_module(name, path):
+    """Import a Lambda's index.py under its own name (they are all 'index')"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class ChangeHub:
+    """One LISTEN connection; each notification goes to that vendor's waiting requests"""
+
+    def __init__(self, dsn, loop):
+        self.conn = psycopg2.connect(dsn)
+        self.conn.autocommit = True
+        self.conn.cursor().execute(f"LISTEN {CHANNEL}")
+        self.subscribers = defaultdict(set)
+        loop.add_reader(self.conn.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        self.conn.poll()
+        while self.conn.notifies:
+            change = parse_notification(self.conn.notifies.pop(0).payload)
+            if change:
+                for queue in self.subscribers.get(change['vendor_id'], ()):
+                    queue.put_nowait(change)
+
+    def subscribe(self, vendor_id):
+        queue = asyncio.Queue()
+        self.subscribers[vendor_id].add(queue)
+        return queue
+
+    def unsubscribe(self, vendor_id, queue):
+        self.subscribers[vendor_id].discard(queue)
+        if not self.subscribers[vendor_id]:
+            del self.subscribers[vendor_id]
+
+    async def wait(self, queue, timeout, coalesce=stream.COALESCE_SECONDS):
+        """Changes from a subscription, empty if none arrive within timeout"""
+        try:
+            changes = [await asyncio.wait_for(queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        await asyncio.sleep(coalesce)
+        while not queue.empty():
+            changes.append(queue.get_nowait())
+        return changes
+
+class LocalApi:
+    def __init__(self, dsn, loop):
+        self.loop = loop
+        self.hub = ChangeHub(dsn, loop)
+
+        # Handlers share one connection, so they run one at a time
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        conn = psycopg2.connect(dsn)
+        self.approve = load_handler_module('approve_index', ROOT / "lambda" / "approve_vendor" / "index.py")
+        for module in (status_index, self.approve):
+            module.get_db_connection = lambda: conn
+            module.release_db_connection = lambda c: c.rollback()
+
+    def run(self, func, *args):
+        return self.loop.run_in_executor(self.executor, func, *args)
+
+    async def changes(self, vendor_id, params):
+        """stream.handler with an asyncio wait instead of a blocking LISTEN"""
+        since = stream.normalize_etag(params.get('since'))
+        wait = stream.parse_wait(params)
+
+        queue = self.hub.subscribe(vendor_id)
+        try:
+            rendered = await self.run(status_index.render_status, vendor_id)
+            if not rendered:
+                return stream.not_found_response()
+
+            etag, body = rendered
+            if since != etag:
+                return stream.changes_response(etag, body, [])
+
+            changes = await self.hub.wait(queue, wait)
+            if not changes:
+                return stream.unchanged_response(etag)
+
+            rendered = await self.run(status_index.render_status, vendor_id, True)
+            if not rendered:
+                return stream.not_found_response()
+            return stream.changes_response(rendered[0], rendered[1], changes)
+        finally:
+            self.hub.unsubscribe(vendor_id, queue)
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        match = ROUTE.match(url.path)
+        if not match:
+            return {'statusCode': 404, 'headers': {}, 'body': json.dumps({'error': 'Not found'})}
+
+        vendor_id, action = match.groups()
+        params = dict(parse_qsl(url.query))
+        event = {
+            'httpMethod': method,
+            'path': url.path,
+            'pathParameters': {'id': vendor_id},
+            'queryStringParameters': params or None,
+            'headers': headers,
+            'body': body
+        }
+
+        if method == 'GET' and action == 'status':
+            return await self.run(status_index.handler, event, None)
+        if method == 'GET' and action == 'changes':
+            return await self.changes(vendor_id, params)
+        if method == 'POST' and action == 'approve':
+            return await self.run(self.approve.handler, event, None)
+        return {'statusCode': 405, 'headers': {}, 'body': json.dumps({'error': 'Method not allowed'})}
+
+    async def handle_client(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').strip()
+            if not request_line:
+                return
+            method, target, _ = request_line.split(' ', 2)
+
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip()] = value.strip()
+
+            length = int(headers.get('Content-Length') or headers.get('content-length') or 0)
+            body = (await reader.readexactly(length)).decode() if length else None
+
+            response = await self.dispatch(method, target, headers, body)
+            await self.write_response(writer, response)
+            print(f"{method} {target} -> {response['statusCode']}")
+        except Exception as e:
+            print(f"Error handling request: {str(e)}")
+        finally:
+            writer.close()
+
+    async def write_response(self, writer, response):
+        payload = (response.get('body') or '').encode()
+        status = HTTPStatus(response['statusCode'])
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        lines += [f"{name}: {value}" for name, value in (response.get('headers') or {}).items()]
+        lines += [f"Content-Length: {len(payload)}", "Connection: close", "", ""]
+        writer.write('\r\n'.join(lines).encode() + payload)
+        await writer.drain()
+
+async def serve(dsn, host, port):
+    api = LocalApi(dsn, asyncio.get_running_loop())
+    server = await asyncio.start_server(api.handle_client, host, port)
+    print(f"Serving vendor status on http://{host}:{port} (listening on '{CHANNEL}')")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local API stand-in for the vendor status change feed")
+    parser.add_argument('--dsn', required=True, help="PostgreSQL DSN")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.dsn, args.host, args.port))
+
+if __name__ == "__main__":
+    main()
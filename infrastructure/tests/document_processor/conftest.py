@@ -0,0 +1,46 @@
+"""
+Shared fixtures for the document processor tests
+The Lambda and the shared layer are imported from the source tree, and
+Textract and S3 are the local stand-ins from local_textract.py; nothing
+here talks to AWS or PostgreSQL.
+"""
+import os
+import sys
+
+import pytest
+
+INFRASTRUCTURE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [
+    os.path.join(INFRASTRUCTURE_DIR, 'lambda', 'document_processor'),
+    os.path.join(INFRASTRUCTURE_DIR, 'layers', 'shared', 'python')
+]
+
+import index
+from local_textract import LocalNotificationChannel, LocalS3Client, LocalTextractClient
+
+class Processor:
+    """The document processor wired to local Textract and S3 clients"""
+
+    def __init__(self, monkeypatch, pages, document, textract_class=LocalTextractClient):
+        self.channel = LocalNotificationChannel()
+        self.textract = textract_class(pages, self.channel)
+        self.stored = []
+        monkeypatch.setattr(index, 'textract_client', self.textract)
+        monkeypatch.setattr(index, 's3_client', LocalS3Client(document))
+        monkeypatch.setattr(index, 'find_cached_extraction', lambda content_sha256, document_type: None)
+        monkeypatch.setattr(index, 'update_document_status', self.update_document_status)
+
+    def update_document_status(self, document_id, vendor_id, status, extracted_data, content_sha256=None):
+        self.stored.append((status, extracted_data))
+        return True
+
+    def upload(self, s3_key):
+        vendor_id, document_type, document_id = index.parse_document_key(s3_key)
+        return index.handle_upload(vendor_id, document_id, 'local-documents', s3_key, document_type)
+
+@pytest.fixture
+def processor(monkeypatch):
+    """Factory: processor(pages, document bytes or None, textract_class=...)"""
+    def make(pages, document, **kwargs):
+        return Processor(monkeypatch, pages, document, **kwargs)
+    return make
@@ -0,0 +1,67 @@
+"""Parsing recorded multi-page get_document_analysis responses"""
+import json
+import os
+
+import index
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def load_pages(file_name):
+    with open(os.path.join(FIXTURES_DIR, file_name)) as f:
+        return json.load(f)
+
+class RecordedAnalysisClient:
+    """Replays recorded get_document_analysis pages by their NextToken chain"""
+
+    def __init__(self, pages):
+        self.first_page = pages[0]
+        self.pages_by_token = {
+            page['NextToken']: next_page for page, next_page in zip(pages, pages[1:])
+        }
+        self.calls = []
+
+    def get_document_analysis(self, JobId, MaxResults=1000, NextToken=None):
+        self.calls.append(NextToken)
+        return self.pages_by_token[NextToken] if NextToken else self.first_page
+
+def test_pages_are_followed_by_next_token():
+    client = RecordedAnalysisClient(load_pages('w9_multipage_analysis.json'))
+
+    pages = list(index.iter_textract_pages('job-1', client=client))
+
+    assert len(pages) == 3
+    assert client.calls == [None, 'b4f1c2d3-page-2', 'b4f1c2d3-page-3']
+
+def test_key_resolves_value_on_a_later_page():
+    client = RecordedAnalysisClient(load_pages('w9_multipage_analysis.json'))
+    pages = index.iter_textract_pages('job-1', client=client)
+
+    extracted_data = index.parse_textract_response(
+        index.iter_textract_blocks(pages), 'w9', job_id='job-1'
+    )
+
+    assert extracted_data['textract_job_id'] == 'job-1'
+    assert extracted_data['key_value_pairs'] == {
+        'Business Name': {'value': 'Acme Industrial Supply', 'confidence': 95.0},
+        'TIN': {'value': '12-3456789', 'confidence': 93.5}
+    }
+    assert [line['text'] for line in extracted_data['extracted_text']][-1] == (
+        'Signature of U.S. person signed 03/14/2025'
+    )
+    assert [table['table_id'] for table in extracted_data['tables']] == ['table-1']
+    assert extracted_data['average_confidence'] == 96.9
+
+    fields = extracted_data['document_specific_fields']
+    assert fields['tin'] == '12-3456789'
+    assert fields['business_name'] == 'Acme Industrial Supply'
+    assert fields['signature'] is True
+    assert fields['date_signed'] == '03/14/2025'
+
+def test_single_response_dict_is_parsed():
+    page = load_pages('w9_multipage_analysis.json')[0]
+
+    extracted_data = index.parse_textract_response(dict(page, JobId='job-2'), 'w9')
+
+    assert extracted_data['textract_job_id'] == 'job-2'
+    # The TIN's VALUE block is on page 3, which this response does not include
+    assert list(extracted_data['key_value_pairs']) == ['Business Name']
@@ -0,0 +1,107 @@
+"""Sync vs async Textract path selection, fallback and timing"""
+import json
+import re
+
+import pytest
+
+import index
+from local_textract import LocalS3Client, LocalTextractClient
+
+VENDOR_ID = '7d0c2f64-93a1-4f4e-9d43-2a8e3f0b6c11'
+DOCUMENT_ID = '0b5e7a52-6c1d-4b8e-a0f3-5d9c8e2b1a47'
+
+PAGES = [{
+    'JobStatus': 'SUCCEEDED',
+    'Blocks': [
+        {'BlockType': 'LINE', 'Id': 'line-1', 'Text': 'Request for Taxpayer Identification Number', 'Confidence': 99.1}
+    ]
+}]
+
+def pdf(page_count):
+    """Minimal uncompressed PDF with page_count page objects"""
+    kids = ' '.join(f'{3 + i} 0 R' for i in range(page_count))
+    objects = [
+        b'1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj',
+        f'2 0 obj << /Type /Pages /Kids [{kids}] /Count {page_count} >> endobj'.encode()
+    ]
+    objects += [f'{3 + i} 0 obj << /Type /Page /Parent 2 0 R >> endobj'.encode() for i in range(page_count)]
+    return b'%PDF-1.4\n' + b'\n'.join(objects) + b'\n%%EOF\n'
+
+def key(file_name, document_type='w9'):
+    return f'vendors/{VENDOR_ID}/{document_type}/{DOCUMENT_ID}/{file_name}'
+
+@pytest.mark.parametrize('file_name, document, expected', [
+    ('w9.png', b'\x89PNG\r\n\x1a\n' + b'\x00' * 64, 'sync'),
+    ('w9.pdf', pdf(1), 'sync'),
+    ('soc2.pdf', pdf(3), 'async'),
+    ('w9.pdf', pdf(1) + b'\x00' * (index.SYNC_MAX_BYTES + 1), 'async')
+], ids=['1-page image', '1-page PDF', 'multi-page PDF', 'oversized PDF'])
+def test_choose_textract_path(file_name, document, expected):
+    _, size, data = index.read_document('local-documents', key(file_name), client=LocalS3Client(document))
+
+    assert size == len(document)
+    assert index.choose_textract_path(key(file_name), data) == expected
+
+def test_sync_path_analyzes_bytes_and_records_timing(processor, capsys):
+    local = processor(PAGES, pdf(1))
+
+    response = local.upload(key('w9.pdf'))
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body'])['textract_path'] == 'sync'
+    assert local.textract.jobs == {}
+    status, extracted_data = local.stored[-1]
+    assert status == 'extracted'
+    assert extracted_data['textract_path'] == 'sync'
+    assert isinstance(extracted_data['textract_duration_ms'], int)
+    assert extracted_data['textract_duration_ms'] >= 0
+
+    metrics = [json.loads(line) for line in capsys.readouterr().out.splitlines() if '"metric"' in line]
+    assert metrics == [{
+        'metric': 'textract_extraction',
+        'path': 'sync',
+        'duration_ms': extracted_data['textract_duration_ms'],
+        'document_type': 'w9'
+    }]
+
+def test_async_path_records_job_timing(processor):
+    local = processor(PAGES, pdf(3))
+
+    response = local.upload(key('soc2.pdf', 'soc2'))
+
+    assert response['statusCode'] == 202
+    assert local.stored[-1][0] == 'processing'
+    [completed] = local.channel.deliver()
+    assert completed['statusCode'] == 200
+    status, extracted_data = local.stored[-1]
+    assert status == 'extracted'
+    assert extracted_data['textract_path'] == 'async'
+    assert extracted_data['textract_duration_ms'] >= 0
+
+class FailingAnalyzeClient(LocalTextractClient):
+    """Synchronous analysis fails, e.g. an unsupported PDF or throttling"""
+
+    def analyze_document(self, Document, FeatureTypes=None):
+        self.analyze_calls = getattr(self, 'analyze_calls', 0) + 1
+        raise RuntimeError('UnsupportedDocumentException')
+
+def test_sync_failure_falls_back_to_async_job(processor):
+    local = processor(PAGES, pdf(1), textract_class=FailingAnalyzeClient)
+
+    response = local.upload(key('w9.pdf'))
+
+    assert local.textract.analyze_calls == 1
+    assert response['statusCode'] == 202
+    assert len(local.textract.jobs) == 1
+    [completed] = local.channel.deliver()
+    assert completed['statusCode'] == 200
+    status, extracted_data = local.stored[-1]
+    assert status == 'extracted'
+    assert extracted_data['textract_path'] == 'async'
+
+@pytest.mark.parametrize('document_id', [DOCUMENT_ID, 'not a uuid: w9 (1).pdf'])
+def test_textract_request_token_is_valid(document_id):
+    token = index.textract_request_token(document_id)
+
+    assert re.fullmatch(r'[a-zA-Z0-9_-]{1,64}', token)
+    assert token == index.textract_request_token(document_id)